@@ -1,10 +1,26 @@
+import asyncio
+import logging
+from typing import Any, Dict, List, Optional
+
+from config.pool_monitor import pool_monitor
 from config.settings import settings
 from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorDatabase
+from services.indexes import reconcile_indexes
+
+logger = logging.getLogger(__name__)
+
+# Novas tentativas da criação de índices em background (espera dobra a cada falha)
+INDEX_RETRY_INITIAL_SECONDS = 1.0
+INDEX_RETRY_MAX_SECONDS = 60.0
 
 
 class DatabaseManager:
     client: AsyncIOMotorClient = None
     database: AsyncIOMotorDatabase = None
+    index_task: Optional[asyncio.Task] = None
+    index_report: Optional[Dict[str, Dict[str, List[str]]]] = None
+    index_error: Optional[str] = None
+    index_attempts: int = 0
 
 
 database_manager = DatabaseManager()
@@ -14,36 +30,104 @@ async def get_database() -> AsyncIOMotorDatabase:
     return database_manager.database
 
 
+def client_options() -> dict:
+    """Opções do cliente a partir das configurações (pool, timeouts, compressão)"""
+    options = {
+        "maxPoolSize": settings.MONGODB_MAX_POOL_SIZE,
+        "minPoolSize": settings.MONGODB_MIN_POOL_SIZE,
+        "maxIdleTimeMS": settings.MONGODB_MAX_IDLE_TIME_MS,
+        "waitQueueTimeoutMS": settings.MONGODB_WAIT_QUEUE_TIMEOUT_MS,
+        "serverSelectionTimeoutMS": settings.MONGODB_SERVER_SELECTION_TIMEOUT_MS,
+        "connectTimeoutMS": settings.MONGODB_CONNECT_TIMEOUT_MS,
+        "socketTimeoutMS": settings.MONGODB_SOCKET_TIMEOUT_MS,
+        "readPreference": settings.MONGODB_READ_PREFERENCE,
+        "event_listeners": [pool_monitor],
+    }
+    if settings.MONGODB_COMPRESSORS:
+        options["compressors"] = settings.MONGODB_COMPRESSORS
+    return options
+
+
 async def connect_to_mongo():
     """Conecta ao MongoDB"""
-    database_manager.client = AsyncIOMotorClient(settings.MONGODB_URL)
+    database_manager.client = AsyncIOMotorClient(
+        settings.MONGODB_URL, **client_options()
+    )
     database_manager.database = database_manager.client[settings.DATABASE_NAME]
 
-    await create_indexes()
+    await warm_pool()
+
+
+async def warm_pool():
+    """Abre minPoolSize conexões antes das primeiras requisições"""
+    # Comandos simultâneos obrigam o driver a abrir uma conexão para cada um
+    await asyncio.gather(
+        *[
+            database_manager.database.command("ping")
+            for _ in range(max(settings.MONGODB_MIN_POOL_SIZE, 1))
+        ]
+    )
 
 
 async def close_mongo_connection():
     """Fecha a conexão com o MongoDB"""
+    if database_manager.index_task and not database_manager.index_task.done():
+        database_manager.index_task.cancel()
     if database_manager.client:
         database_manager.client.close()
 
 
-async def create_indexes():
-    """Cria índices para otimizar consultas"""
+async def create_indexes(replace: bool = False) -> Dict[str, Dict[str, List[str]]]:
+    """Aplica os índices declarados pelos serviços, criando só os que faltam"""
     if database_manager.database is None:
-        return
-
-    await database_manager.database.murais.create_index("tags")
-    await database_manager.database.murais.create_index("local.bairro")
-    await database_manager.database.murais.create_index("artista_ids")
-    await database_manager.database.murais.create_index("data_criacao")
-
-    await database_manager.database.avaliacoes.create_index("mural_id")
-    await database_manager.database.avaliacoes.create_index("usuario_id")
-    await database_manager.database.avaliacoes.create_index(
-        [("mural_id", 1), ("usuario_id", 1)], unique=True
-    )
-
-    await database_manager.database.usuarios.create_index("email", unique=True)
-
-    await database_manager.database.artistas.create_index("nome")
+        return {}
+
+    report = await reconcile_indexes(database_manager.database, replace)
+    database_manager.index_report = report
+    return report
+
+
+async def start_index_build():
+    """Aplica os índices conforme INDEX_BUILD_MODE (blocking, background ou off)"""
+    if settings.INDEX_BUILD_MODE == "blocking":
+        await create_indexes()
+    elif settings.INDEX_BUILD_MODE == "background":
+        database_manager.index_task = asyncio.create_task(_build_indexes())
+
+
+async def _build_indexes():
+    """Tenta criar os índices até conseguir; o último erro fica visível no /ready"""
+    delay = INDEX_RETRY_INITIAL_SECONDS
+    while True:
+        database_manager.index_attempts += 1
+        try:
+            await create_indexes()
+        except Exception as e:
+            database_manager.index_error = str(e)
+            logger.exception(
+                "Erro ao criar índices (tentativa %d); nova tentativa em %.0fs",
+                database_manager.index_attempts,
+                delay,
+            )
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, INDEX_RETRY_MAX_SECONDS)
+        else:
+            database_manager.index_error = None
+            return
+
+
+def index_status() -> Dict[str, Any]:
+    """Estado da criação de índices, para o /ready"""
+    report = database_manager.index_report or {}
+    return {
+        "modo": settings.INDEX_BUILD_MODE,
+        "prontos": settings.INDEX_BUILD_MODE == "off"
+        or database_manager.index_report is not None,
+        "erro": database_manager.index_error,
+        "tentativas": database_manager.index_attempts,
+        "divergentes": {
+            collection: result["divergentes"]
+            for collection, result in report.items()
+            if result["divergentes"]
+        },
+    }
@@ -0,0 +1,92 @@
+import threading
+from collections import deque
+from typing import Any, Dict
+
+from pymongo import monitoring
+
+
+class PoolMonitor(monitoring.ConnectionPoolListener):
+    """Métricas do pool de conexões do MongoDB a partir dos eventos de monitoramento.
+
+    Os eventos chegam das threads do driver; os contadores são protegidos por lock.
+    """
+
+    def __init__(self, samples: int = 1024):
+        self._lock = threading.Lock()
+        # Espera por uma conexão (ms) nos checkouts mais recentes
+        self._waits = deque(maxlen=samples)
+        self.open = 0
+        self.in_use = 0
+        self.checkouts = 0
+        self.checkout_failures = 0
+        self.clears = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            waits = sorted(self._waits)
+            return {
+                "conexoes_abertas": self.open,
+                "conexoes_em_uso": self.in_use,
+                "checkouts": self.checkouts,
+                "falhas_checkout": self.checkout_failures,
+                "limpezas_pool": self.clears,
+                "espera_ms": {
+                    "p50": _percentile(waits, 0.5),
+                    "p99": _percentile(waits, 0.99),
+                    "max": waits[-1] if waits else None,
+                },
+            }
+
+    def connection_checked_out(self, event: monitoring.ConnectionCheckedOutEvent):
+        with self._lock:
+            self.in_use += 1
+            self.checkouts += 1
+            self._waits.append(event.duration * 1000)
+
+    def connection_checked_in(self, event: monitoring.ConnectionCheckedInEvent):
+        with self._lock:
+            self.in_use -= 1
+
+    def connection_check_out_failed(
+        self, event: monitoring.ConnectionCheckOutFailedEvent
+    ):
+        with self._lock:
+            self.checkout_failures += 1
+            self._waits.append(event.duration * 1000)
+
+    def connection_created(self, event: monitoring.ConnectionCreatedEvent):
+        with self._lock:
+            self.open += 1
+
+    def connection_closed(self, event: monitoring.ConnectionClosedEvent):
+        with self._lock:
+            self.open -= 1
+
+    def pool_cleared(self, event: monitoring.PoolClearedEvent):
+        with self._lock:
+            self.clears += 1
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_check_out_started(self, event):
+        pass
+
+
+def _percentile(ordered, fraction):
+    if not ordered:
+        return None
+    index = min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))
+    return round(ordered[index], 2)
+
+
+pool_monitor = PoolMonitor()
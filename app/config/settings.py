@@ -5,6 +5,79 @@ class Settings(BaseSettings):
     MONGODB_URL: str = "mongodb://localhost:27017"
     DATABASE_NAME: str = "mural_map"
 
+    # Pool de conexões e timeouts do cliente MongoDB
+    MONGODB_MAX_POOL_SIZE: int = 100
+    MONGODB_MIN_POOL_SIZE: int = 10
+    MONGODB_MAX_IDLE_TIME_MS: int = 300_000
+    MONGODB_WAIT_QUEUE_TIMEOUT_MS: int = 2000
+    MONGODB_SERVER_SELECTION_TIMEOUT_MS: int = 5000
+    MONGODB_CONNECT_TIMEOUT_MS: int = 5000
+    MONGODB_SOCKET_TIMEOUT_MS: int = 30_000
+    # Compressão do protocolo, em ordem de preferência (zstd requer o extra
+    # pymongo[zstd], snappy o pymongo[snappy]); vazio desativa
+    MONGODB_COMPRESSORS: str = "zstd,zlib"
+    MONGODB_READ_PREFERENCE: str = "primary"
+
+    # Índices na inicialização: background (não bloqueia; /ready informa),
+    # blocking (antes de servir) ou off (apenas via manage.py indices)
+    INDEX_BUILD_MODE: str = "background"
+
+    # Senhas: custo do bcrypt (hashes com outro custo são refeitos no login) e
+    # pool de threads dedicado; além de MAX_PENDING chamadas, responde 503
+    BCRYPT_ROUNDS: int = 12
+    PASSWORD_HASH_WORKERS: int = 4
+    PASSWORD_HASH_MAX_PENDING: int = 32
+
+    # Tokens JWT de acesso/renovação; a chave é obrigatória (definida no .env)
+    # e a aplicação não inicia com uma chave curta ou a do .env.example
+    JWT_SECRET_KEY: str
+    JWT_ALGORITHM: str = "HS256"
+    ACCESS_TOKEN_EXPIRE_MINUTES: int = 15
+    REFRESH_TOKEN_EXPIRE_DAYS: int = 7
+    TOKEN_CACHE_MAXSIZE: int = 10_000
+    TOKEN_REVOCATION_RELOAD_SECONDS: int = 30
+
+    # Contagem estimada de listagens filtradas (count=estimated)
+    COUNT_CACHE_TTL_SECONDS: int = 60
+    COUNT_CACHE_MAXSIZE: int = 1024
+
+    # Cache das agregações analíticas
+    ANALYTICS_CACHE_TTL_SECONDS: int = 300
+    ANALYTICS_CACHE_MAXSIZE: int = 1024
+
+    # Intervalo de atualização das coleções stats_bairro/stats_artista
+    ROLLUP_REFRESH_SECONDS: int = 60
+
+    # Importação em lote (NDJSON)
+    BULK_CHUNK_SIZE: int = 1000
+    BULK_MAX_ERRORS: int = 1000
+    BULK_MAX_LINE_BYTES: int = 1_048_576
+
+    # Exportação de murais: documentos por lote do cursor
+    EXPORT_BATCH_SIZE: int = 500
+
+    # Mapa (/murais/bbox): abaixo deste zoom os murais são agrupados em clusters
+    BBOX_CLUSTER_MAX_ZOOM: int = 14
+    BBOX_MAX_MURAIS: int = 500
+    BBOX_MAX_CLUSTERS: int = 1000
+    BBOX_MAX_TILES: int = 32
+
+    # Busca textual: profundidade máxima de paginação (page * limit)
+    SEARCH_MAX_RESULTS: int = 1000
+
+    # Autocompletar: recarga completa periódica (escritas de outros processos)
+    AUTOCOMPLETE_RELOAD_SECONDS: int = 300
+
+    # Compressão das respostas (gzip/brotli negociados pelo Accept-Encoding)
+    COMPRESSION_MINIMUM_SIZE: int = 1024
+    COMPRESSION_GZIP_LEVEL: int = 6
+    COMPRESSION_BROTLI_QUALITY: int = 4
+
+    # Cache-Control das respostas com ETag: recursos sempre revalidados,
+    # estatísticas agregadas reaproveitáveis por alguns segundos
+    CACHE_CONTROL_RESOURCE: str = "public, no-cache"
+    CACHE_CONTROL_ANALYTICS: str = "public, max-age=60"
+
     class Config:
         env_file = ".env"
         env_file_encoding = "utf-8"
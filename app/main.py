@@ -1,20 +1,58 @@
 from contextlib import asynccontextmanager
 
 import uvicorn
-from config.database import close_mongo_connection, connect_to_mongo
+from config.database import (
+    close_mongo_connection,
+    connect_to_mongo,
+    database_manager,
+    index_status,
+    start_index_build,
+)
+from config.pool_monitor import pool_monitor
 from config.settings import Settings
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from routes import artistas, avaliacoes, locais, murais, usuarios
-from middleware.error_handler import ErrorHandlerMiddleware
+from routes import (
+    artistas,
+    autocomplete as autocomplete_routes,
+    avaliacoes,
+    locais,
+    murais,
+    search,
+    usuarios,
+)
+from middleware.compression import CompressionMiddleware
+from middleware.error_handler import register_exception_handlers
+from middleware.timing import TimingMiddleware
+from routes.responses import MongoJSONResponse
+from services.autocomplete import autocomplete
+from services.passwords import password_hasher
+from services.registry import ServiceRegistry
+from services.rollup_service import rollup_scheduler
+from services.tokens import token_manager
 
 settings = Settings()
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
+    token_manager.check_secret_key()
     await connect_to_mongo()
+    # Serviços criados uma vez e injetados pelas dependências das rotas
+    app.state.services = ServiceRegistry(database_manager.database)
+    await start_index_build()
+    rollup_scheduler.start(app.state.services.rollups, settings.ROLLUP_REFRESH_SECONDS)
+    await autocomplete.load(database_manager.database)
+    autocomplete.start(database_manager.database, settings.AUTOCOMPLETE_RELOAD_SECONDS)
+    await token_manager.load_revoked(database_manager.database)
+    token_manager.start(
+        database_manager.database, settings.TOKEN_REVOCATION_RELOAD_SECONDS
+    )
     yield
+    await token_manager.stop()
+    await autocomplete.stop()
+    await rollup_scheduler.stop()
+    password_hasher.shutdown()
     await close_mongo_connection()
 
 
@@ -23,6 +61,7 @@ app = FastAPI(
     description="API para gerenciar murais, artistas e avaliações de arte urbana.",
     version="1.0.0",
     lifespan=lifespan,
+    default_response_class=MongoJSONResponse,
 )
 
 app.add_middleware(
@@ -33,13 +72,24 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-app.add_middleware(ErrorHandlerMiddleware)
+register_exception_handlers(app)
+
+app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=settings.COMPRESSION_MINIMUM_SIZE,
+    gzip_level=settings.COMPRESSION_GZIP_LEVEL,
+    brotli_quality=settings.COMPRESSION_BROTLI_QUALITY,
+)
+
+app.add_middleware(TimingMiddleware)
 
 app.include_router(murais.router)
 app.include_router(artistas.router)
 app.include_router(usuarios.router)
 app.include_router(avaliacoes.router)
 app.include_router(locais.router)
+app.include_router(search.router)
+app.include_router(autocomplete_routes.router)
 
 
 @app.get("/")
@@ -53,7 +103,25 @@ async def root():
 
 @app.get("/health")
 async def health_check():
-    return {"status": "healthy"}
+    return {
+        "status": "healthy",
+        "mongodb": pool_monitor.stats(),
+        "senhas": password_hasher.stats(),
+    }
+
+
+@app.get("/ready")
+async def readiness_check():
+    indices = index_status()
+    return MongoJSONResponse(
+        {"status": "ready" if indices["prontos"] else "starting", "indices": indices},
+        status_code=200 if indices["prontos"] else 503,
+    )
+
+
+@app.get("/cache/stats")
+async def cache_stats(request: Request):
+    return request.app.state.services.stats()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,143 @@
+import argparse
+import asyncio
+
+from config.database import (
+    close_mongo_connection,
+    connect_to_mongo,
+    create_indexes,
+    database_manager,
+)
+from config.settings import settings
+from services.artista_service import ArtistaService
+from services.avaliacao_service import AvaliacaoService
+from services.local_service import LocalService
+from services.mural_service import MuralService
+from services.rollup_service import RollupService
+from services.tag_stats import TagStatsService
+
+
+async def sincronizar_locais():
+    """Recalcula a localização GeoJSON dos locais e os campos desnormalizados nos murais"""
+    total_locais = await LocalService(database_manager.database).sync_localizacao()
+    print(f"{total_locais} locais atualizados")
+
+    total = await MuralService(database_manager.database).sync_local_fields()
+    print(f"{total} murais atualizados")
+
+
+async def normalizar_textos():
+    """Preenche os campos normalizados (sem acentos) de locais, artistas e murais"""
+    database = database_manager.database
+    batch_size = settings.BULK_CHUNK_SIZE
+
+    total_locais = await LocalService(database).sync_normalized_fields(batch_size)
+    print(f"{total_locais} locais atualizados")
+
+    total_artistas = await ArtistaService(database).sync_normalized_fields(batch_size)
+    print(f"{total_artistas} artistas atualizados")
+
+    # Bairro e cidade dos murais são cópias normalizadas dos campos do local
+    total_murais = await MuralService(database).sync_local_fields()
+    print(f"{total_murais} murais atualizados")
+
+    await RollupService(database).refresh("bairro")
+    await TagStatsService(database).rebuild()
+
+
+async def reconstruir_avaliacoes():
+    """Recalcula do zero os resumos de avaliação dos murais"""
+    service = AvaliacaoService(database_manager.database)
+    total = await service.rebuild_resumos()
+    print(f"{total} murais com avaliações")
+
+
+async def verificar_avaliacoes():
+    """Verifica a consistência dos resumos de avaliação dos murais"""
+    service = AvaliacaoService(database_manager.database)
+    resultado = await service.check_resumos()
+    for item in resultado["divergentes"]:
+        print(f"{item['mural_id']}: atual={item['atual']} esperado={item['esperado']}")
+    print(
+        f"{resultado['verificados']} murais verificados, "
+        f"{len(resultado['divergentes'])} divergentes"
+    )
+
+
+async def migrar_avaliacoes():
+    """Converte em ObjectId as referências das avaliações e confere os índices"""
+    service = AvaliacaoService(database_manager.database)
+    resultado = await service.migrate_reference_ids(settings.BULK_CHUNK_SIZE)
+    for id in resultado["invalidas"]:
+        print(f"{id}: referência inválida")
+    for id in resultado["duplicadas"]:
+        print(f"{id}: avaliação duplicada")
+    print(
+        f"{resultado['convertidas']} avaliações convertidas, "
+        f"{resultado['restantes']} com referências em string"
+    )
+
+    for field, stage in (await service.check_reference_indexes()).items():
+        print(f"consulta por {field}: {stage}")
+
+
+async def atualizar_estatisticas():
+    """Recalcula as coleções stats_bairro e stats_artista"""
+    await RollupService(database_manager.database).refresh()
+    print("Estatísticas atualizadas")
+
+
+async def recontar_tags():
+    """Recalcula os contadores de tags (geral e por bairro) em stats_tag"""
+    total = await TagStatsService(database_manager.database).rebuild()
+    print(f"{total} tags contadas")
+
+
+async def indices(replace: bool = False):
+    """Cria os índices declarados que faltam e lista os divergentes"""
+    report = await create_indexes(replace)
+    for collection, result in report.items():
+        for status, names in result.items():
+            if names:
+                print(f"{collection}: {status}: {', '.join(names)}")
+
+
+async def recriar_indices():
+    """Como indices, mas remove e recria os índices divergentes"""
+    await indices(replace=True)
+
+
+COMMANDS = {
+    "sincronizar-locais": sincronizar_locais,
+    "normalizar-textos": normalizar_textos,
+    "reconstruir-avaliacoes": reconstruir_avaliacoes,
+    "verificar-avaliacoes": verificar_avaliacoes,
+    "migrar-avaliacoes": migrar_avaliacoes,
+    "atualizar-estatisticas": atualizar_estatisticas,
+    "recontar-tags": recontar_tags,
+    "indices": indices,
+    "recriar-indices": recriar_indices,
+}
+
+
+async def run(command: str):
+    await connect_to_mongo()
+    try:
+        await COMMANDS[command]()
+    finally:
+        await close_mongo_connection()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Comandos administrativos da Mural Map API"
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    for name, handler in COMMANDS.items():
+        subparsers.add_parser(name, help=handler.__doc__)
+
+    args = parser.parse_args()
+    asyncio.run(run(args.command))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,16 +1,38 @@
-from fastapi import Request, HTTPException
+from fastapi import FastAPI, Request
 from fastapi.responses import JSONResponse
-from starlette.middleware.base import BaseHTTPMiddleware
-
-
-class ErrorHandlerMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request: Request, call_next):
-        try:
-            response = await call_next(request)
-            return response
-        except ValueError as e:
-            return JSONResponse(status_code=400, content={"detail": str(e)})
-        except Exception as e:
-            return JSONResponse(
-                status_code=500, content={"detail": "Erro interno do servidor"}
-            )
+from pymongo.errors import DuplicateKeyError
+from services.base import ConflictError
+from services.passwords import PasswordHasherBusy
+
+
+async def value_error_handler(request: Request, exc: ValueError) -> JSONResponse:
+    return JSONResponse(status_code=400, content={"detail": str(exc)})
+
+
+async def conflict_handler(request: Request, exc: Exception) -> JSONResponse:
+    # DuplicateKeyError sem tratamento específico: índice único violado
+    detail = str(exc) if isinstance(exc, ConflictError) else "Registro duplicado"
+    return JSONResponse(status_code=409, content={"detail": detail})
+
+
+async def busy_handler(request: Request, exc: PasswordHasherBusy) -> JSONResponse:
+    return JSONResponse(
+        status_code=503, content={"detail": str(exc)}, headers={"Retry-After": "1"}
+    )
+
+
+async def internal_error_handler(request: Request, exc: Exception) -> JSONResponse:
+    return JSONResponse(status_code=500, content={"detail": "Erro interno do servidor"})
+
+
+def register_exception_handlers(app: FastAPI) -> None:
+    """Mapeia exceções não tratadas pelas rotas para respostas JSON.
+
+    Handlers registrados substituem o antigo BaseHTTPMiddleware, que criava
+    uma task e reembalava o corpo de cada resposta.
+    """
+    app.add_exception_handler(ValueError, value_error_handler)
+    app.add_exception_handler(ConflictError, conflict_handler)
+    app.add_exception_handler(DuplicateKeyError, conflict_handler)
+    app.add_exception_handler(PasswordHasherBusy, busy_handler)
+    app.add_exception_handler(Exception, internal_error_handler)
@@ -2,6 +2,8 @@ from typing import Dict, Optional
 
 from pydantic import BaseModel, Field, HttpUrl
 
+from .common import PyObjectId
+
 
 class ArtistaBase(BaseModel):
     nome: str = Field(..., min_length=1, max_length=200)
@@ -22,7 +24,7 @@ class ArtistaUpdate(BaseModel):
 
 
 class Artista(ArtistaBase):
-    id: str = Field(alias="_id")
+    id: PyObjectId = Field(alias="_id")
 
     class Config:
         allow_population_by_field_name = True
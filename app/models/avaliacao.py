@@ -2,6 +2,8 @@ from typing import Optional
 from datetime import datetime
 from pydantic import BaseModel, Field, validator
 
+from .common import PyObjectId
+
 
 class AvaliacaoBase(BaseModel):
     nota: int = Field(..., ge=1, le=5)
@@ -15,8 +17,8 @@ class AvaliacaoBase(BaseModel):
 
 
 class AvaliacaoCreate(AvaliacaoBase):
-    mural_id: str
-    usuario_id: str
+    # O usuário vem do token de acesso
+    mural_id: PyObjectId
 
 
 class AvaliacaoUpdate(BaseModel):
@@ -31,9 +33,9 @@ class AvaliacaoUpdate(BaseModel):
 
 
 class Avaliacao(AvaliacaoBase):
-    id: str = Field(alias="_id")
-    mural_id: str
-    usuario_id: str
+    id: PyObjectId = Field(alias="_id")
+    mural_id: PyObjectId
+    usuario_id: PyObjectId
     data: datetime
 
     class Config:
@@ -0,0 +1,35 @@
+from typing import Annotated, Any, Optional
+
+from bson import ObjectId
+from bson.errors import InvalidId
+from pydantic import PlainSerializer, PlainValidator, WithJsonSchema
+
+
+def parse_object_id(value: Any, message: str = "ID inválido") -> ObjectId:
+    """Converte um id (string hexadecimal ou ObjectId) em ObjectId; ValueError se inválido"""
+    if isinstance(value, ObjectId):
+        return value
+    # ObjectId(None) geraria um id novo em vez de falhar
+    if isinstance(value, str):
+        try:
+            return ObjectId(value)
+        except InvalidId:
+            pass
+    raise ValueError(message)
+
+
+def object_id_or_none(value: Any) -> Optional[ObjectId]:
+    """Como parse_object_id, mas None para ids inválidos (a rota responde 404)"""
+    try:
+        return parse_object_id(value)
+    except ValueError:
+        return None
+
+
+# Referência gravada como ObjectId no MongoDB e exposta como string na API
+PyObjectId = Annotated[
+    ObjectId,
+    PlainValidator(parse_object_id),
+    PlainSerializer(str, return_type=str, when_used="json"),
+    WithJsonSchema({"type": "string", "pattern": "^[0-9a-fA-F]{24}$"}),
+]
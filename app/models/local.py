@@ -2,6 +2,8 @@ from typing import Optional
 
 from pydantic import BaseModel, Field, validator
 
+from .common import PyObjectId
+
 
 class LocalBase(BaseModel):
     nome: str = Field(..., min_length=1, max_length=200)
@@ -54,7 +56,7 @@ class LocalUpdate(BaseModel):
 
 
 class Local(LocalBase):
-    id: str = Field(alias="_id")
+    id: PyObjectId = Field(alias="_id")
 
     class Config:
         allow_population_by_field_name = True
@@ -3,6 +3,8 @@ from typing import List, Optional
 
 from pydantic import BaseModel, Field, HttpUrl, validator
 
+from .common import PyObjectId
+
 
 class MuralBase(BaseModel):
     titulo: str = Field(..., min_length=1, max_length=200)
@@ -26,10 +28,10 @@ class MuralUpdate(BaseModel):
 
 
 class Mural(MuralBase):
-    id: str = Field(alias="_id")
+    id: PyObjectId = Field(alias="_id")
     data_criacao: datetime
-    local_id: str
-    artista_ids: List[str] = Field(default_factory=list)
+    local_id: PyObjectId
+    artista_ids: List[PyObjectId] = Field(default_factory=list)
 
     class Config:
         allow_population_by_field_name = True
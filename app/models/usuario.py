@@ -1,10 +1,9 @@
 from datetime import datetime
 from typing import Optional
 
-from passlib.context import CryptContext
 from pydantic import BaseModel, EmailStr, Field
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+from .common import PyObjectId
 
 
 class UsuarioBase(BaseModel):
@@ -21,23 +20,20 @@ class UsuarioLogin(BaseModel):
     senha: str
 
 
+class TokenRefresh(BaseModel):
+    refresh_token: str
+
+
 class UsuarioUpdate(BaseModel):
     nome: Optional[str] = Field(None, min_length=1, max_length=200)
     email: Optional[EmailStr] = None
 
 
 class Usuario(UsuarioBase):
-    id: str = Field(alias="_id")
+    id: PyObjectId = Field(alias="_id")
     senha_hash: str
     data_cadastro: datetime
 
     class Config:
         allow_population_by_field_name = True
         populate_by_name = True
-
-    @classmethod
-    def hash_password(cls, password: str) -> str:
-        return pwd_context.hash(password)
-
-    def verify_password(self, password: str) -> bool:
-        return pwd_context.verify(password, self.senha_hash)
@@ -1,41 +1,67 @@
 from typing import List
 
-from config.database import get_database
-from fastapi import APIRouter, Depends, HTTPException, Query
+from config.settings import settings
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from models.artista import Artista, ArtistaCreate, ArtistaUpdate
-from motor.motor_asyncio import AsyncIOMotorDatabase
+from routes.caching import is_not_modified, make_etag, not_modified, set_cache_headers
+from routes.dependencies import get_services
+from routes.responses import MongoJSONResponse
+from services.base import CountMode
 from services.artista_service import ArtistaService
+from services.registry import ServiceRegistry
 
 router = APIRouter(prefix="/artistas", tags=["artistas"])
 
 
 async def get_artista_service(
-    db: AsyncIOMotorDatabase = Depends(get_database),
+    services: ServiceRegistry = Depends(get_services),
 ) -> ArtistaService:
-    return ArtistaService(db)
+    return services.artistas
 
 
 @router.post("/", response_model=dict)
 async def create_artista(
-    artista: ArtistaCreate, db: AsyncIOMotorDatabase = Depends(get_database)
+    artista: ArtistaCreate, service: ArtistaService = Depends(get_artista_service)
 ):
     """Criar um novo artista"""
     try:
-        service = ArtistaService(db)
         result = await service.create(artista.dict())
-        return result  # Return directly, not wrapped in another object
+        return MongoJSONResponse(result)
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 
+@router.post("/bulk", response_model=dict)
+async def importar_artistas(
+    request: Request,
+    chunk_size: int = Query(
+        settings.BULK_CHUNK_SIZE,
+        ge=1,
+        le=10000,
+        description="Documentos por lote de escrita",
+    ),
+    service: ArtistaService = Depends(get_artista_service),
+):
+    """Importar artistas em lote a partir de NDJSON (um objeto JSON por linha)"""
+    try:
+        return await service.bulk_import(request.stream(), ArtistaCreate, chunk_size)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
 @router.get("/", response_model=dict)
 async def listar_artistas(
     page: int = Query(1, ge=1, description="Número da página"),
     limit: int = Query(10, ge=1, le=100, description="Itens por página"),
+    count: CountMode = Query(
+        CountMode.EXACT, description="Contagem do total: exact, estimated ou none"
+    ),
     service: ArtistaService = Depends(get_artista_service),
 ):
     """Listar artistas com paginação"""
-    return await service.list_with_pagination(page=page, limit=limit)
+    return MongoJSONResponse(
+        await service.list_with_pagination(page=page, limit=limit, count_mode=count)
+    )
 
 
 @router.get("/search", response_model=List[Artista])
@@ -44,17 +70,27 @@ async def buscar_artistas_por_nome(
     service: ArtistaService = Depends(get_artista_service),
 ):
     """Buscar artistas por nome"""
-    return await service.search_by_name(nome)
+    try:
+        return await service.search_by_name(nome)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 
 @router.get("/{artista_id}", response_model=Artista)
 async def obter_artista(
-    artista_id: str, service: ArtistaService = Depends(get_artista_service)
+    artista_id: str,
+    request: Request,
+    response: Response,
+    service: ArtistaService = Depends(get_artista_service),
 ):
     """Obter artista por ID"""
     artista = await service.get_by_id(artista_id)
     if not artista:
         raise HTTPException(status_code=404, detail="Artista não encontrado")
+    etag = make_etag(artista_id, artista.get("versao", 0))
+    if is_not_modified(request, etag):
+        return not_modified(request, etag, settings.CACHE_CONTROL_RESOURCE)
+    set_cache_headers(response, etag, settings.CACHE_CONTROL_RESOURCE)
     return artista
 
 
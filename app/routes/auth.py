@@ -0,0 +1,33 @@
+from typing import Optional
+
+from fastapi import Depends, HTTPException
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
+from routes.dependencies import get_services
+from services.registry import ServiceRegistry
+from services.tokens import InvalidToken
+
+bearer_scheme = HTTPBearer(auto_error=False)
+
+
+async def get_token_claims(
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(bearer_scheme),
+    services: ServiceRegistry = Depends(get_services),
+) -> dict:
+    """Claims do token de acesso enviado em Authorization: Bearer"""
+    if credentials is None:
+        raise HTTPException(
+            status_code=401,
+            detail="Não autenticado",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    try:
+        return services.tokens.verify(credentials.credentials)
+    except InvalidToken as e:
+        raise HTTPException(
+            status_code=401, detail=str(e), headers={"WWW-Authenticate": "Bearer"}
+        )
+
+
+async def get_current_usuario_id(claims: dict = Depends(get_token_claims)) -> str:
+    """ID do usuário autenticado, sem consulta ao banco"""
+    return claims["sub"]
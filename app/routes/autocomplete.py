@@ -0,0 +1,16 @@
+from typing import Any, Dict
+
+from fastapi import APIRouter, Query
+from services.autocomplete import AutocompleteType, autocomplete
+
+router = APIRouter(prefix="/autocomplete", tags=["busca"])
+
+
+@router.get("/", response_model=Dict[str, Any])
+async def autocompletar(
+    q: str = Query(..., min_length=1, description="Início do texto digitado"),
+    type: AutocompleteType = Query(..., description="artista, bairro ou tag"),
+    limit: int = Query(10, ge=1, le=50, description="Número de sugestões"),
+):
+    """Sugestões por prefixo, servidas da memória sem consultar o banco"""
+    return {"items": autocomplete.suggest(type, q, limit)}
@@ -1,31 +1,34 @@
 from typing import Any, Dict
 
 from fastapi import APIRouter, Depends, HTTPException, Query
-from motor.motor_asyncio import AsyncIOMotorDatabase
 
-from config.database import get_database
 from models.avaliacao import Avaliacao, AvaliacaoCreate, AvaliacaoUpdate
+from routes.auth import get_current_usuario_id
+from routes.dependencies import get_services
+from routes.responses import MongoJSONResponse
+from services.base import CountMode
 from services.avaliacao_service import AvaliacaoService
+from services.registry import ServiceRegistry
 
 router = APIRouter(prefix="/avaliacoes", tags=["avaliacoes"])
 
 
 async def get_avaliacao_service(
-    db: AsyncIOMotorDatabase = Depends(get_database),
+    services: ServiceRegistry = Depends(get_services),
 ) -> AvaliacaoService:
-    return AvaliacaoService(db)
+    return services.avaliacoes
 
 
 @router.post("/", response_model=dict)
 async def create_avaliacao(
-    avaliacao: AvaliacaoCreate, db: AsyncIOMotorDatabase = Depends(get_database)
+    avaliacao: AvaliacaoCreate,
+    usuario_id: str = Depends(get_current_usuario_id),
+    service: AvaliacaoService = Depends(get_avaliacao_service),
 ):
-    """Criar uma nova avaliação"""
+    """Criar uma nova avaliação do usuário autenticado"""
     try:
-        service = AvaliacaoService(db)
-        result = await service.create_avaliacao(avaliacao)
-        return result  # Return directly, not wrapped
-    except Exception as e:
+        return MongoJSONResponse(await service.create_avaliacao(avaliacao, usuario_id))
+    except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 
@@ -33,10 +36,15 @@ async def create_avaliacao(
 async def listar_avaliacoes(
     page: int = Query(1, ge=1, description="Número da página"),
     limit: int = Query(10, ge=1, le=100, description="Itens por página"),
+    count: CountMode = Query(
+        CountMode.EXACT, description="Contagem do total: exact, estimated ou none"
+    ),
     service: AvaliacaoService = Depends(get_avaliacao_service),
 ):
     """Listar avaliações com paginação"""
-    return await service.list_with_pagination(page=page, limit=limit)
+    return MongoJSONResponse(
+        await service.list_with_pagination(page=page, limit=limit, count_mode=count)
+    )
 
 
 @router.get("/mural/{mural_id}", response_model=dict)
@@ -44,10 +52,15 @@ async def listar_avaliacoes_mural(
     mural_id: str,
     page: int = Query(1, ge=1, description="Número da página"),
     limit: int = Query(10, ge=1, le=100, description="Itens por página"),
+    count: CountMode = Query(
+        CountMode.EXACT, description="Contagem do total: exact, estimated ou none"
+    ),
     service: AvaliacaoService = Depends(get_avaliacao_service),
 ):
     """Listar avaliações de um mural"""
-    return await service.get_by_mural(mural_id, page, limit)
+    return MongoJSONResponse(
+        await service.get_by_mural(mural_id, page, limit, count_mode=count)
+    )
 
 
 @router.get("/usuario/{usuario_id}", response_model=dict)
@@ -55,10 +68,15 @@ async def listar_avaliacoes_usuario(
     usuario_id: str,
     page: int = Query(1, ge=1, description="Número da página"),
     limit: int = Query(10, ge=1, le=100, description="Itens por página"),
+    count: CountMode = Query(
+        CountMode.EXACT, description="Contagem do total: exact, estimated ou none"
+    ),
     service: AvaliacaoService = Depends(get_avaliacao_service),
 ):
     """Listar avaliações de um usuário"""
-    return await service.get_by_usuario(usuario_id, page, limit)
+    return MongoJSONResponse(
+        await service.get_by_usuario(usuario_id, page, limit, count_mode=count)
+    )
 
 
 @router.get("/mural/{mural_id}/estatisticas", response_model=Dict[str, Any])
@@ -84,10 +102,11 @@ async def obter_avaliacao(
 async def atualizar_avaliacao(
     avaliacao_id: str,
     avaliacao_data: AvaliacaoUpdate,
+    usuario_id: str = Depends(get_current_usuario_id),
     service: AvaliacaoService = Depends(get_avaliacao_service),
 ):
-    """Atualizar avaliação"""
-    success = await service.update_avaliacao(avaliacao_id, avaliacao_data)
+    """Atualizar avaliação do usuário autenticado"""
+    success = await service.update_avaliacao(avaliacao_id, avaliacao_data, usuario_id)
     if not success:
         raise HTTPException(status_code=404, detail="Avaliação não encontrada")
     return {"message": "Avaliação atualizada com sucesso"}
@@ -95,10 +114,12 @@ async def atualizar_avaliacao(
 
 @router.delete("/{avaliacao_id}", response_model=dict)
 async def deletar_avaliacao(
-    avaliacao_id: str, service: AvaliacaoService = Depends(get_avaliacao_service)
+    avaliacao_id: str,
+    usuario_id: str = Depends(get_current_usuario_id),
+    service: AvaliacaoService = Depends(get_avaliacao_service),
 ):
-    """Deletar avaliação"""
-    success = await service.delete(avaliacao_id)
+    """Deletar avaliação do usuário autenticado"""
+    success = await service.delete(avaliacao_id, usuario_id)
     if not success:
         raise HTTPException(status_code=404, detail="Avaliação não encontrada")
     return {"message": "Avaliação deletada com sucesso"}
@@ -0,0 +1,72 @@
+import hashlib
+from typing import Any, Optional, Sequence
+
+from fastapi import Request, Response
+from services.generation import GenerationService
+
+# Sufixos que o CompressionMiddleware acrescenta ao ETag da variante comprimida
+ENCODING_SUFFIXES = ("-br", "-gzip")
+
+
+def make_etag(*parts: Any) -> str:
+    """ETag forte a partir de identificadores e contadores de versão"""
+    digest = hashlib.blake2b(
+        "|".join(str(part) for part in parts).encode("utf-8"), digest_size=12
+    )
+    return f'"{digest.hexdigest()}"'
+
+
+def _strip_etag(etag: str) -> str:
+    etag = etag.strip()
+    if etag.startswith("W/"):
+        etag = etag[2:]
+    for suffix in ENCODING_SUFFIXES:
+        if etag.endswith(f'{suffix}"'):
+            return etag[: -len(suffix) - 1] + '"'
+    return etag
+
+
+def _matching_etag(request: Request, etag: str) -> Optional[str]:
+    """O ETag do If-None-Match que corresponde a este, como o cliente o enviou"""
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return None
+    if if_none_match.strip() == "*":
+        return etag
+    for tag in if_none_match.split(","):
+        if _strip_etag(tag) == etag:
+            return tag.strip()
+    return None
+
+
+def is_not_modified(request: Request, etag: str) -> bool:
+    """Se o If-None-Match do cliente já contém este ETag"""
+    return _matching_etag(request, etag) is not None
+
+
+def not_modified(request: Request, etag: str, cache_control: str) -> Response:
+    """Resposta 304 sem corpo, repetindo os cabeçalhos de cache.
+
+    O ETag devolvido é o que o cliente enviou no If-None-Match: se ele guardou
+    a variante comprimida (sufixo -gzip/-br), o 304 traz o mesmo validador do 200.
+    """
+    return Response(
+        status_code=304,
+        headers={
+            "ETag": _matching_etag(request, etag) or etag,
+            "Cache-Control": cache_control,
+        },
+    )
+
+
+def set_cache_headers(response: Response, etag: str, cache_control: str) -> None:
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = cache_control
+
+
+async def generations_etag(
+    generations: GenerationService, names: Sequence[str], *parts: Any
+) -> str:
+    """ETag de uma resposta agregada a partir das gerações das coleções lidas"""
+    values = await generations.get(*names)
+    return make_etag(*(f"{name}:{values[name]}" for name in names), *parts)
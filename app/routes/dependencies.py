@@ -0,0 +1,8 @@
+from fastapi import Request
+
+from services.registry import ServiceRegistry
+
+
+async def get_services(request: Request) -> ServiceRegistry:
+    """Registro de serviços criado no lifespan (app.state.services)"""
+    return request.app.state.services
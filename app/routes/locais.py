@@ -1,18 +1,22 @@
 from typing import List
 
-from config.database import get_database
-from fastapi import APIRouter, Depends, HTTPException, Query
+from config.settings import settings
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from models.local import Local, LocalCreate, LocalUpdate
-from motor.motor_asyncio import AsyncIOMotorDatabase
+from routes.caching import is_not_modified, make_etag, not_modified, set_cache_headers
+from routes.dependencies import get_services
+from routes.responses import MongoJSONResponse
+from services.base import CountMode
 from services.local_service import LocalService
+from services.registry import ServiceRegistry
 
 router = APIRouter(prefix="/locais", tags=["locais"])
 
 
 async def get_local_service(
-    db: AsyncIOMotorDatabase = Depends(get_database),
+    services: ServiceRegistry = Depends(get_services),
 ) -> LocalService:
-    return LocalService(db)
+    return services.locais
 
 
 @router.post("/", response_model=dict, status_code=201)
@@ -27,14 +31,37 @@ async def criar_local(
         raise HTTPException(status_code=400, detail=str(e))
 
 
+@router.post("/bulk", response_model=dict)
+async def importar_locais(
+    request: Request,
+    chunk_size: int = Query(
+        settings.BULK_CHUNK_SIZE,
+        ge=1,
+        le=10000,
+        description="Documentos por lote de escrita",
+    ),
+    service: LocalService = Depends(get_local_service),
+):
+    """Importar locais em lote a partir de NDJSON (um objeto JSON por linha)"""
+    try:
+        return await service.bulk_import(request.stream(), LocalCreate, chunk_size)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
 @router.get("/", response_model=dict)
 async def listar_locais(
     page: int = Query(1, ge=1, description="Número da página"),
     limit: int = Query(10, ge=1, le=100, description="Itens por página"),
+    count: CountMode = Query(
+        CountMode.EXACT, description="Contagem do total: exact, estimated ou none"
+    ),
     service: LocalService = Depends(get_local_service),
 ):
     """Listar locais com paginação"""
-    return await service.list_with_pagination(page=page, limit=limit)
+    return MongoJSONResponse(
+        await service.list_with_pagination(page=page, limit=limit, count_mode=count)
+    )
 
 
 @router.get("/search/cidade", response_model=List[Local])
@@ -43,7 +70,10 @@ async def buscar_locais_por_cidade(
     service: LocalService = Depends(get_local_service),
 ):
     """Buscar locais por cidade"""
-    return await service.search_by_city(cidade)
+    try:
+        return await service.search_by_city(cidade)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 
 @router.get("/search/bairro", response_model=List[Local])
@@ -52,17 +82,41 @@ async def buscar_locais_por_bairro(
     service: LocalService = Depends(get_local_service),
 ):
     """Buscar locais por bairro"""
-    return await service.search_by_neighborhood(bairro)
+    try:
+        return await service.search_by_neighborhood(bairro)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.get("/near", response_model=dict)
+async def buscar_locais_proximos(
+    lat: float = Query(..., ge=-90, le=90, description="Latitude"),
+    lng: float = Query(..., ge=-180, le=180, description="Longitude"),
+    radius: float = Query(
+        1000, gt=0, le=50000, description="Raio máximo de busca em metros"
+    ),
+    limit: int = Query(10, ge=1, le=100, description="Máximo de resultados"),
+    service: LocalService = Depends(get_local_service),
+):
+    """Locais próximos a um ponto, ordenados pela distância"""
+    return MongoJSONResponse({"items": await service.near(lat, lng, radius, limit)})
 
 
 @router.get("/{local_id}", response_model=Local)
 async def obter_local(
-    local_id: str, service: LocalService = Depends(get_local_service)
+    local_id: str,
+    request: Request,
+    response: Response,
+    service: LocalService = Depends(get_local_service),
 ):
     """Obter local por ID"""
     local = await service.get_by_id(local_id)
     if not local:
         raise HTTPException(status_code=404, detail="Local não encontrado")
+    etag = make_etag(local_id, local.get("versao", 0))
+    if is_not_modified(request, etag):
+        return not_modified(request, etag, settings.CACHE_CONTROL_RESOURCE)
+    set_cache_headers(response, etag, settings.CACHE_CONTROL_RESOURCE)
     return local
 
 
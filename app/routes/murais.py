@@ -1,48 +1,103 @@
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 from datetime import datetime
 from fastapi import Query
 
-from config.database import get_database
-from fastapi import APIRouter, Depends, HTTPException, Query, Path
+from config.settings import settings
+from fastapi import APIRouter, Depends, HTTPException, Query, Path, Request, Response
+from fastapi.responses import StreamingResponse
 from models.mural import Mural, MuralCreate, MuralUpdate
-from motor.motor_asyncio import AsyncIOMotorDatabase
-from services.mural_service import MuralService
+from routes.caching import (
+    generations_etag,
+    is_not_modified,
+    make_etag,
+    not_modified,
+    set_cache_headers,
+)
+from routes.dependencies import get_services
+from routes.responses import MongoJSONResponse
+from services.base import CountMode
+from services.export import MEDIA_TYPES, ExportFormat, encode_murais
+from services.mural_service import MuralService, TagMatch
+from services.registry import ServiceRegistry
 
 router = APIRouter(prefix="/murais", tags=["murais"])
 
 
 async def get_mural_service(
-    db: AsyncIOMotorDatabase = Depends(get_database),
+    services: ServiceRegistry = Depends(get_services),
 ) -> MuralService:
-    return MuralService(db)
+    return services.murais
+
+
+def _parse_tags(tags: Optional[str]) -> Optional[List[str]]:
+    """Lista de tags do parâmetro separado por vírgulas"""
+    if not tags:
+        return None
+    return [tag.strip() for tag in tags.split(",") if tag.strip()] or None
 
 
 @router.post("/", response_model=dict)
 async def create_mural(
-    mural: MuralCreate, db: AsyncIOMotorDatabase = Depends(get_database)
+    mural: MuralCreate, service: MuralService = Depends(get_mural_service)
 ):
     """Criar um novo mural"""
     try:
-        service = MuralService(db)
         result = await service.create(mural.dict())
-        return result  # Return directly, not wrapped
+        return MongoJSONResponse(result)
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 
+@router.post("/bulk", response_model=dict)
+async def importar_murais(
+    request: Request,
+    chunk_size: int = Query(
+        settings.BULK_CHUNK_SIZE,
+        ge=1,
+        le=10000,
+        description="Documentos por lote de escrita",
+    ),
+    service: MuralService = Depends(get_mural_service),
+):
+    """Importar murais em lote a partir de NDJSON (um objeto JSON por linha)"""
+    try:
+        return await service.bulk_import(request.stream(), MuralCreate, chunk_size)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
 @router.get("/", response_model=Dict[str, Any])
 async def listar_murais(
     bairro: Optional[str] = Query(None, description="Filtrar por bairro"),
     tag: Optional[str] = Query(None, description="Filtrar por tag"),
+    tags: Optional[str] = Query(None, description="Tags separadas por vírgula"),
+    match: TagMatch = Query(
+        TagMatch.ALL, description="all: todas as tags; any: ao menos uma"
+    ),
     artista_id: Optional[str] = Query(None, description="Filtrar por artista"),
     page: int = Query(1, ge=1, description="Número da página"),
     limit: int = Query(10, ge=1, le=100, description="Itens por página"),
+    cursor: Optional[str] = Query(
+        None, description="Cursor de paginação (next_cursor da resposta anterior)"
+    ),
+    count: CountMode = Query(
+        CountMode.EXACT, description="Contagem do total: exact, estimated ou none"
+    ),
     service: MuralService = Depends(get_mural_service),
 ):
     """F2 - Listar murais com filtros e paginação"""
-    return await service.list_murais(
-        bairro=bairro, tag=tag, artista_id=artista_id, page=page, limit=limit
+    result = await service.list_murais(
+        bairro=bairro,
+        tag=tag,
+        artista_id=artista_id,
+        page=page,
+        limit=limit,
+        cursor=cursor,
+        count_mode=count,
+        tags=_parse_tags(tags),
+        match=match,
     )
+    return MongoJSONResponse(result)
 
 
 @router.get("/count")
@@ -55,21 +110,57 @@ async def contar_murais_por_bairro(
     return {"bairro": bairro, "total_murais": count}
 
 
+@router.get("/tags", response_model=Dict[str, Any])
+async def obter_contagem_de_tags(
+    request: Request,
+    response: Response,
+    bairro: Optional[str] = Query(None, description="Contar apenas neste bairro"),
+    limit: int = Query(50, ge=1, le=500, description="Número de tags"),
+    service: MuralService = Depends(get_mural_service),
+):
+    """Nuvem de tags: murais por tag, no geral ou por bairro"""
+    etag = await generations_etag(service.generations, ["stats_tag"], bairro, limit)
+    if is_not_modified(request, etag):
+        return not_modified(request, etag, settings.CACHE_CONTROL_ANALYTICS)
+    set_cache_headers(response, etag, settings.CACHE_CONTROL_ANALYTICS)
+    return {"bairro": bairro, "items": await service.get_tag_counts(bairro, limit)}
+
+
 @router.get("/top-artistas")
 async def obter_top_artistas(
+    request: Request,
+    response: Response,
     limit: int = Query(5, ge=1, le=20, description="Número de artistas"),
+    fresh: bool = Query(
+        False, description="Recalcular na hora em vez de usar stats_artista"
+    ),
     service: MuralService = Depends(get_mural_service),
 ):
     """F5 - Top artistas com mais murais"""
-    return await service.get_top_artistas_by_murais(limit=limit)
+    sources = ["murais", "artistas"] if fresh else ["stats_artista"]
+    etag = await generations_etag(service.generations, sources, limit)
+    if is_not_modified(request, etag):
+        return not_modified(request, etag, settings.CACHE_CONTROL_ANALYTICS)
+    set_cache_headers(response, etag, settings.CACHE_CONTROL_ANALYTICS)
+    return await service.get_top_artistas_by_murais(limit=limit, fresh=fresh)
 
 
 @router.get("/media-por-bairro")
 async def obter_media_avaliacao_por_bairro(
+    request: Request,
+    response: Response,
+    fresh: bool = Query(
+        False, description="Recalcular na hora em vez de usar stats_bairro"
+    ),
     service: MuralService = Depends(get_mural_service),
 ):
     """F6 - Média de avaliação por bairro"""
-    return await service.get_media_avaliacao_por_bairro()
+    sources = ["murais", "locais"] if fresh else ["stats_bairro"]
+    etag = await generations_etag(service.generations, sources)
+    if is_not_modified(request, etag):
+        return not_modified(request, etag, settings.CACHE_CONTROL_ANALYTICS)
+    set_cache_headers(response, etag, settings.CACHE_CONTROL_ANALYTICS)
+    return await service.get_media_avaliacao_por_bairro(fresh=fresh)
 
 
 # MOVER ESTAS ROTAS PARA ANTES DA ROTA /{mural_id}
@@ -79,6 +170,12 @@ async def obter_murais_por_periodo(
     end_date: str = Query(..., description="Data de fim (YYYY-MM-DD)"),
     page: int = Query(1, ge=1, description="Número da página"),
     limit: int = Query(10, ge=1, le=100, description="Itens por página"),
+    cursor: Optional[str] = Query(
+        None, description="Cursor de paginação (next_cursor da resposta anterior)"
+    ),
+    count: CountMode = Query(
+        CountMode.EXACT, description="Contagem do total: exact, estimated ou none"
+    ),
     service: MuralService = Depends(get_mural_service),
 ):
     """F7 - Filtrar murais por intervalo de datas"""
@@ -86,18 +183,19 @@ async def obter_murais_por_periodo(
         # Converter strings para datetime
         start_datetime = datetime.strptime(start_date, "%Y-%m-%d")
         end_datetime = datetime.strptime(end_date + " 23:59:59", "%Y-%m-%d %H:%M:%S")
-
-        return await service.get_by_date_range(
-            start_datetime, end_datetime, page, limit
-        )
     except ValueError as e:
         raise HTTPException(
             status_code=400,
             detail=f"Formato de data inválido. Use YYYY-MM-DD. Erro: {str(e)}",
         )
-    except Exception as e:
-        print(f"Erro interno: {e}")
-        raise HTTPException(status_code=500, detail="Erro interno do servidor")
+
+    try:
+        result = await service.get_by_date_range(
+            start_datetime, end_datetime, page, limit, cursor, count
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return MongoJSONResponse(result)
 
 
 @router.get("/by-year/{year}")
@@ -105,32 +203,152 @@ async def obter_murais_por_ano(
     year: int = Path(..., description="Ano (ex: 2025)"),
     page: int = Query(1, ge=1, description="Número da página"),
     limit: int = Query(10, ge=1, le=100, description="Itens por página"),
+    cursor: Optional[str] = Query(
+        None, description="Cursor de paginação (next_cursor da resposta anterior)"
+    ),
+    count: CountMode = Query(
+        CountMode.EXACT, description="Contagem do total: exact, estimated ou none"
+    ),
     service: MuralService = Depends(get_mural_service),
 ):
     """F8 - Filtrar murais por ano"""
     try:
-        return await service.get_by_year(year, page, limit)
-    except Exception as e:
-        print(f"Erro interno: {e}")
-        raise HTTPException(status_code=500, detail="Erro interno do servidor")
+        result = await service.get_by_year(year, page, limit, cursor, count)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return MongoJSONResponse(result)
+
+
+@router.get("/near", response_model=Dict[str, Any])
+async def obter_murais_proximos(
+    lat: float = Query(..., ge=-90, le=90, description="Latitude"),
+    lng: float = Query(..., ge=-180, le=180, description="Longitude"),
+    radius: float = Query(
+        1000, gt=0, le=50000, description="Raio máximo de busca em metros"
+    ),
+    limit: int = Query(10, ge=1, le=100, description="Máximo de resultados"),
+    bairro: Optional[str] = Query(None, description="Filtrar por bairro"),
+    tag: Optional[str] = Query(None, description="Filtrar por tag"),
+    tags: Optional[str] = Query(None, description="Tags separadas por vírgula"),
+    match: TagMatch = Query(
+        TagMatch.ALL, description="all: todas as tags; any: ao menos uma"
+    ),
+    artista_id: Optional[str] = Query(None, description="Filtrar por artista"),
+    service: MuralService = Depends(get_mural_service),
+):
+    """Murais próximos a um ponto, ordenados pela distância"""
+    result = await service.near(
+        lat,
+        lng,
+        radius,
+        limit,
+        bairro=bairro,
+        tag=tag,
+        artista_id=artista_id,
+        tags=_parse_tags(tags),
+        match=match,
+    )
+    return MongoJSONResponse(result)
+
+
+def _parse_coordinate(value: str, name: str) -> Tuple[float, float]:
+    try:
+        lat, lng = (float(part) for part in value.split(","))
+    except ValueError:
+        raise HTTPException(
+            status_code=400, detail=f"Parâmetro {name} deve estar no formato lat,lng"
+        )
+    if not (-90 <= lat <= 90 and -180 <= lng <= 180):
+        raise HTTPException(status_code=400, detail=f"Coordenada {name} inválida")
+    return lat, lng
+
+
+@router.get("/bbox", response_model=Dict[str, Any])
+async def obter_murais_no_mapa(
+    sw: str = Query(..., description="Canto sudoeste: lat,lng"),
+    ne: str = Query(..., description="Canto nordeste: lat,lng"),
+    zoom: int = Query(..., ge=0, le=22, description="Nível de zoom do mapa"),
+    service: MuralService = Depends(get_mural_service),
+):
+    """Murais em uma área do mapa; em zoom baixo, clusters por célula"""
+    try:
+        return await service.bbox(
+            _parse_coordinate(sw, "sw"), _parse_coordinate(ne, "ne"), zoom
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.get("/export")
+async def exportar_murais(
+    format: ExportFormat = Query(ExportFormat.NDJSON, description="ndjson ou csv"),
+    bairro: Optional[str] = Query(None, description="Filtrar por bairro"),
+    tag: Optional[str] = Query(None, description="Filtrar por tag"),
+    tags: Optional[str] = Query(None, description="Tags separadas por vírgula"),
+    match: TagMatch = Query(
+        TagMatch.ALL, description="all: todas as tags; any: ao menos uma"
+    ),
+    artista_id: Optional[str] = Query(None, description="Filtrar por artista"),
+    batch_size: int = Query(
+        settings.EXPORT_BATCH_SIZE,
+        ge=1,
+        le=10000,
+        description="Documentos por lote do cursor",
+    ),
+    service: MuralService = Depends(get_mural_service),
+):
+    """Exportar o catálogo de murais em streaming"""
+    murais = service.export_murais(
+        bairro=bairro,
+        tag=tag,
+        artista_id=artista_id,
+        batch_size=batch_size,
+        tags=_parse_tags(tags),
+        match=match,
+    )
+    return StreamingResponse(
+        encode_murais(murais, format),
+        media_type=MEDIA_TYPES[format],
+        headers={
+            "Content-Disposition": f'attachment; filename="murais.{format.value}"'
+        },
+    )
+
+
+def _mural_etag(mural: dict) -> str:
+    """ETag do mural com o local embutido"""
+    # O local tem versão própria; sua identidade entra no ETag para que a
+    # remoção (ou criação) do local referenciado mude a representação
+    local = mural.get("local")
+    return make_etag(
+        mural["id"],
+        mural.get("versao", 0),
+        local["id"] if local else "none",
+        local.get("versao", 0) if local else 0,
+    )
 
 
 # ESTA ROTA DEVE VIR POR ÚLTIMO (depois das rotas específicas)
 @router.get("/{mural_id}", response_model=dict)
 async def obter_mural(
-    mural_id: str, service: MuralService = Depends(get_mural_service)
+    mural_id: str,
+    request: Request,
+    service: MuralService = Depends(get_mural_service),
 ):
     """F3 - Obter mural por ID"""
     try:
         mural = await service.get_by_id(mural_id)
-        if not mural:
-            raise HTTPException(status_code=404, detail="Mural não encontrado")
-        return mural
     except ValueError:
         raise HTTPException(status_code=400, detail="ID do mural inválido")
-    except Exception as e:
-        print(f"Erro interno: {e}")
-        raise HTTPException(status_code=500, detail="Erro interno do servidor")
+    if not mural:
+        raise HTTPException(status_code=404, detail="Mural não encontrado")
+
+    etag = _mural_etag(mural)
+    if is_not_modified(request, etag):
+        return not_modified(request, etag, settings.CACHE_CONTROL_RESOURCE)
+    response = MongoJSONResponse(mural)
+    set_cache_headers(response, etag, settings.CACHE_CONTROL_RESOURCE)
+    return response
 
 
 @router.put("/{mural_id}", response_model=dict)
@@ -0,0 +1,23 @@
+from typing import Any
+
+import orjson
+from bson import ObjectId
+from fastapi.responses import JSONResponse
+
+
+def _default(value: Any) -> Any:
+    if isinstance(value, ObjectId):
+        return str(value)
+    raise TypeError
+
+
+def dumps(content: Any) -> bytes:
+    """Serializa com orjson; datetime é nativo e ObjectId vira string"""
+    return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
+
+
+class MongoJSONResponse(JSONResponse):
+    """Resposta JSON que aceita documentos do MongoDB como vieram do driver"""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
@@ -0,0 +1,33 @@
+from typing import Any, Dict, List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from routes.dependencies import get_services
+from routes.responses import MongoJSONResponse
+from services.registry import ServiceRegistry
+from services.search_service import SearchService, SearchType
+
+router = APIRouter(prefix="/search", tags=["busca"])
+
+
+async def get_search_service(
+    services: ServiceRegistry = Depends(get_services),
+) -> SearchService:
+    return services.search
+
+
+@router.get("/", response_model=Dict[str, Any])
+async def buscar(
+    q: str = Query(..., min_length=1, description="Termos de busca"),
+    tipo: Optional[List[SearchType]] = Query(
+        None, description="Restringir a mural, artista e/ou local"
+    ),
+    page: int = Query(1, ge=1, description="Número da página"),
+    limit: int = Query(10, ge=1, le=100, description="Itens por página"),
+    service: SearchService = Depends(get_search_service),
+):
+    """Buscar murais, artistas e locais por relevância"""
+    try:
+        result = await service.search(q, tipos=tipo, page=page, limit=limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return MongoJSONResponse(result)
@@ -1,16 +1,28 @@
-from config.database import get_database
+from typing import Optional
+
 from fastapi import APIRouter, Depends, HTTPException, Query
-from models.usuario import Usuario, UsuarioCreate, UsuarioLogin, UsuarioUpdate
-from motor.motor_asyncio import AsyncIOMotorDatabase
+from models.usuario import (
+    TokenRefresh,
+    Usuario,
+    UsuarioCreate,
+    UsuarioLogin,
+    UsuarioUpdate,
+)
+from routes.auth import get_token_claims
+from routes.dependencies import get_services
+from routes.responses import MongoJSONResponse
+from services.base import CountMode
+from services.registry import ServiceRegistry
+from services.tokens import InvalidToken, TokenType
 from services.usuario_service import UsuarioService
 
 router = APIRouter(prefix="/usuarios", tags=["usuarios"])
 
 
 async def get_usuario_service(
-    db: AsyncIOMotorDatabase = Depends(get_database),
+    services: ServiceRegistry = Depends(get_services),
 ) -> UsuarioService:
-    return UsuarioService(db)
+    return services.usuarios
 
 
 @router.post("/", response_model=dict, status_code=201)
@@ -23,34 +35,68 @@ async def criar_usuario(
         return {"id": usuario_id, "message": "Usuário criado com sucesso"}
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
 
 
 @router.post("/login", response_model=dict)
 async def login_usuario(
-    login_data: UsuarioLogin, service: UsuarioService = Depends(get_usuario_service)
+    login_data: UsuarioLogin, services: ServiceRegistry = Depends(get_services)
 ):
     """Login de usuário"""
-    usuario = await service.get_by_email(login_data.email)
+    usuario = await services.usuarios.authenticate(login_data.email, login_data.senha)
     if not usuario:
         raise HTTPException(status_code=401, detail="Email ou senha incorretos")
 
-    usuario_obj = Usuario(**usuario)
-    if not usuario_obj.verify_password(login_data.senha):
-        raise HTTPException(status_code=401, detail="Email ou senha incorretos")
+    user_id = str(usuario["_id"])
+    return {
+        "message": "Login realizado com sucesso",
+        "user_id": user_id,
+        **services.tokens.issue(user_id),
+    }
+
+
+@router.post("/refresh", response_model=dict)
+async def renovar_token(
+    data: TokenRefresh, services: ServiceRegistry = Depends(get_services)
+):
+    """Trocar o token de renovação por um novo par de tokens"""
+    try:
+        return await services.tokens.refresh(services.database, data.refresh_token)
+    except InvalidToken as e:
+        raise HTTPException(status_code=401, detail=str(e))
 
-    return {"message": "Login realizado com sucesso", "user_id": usuario["_id"]}
+
+@router.post("/logout", response_model=dict)
+async def logout_usuario(
+    data: Optional[TokenRefresh] = None,
+    claims: dict = Depends(get_token_claims),
+    services: ServiceRegistry = Depends(get_services),
+):
+    """Revogar o token de acesso atual (e o de renovação, se enviado)"""
+    tokens = services.tokens
+    await tokens.revoke(services.database, claims)
+    if data is not None:
+        try:
+            refresh_claims = tokens.verify(data.refresh_token, TokenType.REFRESH)
+        except InvalidToken:
+            refresh_claims = None
+        if refresh_claims and refresh_claims["sub"] == claims["sub"]:
+            await tokens.revoke(services.database, refresh_claims)
+    return {"message": "Logout realizado com sucesso"}
 
 
 @router.get("/", response_model=dict)
 async def listar_usuarios(
     page: int = Query(1, ge=1, description="Número da página"),
     limit: int = Query(10, ge=1, le=100, description="Itens por página"),
+    count: CountMode = Query(
+        CountMode.EXACT, description="Contagem do total: exact, estimated ou none"
+    ),
     service: UsuarioService = Depends(get_usuario_service),
 ):
     """Listar usuários com paginação"""
-    return await service.list_with_pagination(page=page, limit=limit)
+    return MongoJSONResponse(
+        await service.list_with_pagination(page=page, limit=limit, count_mode=count)
+    )
 
 
 @router.get("/{usuario_id}", response_model=Usuario)
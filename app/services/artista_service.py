@@ -1,14 +1,34 @@
+from typing import List, Optional
+
 from motor.motor_asyncio import AsyncIOMotorDatabase
-from bson import ObjectId
+from pymongo import IndexModel
 from datetime import datetime
 
 from models.artista import ArtistaCreate, ArtistaUpdate
+from models.common import object_id_or_none
 from .base import BaseService
+from .generation import GenerationService
+from .autocomplete import AutocompleteType, autocomplete
+from .normalization import prefix_filter, shadow_fields
+from .rollup_service import RollupService
+from .search_service import SearchService, SearchType
 
 
 class ArtistaService(BaseService):
-    def __init__(self, database: AsyncIOMotorDatabase):
-        super().__init__(database, "artistas")
+    NORMALIZED_FIELDS = ("nome",)
+    GENERATIONS = ("artistas",)
+    INDEXES = {"artistas": (IndexModel("nome"), IndexModel("nome_norm"))}
+
+    def __init__(
+        self,
+        database: AsyncIOMotorDatabase,
+        generations: Optional[GenerationService] = None,
+        search: Optional[SearchService] = None,
+        rollups: Optional[RollupService] = None,
+    ):
+        super().__init__(database, "artistas", generations)
+        self.search = search or SearchService(database)
+        self.rollups = rollups or RollupService(database, self.generations)
 
     async def create_artista(self, artista_data: ArtistaCreate) -> str:
         """Cria um novo artista"""
@@ -21,28 +41,54 @@ class ArtistaService(BaseService):
         return await self.update(id, data)
 
     async def search_by_name(self, name: str):
-        """Busca artistas por nome"""
-        filters = {"nome": {"$regex": name, "$options": "i"}}
-        cursor = self.collection.find(filters)
-        documents = await cursor.to_list(length=100)
-
-        for doc in documents:
-            doc["_id"] = str(doc["_id"])
-
-        return documents
+        """Busca artistas por nome, sem acentos/maiúsculas"""
+        # Prefixo do nome primeiro (índice em nome_norm); completa com
+        # palavras do meio do nome via índice de texto
+        limit = 100
+        cursor = self.collection.find(prefix_filter("nome", name)).limit(limit)
+        documents = await cursor.to_list(length=limit)
+        if len(documents) < limit:
+            found = {doc["_id"] for doc in documents}
+            matches = await self.search.search_collection(
+                SearchType.ARTISTA, name, limit=limit
+            )
+            documents.extend(doc for doc in matches if doc["_id"] not in found)
+
+        return documents[:limit]
 
     async def create(self, artista_data: dict) -> dict:
         """Criar artista com conversão de tipos"""
+        artista_data = self._prepare_document(artista_data)
+
+        await self.collection.insert_one(artista_data)
+        await self.bump_generations()
+        autocomplete.add(AutocompleteType.ARTISTA, [artista_data.get("nome")])
+        # insert_one preenche o _id no próprio dicionário, dispensando a releitura
+        artista_data["id"] = artista_data.pop("_id")
+        return artista_data
+
+    def _prepare_document(self, artista_data: dict) -> dict:
+        """Monta o documento de um novo artista"""
         # Converter HttpUrl para string se presente
         if "site" in artista_data and artista_data["site"]:
             artista_data["site"] = str(artista_data["site"])
 
         # Adicionar data de criação
         artista_data["data_criacao"] = datetime.utcnow()
-
-        result = await self.collection.insert_one(artista_data)
-        created_artista = await self.collection.find_one({"_id": result.inserted_id})
-        return self._serialize_artista(created_artista)
+        artista_data.update(shadow_fields(artista_data, self.NORMALIZED_FIELDS))
+        return artista_data
+
+    async def _prepare_batch(self, batch):
+        documents = [
+            (line_number, self._prepare_document(item.dict()))
+            for line_number, item in batch
+        ]
+        return documents, []
+
+    async def _after_bulk_insert(self, documents: List[dict]) -> None:
+        autocomplete.add(
+            AutocompleteType.ARTISTA, [document.get("nome") for document in documents]
+        )
 
     async def update(self, artista_id: str, update_data: dict) -> dict:
         """Atualizar artista com conversão de tipos"""
@@ -55,23 +101,39 @@ class ArtistaService(BaseService):
 
         if not update_data:
             raise ValueError("Nenhum campo válido para atualização")
+        update_data.update(shadow_fields(update_data, self.NORMALIZED_FIELDS))
+
+        object_id = object_id_or_none(artista_id)
+        if object_id is None:
+            return None
 
-        result = await self.collection.update_one(
-            {"_id": ObjectId(artista_id)}, {"$set": update_data}
+        previous = await self.collection.find_one_and_update(
+            self.changed_filter(object_id, update_data),
+            {"$set": update_data, "$inc": {"versao": 1}},
+            projection={"nome": 1},
         )
 
-        if result.matched_count == 0:
-            return None
+        if previous is None:
+            # Sem alteração: responde com o artista atual, sem nova versão
+            return await self.get_by_id(object_id)
+        await self.bump_generations()
 
-        updated_artista = await self.collection.find_one({"_id": ObjectId(artista_id)})
-        return self._serialize_artista(updated_artista)
+        if "nome" in update_data:
+            autocomplete.replace(
+                AutocompleteType.ARTISTA, [previous.get("nome")], [update_data["nome"]]
+            )
 
-    def _serialize_artista(self, artista: dict) -> dict:
-        """Serializa um artista para o formato de resposta"""
-        if not artista:
-            return None
+        # Nome e biografia aparecem no ranking de artistas
+        await self.rollups.mark_dirty("artista")
+
+        return await self.get_by_id(object_id)
 
-        artista["id"] = str(artista["_id"])
-        del artista["_id"]
+    async def delete(self, id: str) -> bool:
+        """Deleta um artista"""
+        deleted = await self.delete_and_get(id, {"nome": 1})
+        if deleted is None:
+            return False
 
-        return artista
+        autocomplete.remove(AutocompleteType.ARTISTA, [deleted.get("nome")])
+        await self.rollups.mark_dirty("artista")
+        return True
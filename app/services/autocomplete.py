@@ -0,0 +1,213 @@
+import asyncio
+import heapq
+import logging
+from bisect import bisect_left, insort
+from collections import Counter
+from enum import Enum
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from motor.motor_asyncio import AsyncIOMotorDatabase
+
+from .normalization import normalize_text
+
+logger = logging.getLogger(__name__)
+
+
+class AutocompleteType(str, Enum):
+    ARTISTA = "artista"
+    BAIRRO = "bairro"
+    TAG = "tag"
+
+
+# Agregações que contam, por valor, os documentos de origem de cada tipo
+SOURCES = {
+    AutocompleteType.ARTISTA: (
+        "artistas",
+        [{"$group": {"_id": "$nome", "total": {"$sum": 1}}}],
+    ),
+    AutocompleteType.BAIRRO: (
+        "locais",
+        [{"$group": {"_id": "$bairro", "total": {"$sum": 1}}}],
+    ),
+    AutocompleteType.TAG: (
+        "murais",
+        [
+            {"$unwind": "$tags"},
+            {"$group": {"_id": "$tags", "total": {"$sum": 1}}},
+        ],
+    ),
+}
+
+
+# Prefixos até este tamanho casam com boa parte dos valores: suas sugestões
+# ficam pré-calculadas em vez de varrer todo o intervalo a cada tecla
+SHORT_PREFIX_LENGTH = 2
+# Sugestões guardadas por prefixo curto (o maior limit aceito pela rota)
+TOP_SIZE = 50
+
+
+class PrefixIndex:
+    """Valores ordenados pela forma normalizada, com busca por prefixo via bisect"""
+
+    def __init__(self):
+        self._keys: List[str] = []
+        # forma normalizada -> [texto exibido, quantidade de documentos]
+        self._entries: Dict[str, list] = {}
+        # prefixo curto -> até TOP_SIZE chaves, as mais frequentes primeiro;
+        # calculado na primeira consulta e mantido pelas escritas
+        self._top: Dict[str, List[str]] = {}
+
+    @classmethod
+    def build(cls, items: Iterable[Tuple[str, int]]) -> "PrefixIndex":
+        """Índice com os pares (valor, quantidade), ordenado uma única vez"""
+        index = cls()
+        for value, count in items:
+            key = normalize_text(value)
+            if not key:
+                continue
+            entry = index._entries.get(key)
+            if entry is None:
+                index._entries[key] = [value, count]
+            else:
+                entry[1] += count
+        index._keys = sorted(index._entries)
+        return index
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def add(self, value: str, count: int = 1) -> None:
+        key = normalize_text(value)
+        if not key:
+            return
+        entry = self._entries.get(key)
+        if entry is None:
+            self._entries[key] = [value, count]
+            insort(self._keys, key)
+        else:
+            entry[1] += count
+        self._update_top(key, decreased=False)
+
+    def remove(self, value: str, count: int = 1) -> None:
+        key = normalize_text(value)
+        entry = self._entries.get(key)
+        if entry is None:
+            return
+        entry[1] -= count
+        if entry[1] <= 0:
+            del self._entries[key]
+            del self._keys[bisect_left(self._keys, key)]
+        self._update_top(key, decreased=True)
+
+    def suggest(self, prefix: str, limit: int = 10) -> List[dict]:
+        """Valores que começam com o prefixo, os mais frequentes primeiro"""
+        prefix = normalize_text(prefix)
+        if len(prefix) <= SHORT_PREFIX_LENGTH and limit <= TOP_SIZE:
+            keys = self._top.get(prefix)
+            if keys is None:
+                keys = self._top[prefix] = self._scan(prefix, TOP_SIZE)
+            keys = keys[:limit]
+        else:
+            # Prefixos mais longos delimitam um intervalo pequeno
+            keys = self._scan(prefix, limit)
+        return [
+            {"texto": self._entries[key][0], "total": self._entries[key][1]}
+            for key in keys
+        ]
+
+    def _rank(self, key: str) -> Tuple[int, str]:
+        return -self._entries[key][1], key
+
+    def _scan(self, prefix: str, limit: int) -> List[str]:
+        start = bisect_left(self._keys, prefix)
+        end = bisect_left(self._keys, prefix + "\U0010ffff", lo=start)
+        return heapq.nsmallest(limit, self._keys[start:end], key=self._rank)
+
+    def _update_top(self, key: str, decreased: bool) -> None:
+        """Reposiciona key nas sugestões pré-calculadas dos seus prefixos curtos"""
+        present = key in self._entries
+        for prefix in {key[:length] for length in range(SHORT_PREFIX_LENGTH + 1)}:
+            top = self._top.get(prefix)
+            if top is None:
+                continue
+            if key in top:
+                if decreased and len(top) >= TOP_SIZE:
+                    # Um valor fora da lista pode ter passado à frente deste
+                    del self._top[prefix]
+                    continue
+                top.remove(key)
+            elif decreased:
+                continue
+            if present:
+                insort(top, key, key=self._rank)
+                del top[TOP_SIZE:]
+
+
+class Autocomplete:
+    """Sugestões em memória para nomes de artistas, bairros e tags"""
+
+    def __init__(self):
+        self._indexes = {tipo: PrefixIndex() for tipo in AutocompleteType}
+        self._task: Optional[asyncio.Task] = None
+
+    async def load(self, database: AsyncIOMotorDatabase) -> None:
+        """Reconstrói os índices a partir do banco e os substitui de uma vez"""
+        indexes = {}
+        for tipo, (collection, pipeline) in SOURCES.items():
+            indexes[tipo] = PrefixIndex.build(
+                [
+                    (item["_id"], item["total"])
+                    async for item in database[collection].aggregate(pipeline)
+                    if isinstance(item["_id"], str)
+                ]
+            )
+        self._indexes = indexes
+
+    def add(self, tipo: AutocompleteType, values: Iterable[str]) -> None:
+        for value in values:
+            if isinstance(value, str):
+                self._indexes[tipo].add(value)
+
+    def remove(self, tipo: AutocompleteType, values: Iterable[str]) -> None:
+        for value in values:
+            if isinstance(value, str):
+                self._indexes[tipo].remove(value)
+
+    def replace(
+        self, tipo: AutocompleteType, old: Iterable[str], new: Iterable[str]
+    ) -> None:
+        """Aplica apenas a diferença entre os valores antigos e os novos"""
+        old, new = Counter(old), Counter(new)
+        self.remove(tipo, (old - new).elements())
+        self.add(tipo, (new - old).elements())
+
+    def suggest(self, tipo: AutocompleteType, q: str, limit: int = 10) -> List[dict]:
+        return self._indexes[tipo].suggest(q, limit)
+
+    def stats(self) -> Dict[str, int]:
+        return {tipo.value: len(index) for tipo, index in self._indexes.items()}
+
+    def start(self, database: AsyncIOMotorDatabase, interval: float) -> None:
+        """Recarrega periodicamente, incorporando escritas de outros processos"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(database, interval))
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self, database: AsyncIOMotorDatabase, interval: float) -> None:
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.load(database)
+            except Exception:
+                logger.exception("Erro ao recarregar autocompletar")
+
+
+autocomplete = Autocomplete()
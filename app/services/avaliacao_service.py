@@ -1,114 +1,390 @@
+import asyncio
 from datetime import datetime
-from typing import Any, Dict
+from typing import Any, Dict, List, Optional
 
 from motor.motor_asyncio import AsyncIOMotorDatabase
 from bson import ObjectId
+from pymongo import IndexModel, UpdateOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError
 
 from models.avaliacao import AvaliacaoCreate, AvaliacaoUpdate
-from .base import BaseService
-from .mural_service import MuralService
-from .usuario_service import UsuarioService
+from models.common import object_id_or_none, parse_object_id
+from .base import BaseService, ConflictError, CountMode
+from .cache import analytics_cache
+from .generation import GenerationService
+from .mural_service import NOTAS, resumo_vazio
+from .rollup_service import RollupService
 
 
 class AvaliacaoService(BaseService):
-    def __init__(self, database: AsyncIOMotorDatabase):
-        super().__init__(database, "avaliacoes")
-
-    async def create_avaliacao(
-        self, avaliacao_data: AvaliacaoCreate
-    ) -> dict:  # Changed return type
-        """Cria uma nova avaliação"""
-        # Verificar se usuário já avaliou este mural
-        existing = await self.collection.find_one(
-            {
-                "mural_id": avaliacao_data.mural_id,
-                "usuario_id": avaliacao_data.usuario_id,
-            }
+    INDEXES = {
+        "avaliacoes": (
+            IndexModel("mural_id"),
+            IndexModel("usuario_id"),
+            IndexModel([("mural_id", 1), ("usuario_id", 1)], unique=True),
         )
-        if existing:
-            raise ValueError("Usuário já avaliou este mural")
+    }
 
-        # Verificar se mural existe
-        mural_service = MuralService(self.database)
-        mural = await mural_service.get_by_id(avaliacao_data.mural_id)
-        if not mural:
-            raise ValueError("Mural não encontrado")
+    def __init__(
+        self,
+        database: AsyncIOMotorDatabase,
+        generations: Optional[GenerationService] = None,
+        rollups: Optional[RollupService] = None,
+    ):
+        super().__init__(database, "avaliacoes", generations)
+        self.rollups = rollups or RollupService(database, self.generations)
 
-        # Verificar se usuário existe
-        usuario_service = UsuarioService(self.database)
-        usuario = await usuario_service.get_by_id(avaliacao_data.usuario_id)
-        if not usuario:
-            raise ValueError("Usuário não encontrado")
+    async def create_avaliacao(
+        self, avaliacao_data: AvaliacaoCreate, usuario_id: str
+    ) -> dict:
+        """Cria uma nova avaliação do usuário autenticado (sujeito do token)"""
+        # Só o _id: resolvido pelo índice, sem ler o documento
+        if not await self.database.murais.find_one(
+            {"_id": avaliacao_data.mural_id}, {"_id": 1}
+        ):
+            raise ValueError("Mural não encontrado")
 
+        # Referências gravadas como ObjectId, comparáveis a murais._id/usuarios._id
         data = avaliacao_data.dict()
-        return await self.create(data)  # This returns the serialized dict
+        data["usuario_id"] = parse_object_id(usuario_id)
+        data["data"] = datetime.utcnow()
+        # Escrita e resumo seguem juntos mesmo se o cliente desconectar
+        await asyncio.shield(self._insert(data))
+        # insert_one preenche o _id no próprio dicionário, dispensando a releitura
+        data["id"] = data.pop("_id")
+        return data
+
+    async def _insert(self, data: dict) -> None:
+        # Avaliação repetida é barrada pelo índice único (mural_id, usuario_id),
+        # sem consulta prévia sujeita a corrida
+        try:
+            await self.collection.insert_one(data)
+        except DuplicateKeyError:
+            raise ConflictError("Usuário já avaliou este mural")
+
+        await self._update_resumo(data["mural_id"], adicionar=data["nota"])
 
-    async def update_avaliacao(self, id: str, avaliacao_data: AvaliacaoUpdate) -> bool:
-        """Atualiza uma avaliação"""
+    async def update_avaliacao(
+        self, id: str, avaliacao_data: AvaliacaoUpdate, usuario_id: str
+    ) -> bool:
+        """Atualiza uma avaliação do usuário.
+
+        Avaliação de outro usuário ou escrita sem efeito contam como não encontrada.
+        """
         data = avaliacao_data.dict(exclude_unset=True)
-        return await self.update(id, data)
+        return await asyncio.shield(self._update(id, data, usuario_id))
+
+    async def _update(self, id: str, data: dict, usuario_id: str) -> bool:
+        # A versão anterior traz a nota antiga para calcular o delta do resumo
+        anterior = await self.update_and_get_previous(
+            id, data, {"mural_id": 1, "nota": 1}, self._owner_filter(usuario_id)
+        )
+        if anterior is None:
+            return False
+
+        nota = data.get("nota")
+        if nota is not None and anterior["nota"] != nota:
+            await self._update_resumo(
+                anterior["mural_id"], adicionar=nota, remover=anterior["nota"]
+            )
+        return True
+
+    async def delete(self, id: str, usuario_id: str) -> bool:
+        """Deleta uma avaliação do usuário"""
+        return await asyncio.shield(self._delete(id, usuario_id))
+
+    async def _delete(self, id: str, usuario_id: str) -> bool:
+        avaliacao = await self.delete_and_get(
+            id, {"mural_id": 1, "nota": 1}, self._owner_filter(usuario_id)
+        )
+        if not avaliacao:
+            return False
 
-    async def get_by_mural(self, mural_id: str, page: int = 1, limit: int = 10):
+        await self._update_resumo(avaliacao["mural_id"], remover=avaliacao["nota"])
+        return True
+
+    @staticmethod
+    def _owner_filter(usuario_id: str) -> dict:
+        """Restringe a escrita às avaliações do usuário autenticado"""
+        object_id = parse_object_id(usuario_id)
+        # Avaliações ainda não migradas guardam o usuario_id como string
+        return {"usuario_id": {"$in": [object_id, str(object_id)]}}
+
+    async def _update_resumo(
+        self,
+        mural_id: ObjectId,
+        adicionar: Optional[int] = None,
+        remover: Optional[int] = None,
+    ) -> None:
+        """Aplica atomicamente ao resumo do mural a entrada e/ou saída de uma nota.
+
+        É uma escrita separada da avaliação: se o banco falhar entre as duas, o
+        resumo diverge até verificar-avaliacoes/reconstruir-avaliacoes (manage.py).
+        """
+        inc = {}
+        if adicionar is not None:
+            inc[f"resumo_avaliacoes.notas.{adicionar}"] = 1
+        if remover is not None:
+            key = f"resumo_avaliacoes.notas.{remover}"
+            inc[key] = inc.get(key, 0) - 1
+
+        inc["resumo_avaliacoes.total"] = (adicionar is not None) - (remover is not None)
+        inc["resumo_avaliacoes.soma"] = (adicionar or 0) - (remover or 0)
+        # O resumo faz parte da representação do mural (ETag)
+        inc["versao"] = 1
+
+        # Avaliações ainda não migradas guardam o mural_id como string
+        mural_id = parse_object_id(mural_id)
+        await asyncio.gather(
+            self.database.murais.update_one({"_id": mural_id}, {"$inc": inc}),
+            self.generations.bump("murais"),
+            # A média por bairro (stats_bairro) deriva dos resumos
+            self.rollups.mark_dirty("bairro"),
+        )
+        analytics_cache.invalidate(("media_mural", str(mural_id)))
+
+    async def get_by_mural(
+        self,
+        mural_id: str,
+        page: int = 1,
+        limit: int = 10,
+        count_mode: CountMode = CountMode.EXACT,
+    ):
         """Lista avaliações de um mural"""
-        filters = {"mural_id": mural_id}
+        filters = {"mural_id": parse_object_id(mural_id, "ID do mural inválido")}
         return await self.list_with_pagination(
-            filters=filters, page=page, limit=limit, sort_by="data", sort_order=-1
+            filters=filters,
+            page=page,
+            limit=limit,
+            sort_by="data",
+            sort_order=-1,
+            count_mode=count_mode,
         )
 
-    async def get_by_usuario(self, usuario_id: str, page: int = 1, limit: int = 10):
+    async def get_by_usuario(
+        self,
+        usuario_id: str,
+        page: int = 1,
+        limit: int = 10,
+        count_mode: CountMode = CountMode.EXACT,
+    ):
         """Lista avaliações de um usuário"""
-        filters = {"usuario_id": usuario_id}
+        filters = {"usuario_id": parse_object_id(usuario_id, "ID do usuário inválido")}
         return await self.list_with_pagination(
-            filters=filters, page=page, limit=limit, sort_by="data", sort_order=-1
+            filters=filters,
+            page=page,
+            limit=limit,
+            sort_by="data",
+            sort_order=-1,
+            count_mode=count_mode,
         )
 
     async def get_media_por_mural(self, mural_id: str) -> Dict[str, Any]:
         """Calcula média de avaliação de um mural"""
-        pipeline = [
-            {"$match": {"mural_id": mural_id}},
+        object_id = object_id_or_none(mural_id)
+        if object_id is None:
+            # IDs inválidos não ocupam entradas no cache
+            return {"media": 0, "total": 0, "distribuicao": {}}
+
+        # Chave igual à invalidada em _update_resumo (hex minúsculo do ObjectId)
+        return await analytics_cache.get_or_compute(
+            ("media_mural", str(object_id)),
+            lambda: self._compute_media_por_mural(object_id),
+        )
+
+    async def _compute_media_por_mural(self, object_id: ObjectId) -> Dict[str, Any]:
+        mural = await self.database.murais.find_one(
+            {"_id": object_id}, {"resumo_avaliacoes": 1}
+        )
+        resumo = (mural or {}).get("resumo_avaliacoes") or resumo_vazio()
+
+        total = resumo.get("total", 0)
+        if not total:
+            return {"media": 0, "total": 0, "distribuicao": {}}
+
+        return {
+            "media": round(resumo.get("soma", 0) / total, 2),
+            "total": total,
+            "distribuicao": {
+                nota: quantidade
+                for nota, quantidade in resumo.get("notas", {}).items()
+                if quantidade
+            },
+        }
+
+    def _resumo_pipeline(self) -> List[dict]:
+        """Agregação que recalcula os resumos de avaliação a partir das avaliações"""
+        # Avaliações ainda não migradas (migrar-avaliacoes) guardam o mural_id
+        # como string; convertido aqui para que entrem na reconstrução/verificação
+        mural_id = {
+            "$convert": {"input": "$mural_id", "to": "objectId", "onError": "$mural_id"}
+        }
+        return [
             {
                 "$group": {
-                    "_id": None,
-                    "media": {"$avg": "$nota"},
+                    "_id": mural_id,
                     "total": {"$sum": 1},
-                    "distribuicao": {"$push": "$nota"},
+                    "soma": {"$sum": "$nota"},
+                    **{
+                        f"nota_{nota}": {
+                            "$sum": {"$cond": [{"$eq": ["$nota", nota]}, 1, 0]}
+                        }
+                        for nota in NOTAS
+                    },
+                }
+            },
+            {
+                "$project": {
+                    "resumo_avaliacoes": {
+                        "total": "$total",
+                        "soma": "$soma",
+                        "notas": {str(nota): f"$nota_{nota}" for nota in NOTAS},
+                    },
                 }
             },
         ]
 
-        cursor = self.collection.aggregate(pipeline)
-        result = await cursor.to_list(length=1)
+    async def rebuild_resumos(self) -> int:
+        """Recalcula do zero o resumo de avaliações de todos os murais.
 
-        if not result:
-            return {"media": 0, "total": 0, "distribuicao": {}}
+        Deve ser executado sem escritas de avaliações em andamento.
+        """
+        await self.database.murais.update_many(
+            {},
+            {"$set": {"resumo_avaliacoes": resumo_vazio()}, "$inc": {"versao": 1}},
+        )
 
-        data = result[0]
+        pipeline = self._resumo_pipeline() + [
+            {
+                "$merge": {
+                    "into": "murais",
+                    "on": "_id",
+                    "whenMatched": "merge",
+                    "whenNotMatched": "discard",
+                }
+            }
+        ]
+        await self.collection.aggregate(pipeline).to_list(length=None)
 
-        # Calcular distribuição de notas
-        distribuicao = {}
-        for nota in data.get("distribuicao", []):
-            distribuicao[str(nota)] = distribuicao.get(str(nota), 0) + 1
+        analytics_cache.invalidate_prefix("media_mural")
+        await self.rollups.mark_dirty("bairro")
+        await self.generations.bump("murais")
+        return await self.database.murais.count_documents(
+            {"resumo_avaliacoes.total": {"$gt": 0}}
+        )
 
-        return {
-            "media": round(data.get("media", 0), 2),
-            "total": data.get("total", 0),
-            "distribuicao": distribuicao,
-        }
+    async def check_resumos(self, max_divergentes: int = 100) -> Dict[str, Any]:
+        """Compara os resumos mantidos nos murais com os valores recalculados"""
+        esperados = {}
+        async for item in self.collection.aggregate(self._resumo_pipeline()):
+            esperados[item["_id"]] = item["resumo_avaliacoes"]
 
-    async def create(self, avaliacao_data: dict) -> dict:
-        """Criar avaliação com serialização"""
-        avaliacao_data["data"] = datetime.utcnow()
-        result = await self.collection.insert_one(avaliacao_data)
+        verificados = 0
+        divergentes = []
+        async for mural in self.database.murais.find({}, {"resumo_avaliacoes": 1}):
+            verificados += 1
+            esperado = self._normalize_resumo(esperados.get(mural["_id"]))
+            atual = self._normalize_resumo(mural.get("resumo_avaliacoes"))
+            if atual != esperado and len(divergentes) < max_divergentes:
+                divergentes.append(
+                    {
+                        "mural_id": str(mural["_id"]),
+                        "atual": atual,
+                        "esperado": esperado,
+                    }
+                )
 
-        created_avaliacao = await self.collection.find_one({"_id": result.inserted_id})
-        return self._serialize_avaliacao(created_avaliacao)
+        return {"verificados": verificados, "divergentes": divergentes}
 
-    def _serialize_avaliacao(self, avaliacao: dict) -> dict:
-        """Serializa uma avaliação para o formato de resposta"""
-        if not avaliacao:
-            return None
+    async def migrate_reference_ids(self, batch_size: int = 1000) -> Dict[str, Any]:
+        """Converte em ObjectId as referências mural_id/usuario_id gravadas como string.
+
+        Roda com a API no ar: cada atualização só se aplica se o documento
+        ainda tiver os valores lidos, e os lotes são não ordenados.
+        """
+        report = {"convertidas": 0, "invalidas": [], "duplicadas": []}
+        referencias = ("mural_id", "usuario_id")
+        operations, ids = [], []
+
+        async def flush():
+            try:
+                result = await self.collection.bulk_write(operations, ordered=False)
+                report["convertidas"] += result.modified_count
+            except BulkWriteError as e:
+                report["convertidas"] += e.details.get("nModified", 0)
+                for error in e.details.get("writeErrors", []):
+                    # Mesmo par já gravado com ObjectId: avaliação repetida
+                    if error.get("code") != 11000:
+                        raise
+                    report["duplicadas"].append(str(ids[error["index"]]))
+
+        cursor = self.collection.find(
+            {"$or": [{field: {"$type": "string"}} for field in referencias]},
+            {field: 1 for field in referencias},
+        )
+        async for avaliacao in cursor:
+            try:
+                valores = {
+                    field: parse_object_id(avaliacao.get(field))
+                    for field in referencias
+                }
+            except ValueError:
+                report["invalidas"].append(str(avaliacao["_id"]))
+                continue
+
+            operations.append(
+                UpdateOne(
+                    {
+                        "_id": avaliacao["_id"],
+                        **{f: avaliacao.get(f) for f in referencias},
+                    },
+                    {"$set": valores},
+                )
+            )
+            ids.append(avaliacao["_id"])
+            if len(operations) >= batch_size:
+                await flush()
+                operations, ids = [], []
+
+        if operations:
+            await flush()
 
-        avaliacao["id"] = str(avaliacao["_id"])
-        del avaliacao["_id"]
+        report["restantes"] = await self.count_string_references()
+        return report
 
-        return avaliacao
+    async def count_string_references(self) -> int:
+        """Avaliações que ainda referenciam mural ou usuário por string"""
+        return await self.collection.count_documents(
+            {
+                "$or": [
+                    {"mural_id": {"$type": "string"}},
+                    {"usuario_id": {"$type": "string"}},
+                ]
+            }
+        )
+
+    async def check_reference_indexes(self) -> Dict[str, str]:
+        """Estágio do plano vencedor das consultas por mural_id e por usuario_id"""
+        planos = {}
+        for field in ("mural_id", "usuario_id"):
+            explain = await self.collection.find({field: ObjectId()}).explain()
+            planos[field] = self._plan_stage(explain["queryPlanner"]["winningPlan"])
+        return planos
+
+    @staticmethod
+    def _plan_stage(plan: dict) -> str:
+        """Estágio mais interno de um plano (IXSCAN quando a consulta usa índice)"""
+        while "inputStage" in plan or "queryPlan" in plan:
+            plan = plan.get("inputStage") or plan["queryPlan"]
+        return plan.get("stage", "")
+
+    @staticmethod
+    def _normalize_resumo(resumo: Optional[dict]) -> dict:
+        """Completa com zeros as chaves ausentes de um resumo para comparação"""
+        resumo = resumo or {}
+        notas = resumo.get("notas") or {}
+        return {
+            "total": resumo.get("total", 0),
+            "soma": resumo.get("soma", 0),
+            "notas": {str(nota): notas.get(str(nota), 0) for nota in NOTAS},
+        }
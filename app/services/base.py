@@ -1,59 +1,160 @@
-from typing import Any, Dict, Optional
+from enum import Enum
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple, Type
 
-from bson import ObjectId
-from bson.errors import InvalidId
+from bson import ObjectId, json_util
 from motor.motor_asyncio import AsyncIOMotorDatabase
+from pydantic import BaseModel, ValidationError
+from pymongo import IndexModel, UpdateOne
+from pymongo.errors import BulkWriteError
+
+from config.settings import settings
+from models.common import object_id_or_none
+from .bulk import format_validation_error, iter_ndjson
+from .cache import TTLCache
+from .generation import GenerationService
+from .normalization import shadow_fields
+
+
+class ConflictError(Exception):
+    """Escrita rejeitada por conflito com um documento existente (409)"""
+
+
+class CountMode(str, Enum):
+    """Como o total de uma listagem paginada é calculado"""
+
+    EXACT = "exact"
+    ESTIMATED = "estimated"
+    NONE = "none"
+
+
+# Contagens filtradas reaproveitadas pelo modo estimado, compartilhadas entre serviços
+estimated_count_cache = TTLCache(
+    maxsize=settings.COUNT_CACHE_MAXSIZE, ttl=settings.COUNT_CACHE_TTL_SECONDS
+)
 
 
 class BaseService:
-    def __init__(self, database: AsyncIOMotorDatabase, collection_name: str):
+    # Campos com sombra <campo>_norm (sem acentos/maiúsculas) mantida nas escritas
+    NORMALIZED_FIELDS: Tuple[str, ...] = ()
+    # Gerações (ETag de respostas agregadas) incrementadas a cada escrita
+    GENERATIONS: Tuple[str, ...] = ()
+    # Índices por coleção, aplicados por services.indexes.reconcile_indexes
+    INDEXES: Dict[str, Tuple[IndexModel, ...]] = {}
+
+    def __init__(
+        self,
+        database: AsyncIOMotorDatabase,
+        collection_name: str,
+        generations: Optional[GenerationService] = None,
+    ):
         self.database = database
         self.collection = database[collection_name]
+        # Colaboradores compartilhados são recebidos do ServiceRegistry; criados
+        # aqui só quando o serviço é usado isoladamente (manage.py)
+        self.generations = generations or GenerationService(database)
+
+    async def bump_generations(self) -> None:
+        if self.GENERATIONS:
+            await self.generations.bump(*self.GENERATIONS)
 
     async def create(self, data: dict) -> str:
         """Cria um novo documento"""
         result = await self.collection.insert_one(data)
+        await self.bump_generations()
         return str(result.inserted_id)
 
     async def get_by_id(self, id: str) -> Optional[dict]:
         """Busca um documento por ID"""
-        try:
-            object_id = ObjectId(id)
-        except InvalidId:
+        object_id = object_id_or_none(id)
+        if object_id is None:
             return None
 
-        document = await self.collection.find_one({"_id": object_id})
-        if document:
-            document["_id"] = str(document["_id"])
-        return document
+        # _id segue como ObjectId: PyObjectId/MongoJSONResponse o serializam
+        return await self.collection.find_one({"_id": object_id})
+
+    @staticmethod
+    def changed_filter(object_id: ObjectId, update_data: dict) -> dict:
+        """Casa o documento só se a escrita alterar algum campo.
+
+        Uma escrita sem efeito não incrementa a versão (ETag) nem as gerações
+        e, como antes, é tratada como não encontrada.
+        """
+        return {
+            "_id": object_id,
+            "$or": [{field: {"$ne": value}} for field, value in update_data.items()],
+        }
 
     async def update(self, id: str, data: dict) -> bool:
         """Atualiza um documento"""
-        try:
-            object_id = ObjectId(id)
-        except InvalidId:
+        object_id = object_id_or_none(id)
+        if object_id is None:
             return False
 
         # Remove campos None/vazios
         update_data = {k: v for k, v in data.items() if v is not None}
         if not update_data:
             return False
+        update_data.update(shadow_fields(update_data, self.NORMALIZED_FIELDS))
 
         result = await self.collection.update_one(
-            {"_id": object_id}, {"$set": update_data}
+            self.changed_filter(object_id, update_data),
+            {"$set": update_data, "$inc": {"versao": 1}},
         )
+        if result.modified_count:
+            await self.bump_generations()
         return result.modified_count > 0
 
+    async def update_and_get_previous(
+        self, id: str, data: dict, projection: dict, filters: Optional[dict] = None
+    ) -> Optional[dict]:
+        """Atualiza um documento e retorna os campos projetados de antes da escrita.
+
+        filters restringe ainda mais o documento alvo (ex.: o dono da avaliação).
+        """
+        object_id = object_id_or_none(id)
+        if object_id is None:
+            return None
+
+        update_data = {k: v for k, v in data.items() if v is not None}
+        if not update_data:
+            return None
+        update_data.update(shadow_fields(update_data, self.NORMALIZED_FIELDS))
+
+        previous = await self.collection.find_one_and_update(
+            {**self.changed_filter(object_id, update_data), **(filters or {})},
+            {"$set": update_data, "$inc": {"versao": 1}},
+            projection=projection,
+        )
+        if previous is not None:
+            await self.bump_generations()
+        return previous
+
     async def delete(self, id: str) -> bool:
         """Deleta um documento"""
-        try:
-            object_id = ObjectId(id)
-        except InvalidId:
+        object_id = object_id_or_none(id)
+        if object_id is None:
             return False
 
         result = await self.collection.delete_one({"_id": object_id})
+        if result.deleted_count:
+            await self.bump_generations()
         return result.deleted_count > 0
 
+    async def delete_and_get(
+        self, id: str, projection: dict, filters: Optional[dict] = None
+    ) -> Optional[dict]:
+        """Deleta um documento e retorna os campos projetados dele"""
+        object_id = object_id_or_none(id)
+        if object_id is None:
+            return None
+
+        deleted = await self.collection.find_one_and_delete(
+            {"_id": object_id, **(filters or {})}, projection=projection
+        )
+        if deleted is not None:
+            await self.bump_generations()
+        return deleted
+
     async def list_with_pagination(
         self,
         filters: dict = None,
@@ -61,37 +162,176 @@ class BaseService:
         limit: int = 10,
         sort_by: str = "_id",
         sort_order: int = 1,
+        count_mode: CountMode = CountMode.EXACT,
     ) -> Dict[str, Any]:
         """Lista documentos com paginação"""
         if filters is None:
             filters = {}
 
         skip = (page - 1) * limit
+        stages = [{"$skip": skip}, {"$limit": limit}]
 
-        # Contar total de documentos
-        total = await self.collection.count_documents(filters)
-
-        # Buscar documentos
-        cursor = (
-            self.collection.find(filters)
-            .sort(sort_by, sort_order)
-            .skip(skip)
-            .limit(limit)
+        documents, total = await self._paginate(
+            filters, {sort_by: sort_order}, stages, limit, count_mode
         )
-        documents = await cursor.to_list(length=limit)
-
-        # Converter ObjectId para string
-        for doc in documents:
-            doc["_id"] = str(doc["_id"])
 
+        # ObjectId e datetime são convertidos na renderização (MongoJSONResponse)
         return {
             "items": documents,
             "total": total,
             "page": page,
             "limit": limit,
-            "pages": (total + limit - 1) // limit,
+            "pages": (total + limit - 1) // limit if total is not None else None,
         }
 
+    async def _paginate(
+        self,
+        filters: dict,
+        sort: dict,
+        page_stages: List[dict],
+        limit: int,
+        count_mode: CountMode,
+    ) -> tuple:
+        """Busca uma página e o total; no modo exato, ambos em um único $facet"""
+        pipeline = [{"$match": filters}, {"$sort": sort}]
+
+        if count_mode == CountMode.EXACT:
+            # $match e $sort antes do $facet para que o índice seja aproveitado
+            pipeline.append(
+                {
+                    "$facet": {
+                        "items": page_stages,
+                        "total": [{"$count": "total"}],
+                    }
+                }
+            )
+            result = await self.collection.aggregate(pipeline).to_list(1)
+            facet = result[0] if result else {"items": [], "total": []}
+            total = facet["total"][0]["total"] if facet["total"] else 0
+            return facet["items"], total
+
+        documents = await self.collection.aggregate(pipeline + page_stages).to_list(
+            limit
+        )
+        return documents, await self._count(filters, count_mode)
+
+    async def _count(self, filters: dict, count_mode: CountMode) -> Optional[int]:
+        """Conta documentos conforme o modo de contagem solicitado"""
+        if count_mode == CountMode.NONE:
+            return None
+
+        if count_mode == CountMode.EXACT:
+            return await self.collection.count_documents(filters)
+
+        # Sem filtros, os metadados da coleção bastam
+        if not filters:
+            return await self.collection.estimated_document_count()
+
+        key = (self.collection.name, json_util.dumps(filters, sort_keys=True))
+        total = estimated_count_cache.get(key)
+        if total is None:
+            total = await self.collection.count_documents(filters)
+            estimated_count_cache.set(key, total)
+        return total
+
+    async def bulk_import(
+        self,
+        chunks: AsyncIterator[bytes],
+        model: Type[BaseModel],
+        chunk_size: int = settings.BULK_CHUNK_SIZE,
+    ) -> Dict[str, Any]:
+        """Importa documentos de um fluxo NDJSON em lotes, com relatório de erros por linha"""
+        report = {"total": 0, "inseridos": 0, "erros": [], "erros_omitidos": 0}
+        batch: List[Tuple[int, BaseModel]] = []
+
+        async for line_number, raw in iter_ndjson(chunks, settings.BULK_MAX_LINE_BYTES):
+            report["total"] += 1
+            try:
+                batch.append((line_number, model.model_validate_json(raw)))
+            except ValidationError as e:
+                self._report_error(report, line_number, format_validation_error(e))
+                continue
+
+            if len(batch) >= chunk_size:
+                await self._insert_batch(batch, report)
+                batch = []
+
+        if batch:
+            await self._insert_batch(batch, report)
+
+        return report
+
+    async def _insert_batch(
+        self, batch: List[Tuple[int, BaseModel]], report: Dict[str, Any]
+    ) -> None:
+        documents, errors = await self._prepare_batch(batch)
+        for line_number, message in errors:
+            self._report_error(report, line_number, message)
+
+        if not documents:
+            return
+
+        lines = [line_number for line_number, _ in documents]
+        docs = [doc for _, doc in documents]
+        failed = set()
+        try:
+            result = await self.collection.insert_many(docs, ordered=False)
+            report["inseridos"] += len(result.inserted_ids)
+        except BulkWriteError as e:
+            report["inseridos"] += e.details.get("nInserted", 0)
+            for error in e.details.get("writeErrors", []):
+                failed.add(error["index"])
+                self._report_error(report, lines[error["index"]], error["errmsg"])
+
+        if len(failed) < len(docs):
+            await self.bump_generations()
+        await self._after_bulk_insert(
+            [doc for index, doc in enumerate(docs) if index not in failed]
+        )
+
+    async def _prepare_batch(
+        self, batch: List[Tuple[int, BaseModel]]
+    ) -> Tuple[List[Tuple[int, dict]], List[Tuple[int, str]]]:
+        """Converte um lote validado em documentos; retorna (documentos, erros) por linha"""
+        return [(line_number, item.dict()) for line_number, item in batch], []
+
+    async def _after_bulk_insert(self, documents: List[dict]) -> None:
+        """Ponto de extensão executado após cada lote inserido"""
+
+    @staticmethod
+    def _report_error(report: Dict[str, Any], line_number: int, message: str) -> None:
+        if len(report["erros"]) < settings.BULK_MAX_ERRORS:
+            report["erros"].append({"linha": line_number, "erro": message})
+        else:
+            report["erros_omitidos"] += 1
+
+    async def sync_normalized_fields(self, batch_size: int = 1000) -> int:
+        """Preenche os campos-sombra normalizados de todos os documentos, em lotes"""
+        if not self.NORMALIZED_FIELDS:
+            return 0
+
+        updated = 0
+        operations = []
+        projection = {field: 1 for field in self.NORMALIZED_FIELDS}
+
+        async for document in self.collection.find({}, projection):
+            operations.append(
+                UpdateOne(
+                    {"_id": document["_id"]},
+                    {"$set": shadow_fields(document, self.NORMALIZED_FIELDS)},
+                )
+            )
+            if len(operations) >= batch_size:
+                result = await self.collection.bulk_write(operations, ordered=False)
+                updated += result.modified_count
+                operations = []
+
+        if operations:
+            result = await self.collection.bulk_write(operations, ordered=False)
+            updated += result.modified_count
+
+        return updated
+
     async def count(self, filters: dict = None) -> int:
         """Conta documentos com filtros"""
         if filters is None:
@@ -0,0 +1,37 @@
+from typing import AsyncIterator, Tuple
+
+from pydantic import ValidationError
+
+
+async def iter_ndjson(
+    chunks: AsyncIterator[bytes], max_line_bytes: int
+) -> AsyncIterator[Tuple[int, bytes]]:
+    """Divide um fluxo de bytes em linhas NDJSON não vazias, numeradas a partir de 1"""
+    buffer = b""
+    line_number = 0
+
+    async for chunk in chunks:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+
+        for line in lines:
+            line_number += 1
+            if line.strip():
+                yield line_number, line
+
+        # Sem quebra de linha, o buffer cresceria sem limite
+        if len(buffer) > max_line_bytes:
+            raise ValueError(
+                f"Linha {line_number + 1} excede o tamanho máximo de {max_line_bytes} bytes"
+            )
+
+    if buffer.strip():
+        yield line_number + 1, buffer
+
+
+def format_validation_error(error: ValidationError) -> str:
+    """Resumo em uma linha dos erros de validação do Pydantic"""
+    return "; ".join(
+        f"{'.'.join(str(part) for part in err['loc']) or 'linha'}: {err['msg']}"
+        for err in error.errors()
+    )
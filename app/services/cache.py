@@ -0,0 +1,138 @@
+import asyncio
+import functools
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Set
+
+from config.settings import settings
+
+
+class TTLCache:
+    """Cache em memória limitado por tamanho (LRU) e com expiração por TTL"""
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 60.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Retorna o valor em cache ou None se ausente/expirado"""
+        entry = self._data.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._data[key]
+            self.expirations += 1
+            self.misses += 1
+            return None
+
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        """Armazena um valor, descartando o menos usado se exceder o limite"""
+        self._data[key] = (time.monotonic() + self.ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, key: Hashable) -> None:
+        """Remove uma chave específica"""
+        self._data.pop(key, None)
+
+    def invalidate_prefix(self, prefix: str) -> None:
+        """Remove todas as chaves (tuplas) cujo primeiro elemento é o prefixo"""
+        for key in [k for k in self._data if isinstance(k, tuple) and k[0] == prefix]:
+            del self._data[key]
+
+    def clear(self) -> None:
+        self._data.clear()
+
+    def stats(self) -> Dict[str, int]:
+        """Contadores de uso do cache"""
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
+
+
+class AsyncTTLCache(TTLCache):
+    """TTLCache com cálculo assíncrono em voo único por chave"""
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 60.0):
+        super().__init__(maxsize=maxsize, ttl=ttl)
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+        # Chaves invalidadas durante o cálculo: o resultado pode refletir dados
+        # já alterados e não é armazenado (as demais chaves não são afetadas)
+        self._stale: Set[Hashable] = set()
+        self.coalesced = 0
+
+    async def get_or_compute(
+        self, key: Hashable, factory: Callable[[], Awaitable[Any]]
+    ) -> Any:
+        """Retorna o valor em cache ou o calcula uma única vez para requisições simultâneas"""
+        value = self.get(key)
+        if value is not None:
+            return value
+
+        task = self._inflight.get(key)
+        if task is not None:
+            self.coalesced += 1
+        else:
+            # O cálculo roda em uma task própria: se quem o iniciou for cancelado,
+            # os demais que aguardam a mesma chave ainda recebem o resultado
+            task = asyncio.ensure_future(factory())
+            self._inflight[key] = task
+            task.add_done_callback(functools.partial(self._store, key))
+        return await asyncio.shield(task)
+
+    def _store(self, key: Hashable, task: asyncio.Task) -> None:
+        del self._inflight[key]
+        stale = key in self._stale
+        self._stale.discard(key)
+        # exception() também evita o aviso "exception was never retrieved"
+        if task.cancelled() or task.exception() is not None or stale:
+            return
+        self.set(key, task.result())
+
+    def invalidate(self, key: Hashable) -> None:
+        if key in self._inflight:
+            self._stale.add(key)
+        super().invalidate(key)
+
+    def invalidate_prefix(self, prefix: str) -> None:
+        self._stale.update(
+            key
+            for key in self._inflight
+            if isinstance(key, tuple) and key[0] == prefix
+        )
+        super().invalidate_prefix(prefix)
+
+    def clear(self) -> None:
+        self._stale.update(self._inflight)
+        super().clear()
+
+    def stats(self) -> Dict[str, int]:
+        stats = super().stats()
+        stats["coalesced"] = self.coalesced
+        stats["inflight"] = len(self._inflight)
+        return stats
+
+
+# Resultados das agregações analíticas (top artistas, médias de avaliação)
+analytics_cache = AsyncTTLCache(
+    maxsize=settings.ANALYTICS_CACHE_MAXSIZE, ttl=settings.ANALYTICS_CACHE_TTL_SECONDS
+)
@@ -0,0 +1,108 @@
+import csv
+import io
+from enum import Enum
+from typing import AsyncIterator
+
+import orjson
+
+# Tamanho aproximado de cada bloco enviado ao cliente
+CHUNK_BYTES = 64 * 1024
+
+CSV_COLUMNS = [
+    "id",
+    "titulo",
+    "descricao",
+    "imagem_url",
+    "data_criacao",
+    "tags",
+    "artista_ids",
+    "local_id",
+    "local_nome",
+    "bairro",
+    "cidade",
+    "latitude",
+    "longitude",
+]
+
+
+class ExportFormat(str, Enum):
+    NDJSON = "ndjson"
+    CSV = "csv"
+
+
+MEDIA_TYPES = {
+    ExportFormat.NDJSON: "application/x-ndjson",
+    ExportFormat.CSV: "text/csv; charset=utf-8",
+}
+
+
+def _json_default(value):
+    # ObjectId e demais tipos BSON sem equivalente JSON; datetime é nativo no orjson
+    return str(value)
+
+
+def _str(value):
+    return str(value) if value is not None else None
+
+
+def _csv_row(mural: dict) -> list:
+    local = mural.get("local") or {}
+    data_criacao = mural.get("data_criacao")
+    return [
+        _str(mural.get("id")),
+        mural.get("titulo"),
+        mural.get("descricao"),
+        mural.get("imagem_url"),
+        data_criacao.isoformat() if data_criacao else None,
+        "|".join(mural.get("tags") or []),
+        "|".join(str(id) for id in mural.get("artista_ids") or []),
+        _str(mural.get("local_id")),
+        local.get("nome"),
+        local.get("bairro"),
+        local.get("cidade"),
+        local.get("latitude"),
+        local.get("longitude"),
+    ]
+
+
+async def encode_murais(
+    murais: AsyncIterator[dict], export_format: ExportFormat
+) -> AsyncIterator[bytes]:
+    """Codifica murais vindos do banco em NDJSON ou CSV, agrupando em blocos"""
+    if export_format == ExportFormat.CSV:
+        encoded = _encode_csv(murais)
+    else:
+        encoded = _encode_ndjson(murais)
+
+    async for chunk in encoded:
+        yield chunk
+
+
+async def _encode_ndjson(murais: AsyncIterator[dict]) -> AsyncIterator[bytes]:
+    buffer = bytearray()
+    async for mural in murais:
+        buffer += orjson.dumps(
+            mural, default=_json_default, option=orjson.OPT_APPEND_NEWLINE
+        )
+        if len(buffer) >= CHUNK_BYTES:
+            yield bytes(buffer)
+            buffer.clear()
+
+    if buffer:
+        yield bytes(buffer)
+
+
+async def _encode_csv(murais: AsyncIterator[dict]) -> AsyncIterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(CSV_COLUMNS)
+
+    async for mural in murais:
+        writer.writerow(_csv_row(mural))
+        if buffer.tell() >= CHUNK_BYTES:
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate()
+
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
@@ -0,0 +1,32 @@
+import asyncio
+from typing import Dict
+
+from motor.motor_asyncio import AsyncIOMotorDatabase
+
+
+class GenerationService:
+    """Contadores de escrita por coleção, compartilhados entre processos via MongoDB.
+
+    Cada escrita em uma coleção incrementa sua geração; respostas agregadas
+    derivam o ETag das gerações das coleções de que dependem.
+    """
+
+    def __init__(self, database: AsyncIOMotorDatabase):
+        self.collection = database["geracoes"]
+
+    async def bump(self, *names: str) -> None:
+        await asyncio.gather(
+            *[
+                self.collection.update_one(
+                    {"_id": name}, {"$inc": {"valor": 1}}, upsert=True
+                )
+                for name in names
+            ]
+        )
+
+    async def get(self, *names: str) -> Dict[str, int]:
+        """Geração atual de cada coleção (0 se nunca escrita)"""
+        generations = dict.fromkeys(names, 0)
+        async for document in self.collection.find({"_id": {"$in": list(names)}}):
+            generations[document["_id"]] = document["valor"]
+        return generations
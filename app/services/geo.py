@@ -0,0 +1,120 @@
+import math
+from typing import List, Set, Tuple
+
+GEOHASH_ALPHABET = "0123456789bcdefghjkmnpqrstuvwxyz"
+
+# Precisão do geohash armazenado nos murais (~5 m)
+GEOHASH_PRECISION = 9
+
+# Fatias de no máximo 90° de longitude evitam polígonos ambíguos no 2dsphere
+MAX_POLYGON_LNG_SPAN = 90.0
+MAX_LATITUDE = 89.999
+
+
+def geo_point(latitude: float, longitude: float) -> dict:
+    """Ponto GeoJSON (a ordem das coordenadas no GeoJSON é longitude, latitude)"""
+    return {"type": "Point", "coordinates": [longitude, latitude]}
+
+
+def geohash_encode(
+    latitude: float, longitude: float, precision: int = GEOHASH_PRECISION
+) -> str:
+    """Codifica uma coordenada em geohash"""
+    lat_range = [-90.0, 90.0]
+    lng_range = [-180.0, 180.0]
+    chars = []
+    bits = 0
+    value = 0
+    even = True
+
+    while len(chars) < precision:
+        interval, coordinate = (lng_range, longitude) if even else (lat_range, latitude)
+        middle = (interval[0] + interval[1]) / 2
+        value <<= 1
+        if coordinate >= middle:
+            value |= 1
+            interval[0] = middle
+        else:
+            interval[1] = middle
+        even = not even
+        bits += 1
+
+        if bits == 5:
+            chars.append(GEOHASH_ALPHABET[value])
+            bits = 0
+            value = 0
+
+    return "".join(chars)
+
+
+def geohash_cell_size(precision: int) -> Tuple[float, float]:
+    """Altura e largura, em graus, de uma célula de geohash"""
+    total_bits = precision * 5
+    lng_bits = (total_bits + 1) // 2
+    lat_bits = total_bits // 2
+    return 180.0 / (1 << lat_bits), 360.0 / (1 << lng_bits)
+
+
+def precision_for_zoom(zoom: int, max_precision: int = GEOHASH_PRECISION) -> int:
+    """Menor precisão cuja célula ocupa até ~1/4 de um tile de mapa no zoom dado"""
+    target_width = 360.0 / (1 << (zoom + 2))
+    for precision in range(1, max_precision + 1):
+        if geohash_cell_size(precision)[1] <= target_width:
+            return precision
+    return max_precision
+
+
+def geohash_cover(
+    sw: Tuple[float, float], ne: Tuple[float, float], precision: int
+) -> Set[str]:
+    """Células de geohash, na precisão dada, que cobrem o retângulo sw/ne"""
+    cell_lat, cell_lng = geohash_cell_size(precision)
+    cells = set()
+
+    lat = _cell_start(sw[0], -90.0, cell_lat)
+    while lat < ne[0]:
+        lng = _cell_start(sw[1], -180.0, cell_lng)
+        while lng < ne[1]:
+            cells.add(
+                geohash_encode(
+                    min(lat + cell_lat / 2, 90.0),
+                    min(lng + cell_lng / 2, 180.0),
+                    precision,
+                )
+            )
+            lng += cell_lng
+        lat += cell_lat
+
+    return cells
+
+
+def _cell_start(value: float, origin: float, size: float) -> float:
+    return origin + math.floor((value - origin) / size) * size
+
+
+def bbox_polygons(sw: Tuple[float, float], ne: Tuple[float, float]) -> List[dict]:
+    """Polígonos GeoJSON que, unidos, cobrem o retângulo sw/ne"""
+    south = max(sw[0], -MAX_LATITUDE)
+    north = min(ne[0], MAX_LATITUDE)
+    slices = max(1, math.ceil((ne[1] - sw[1]) / MAX_POLYGON_LNG_SPAN))
+    step = (ne[1] - sw[1]) / slices
+
+    polygons = []
+    for i in range(slices):
+        west = sw[1] + i * step
+        east = west + step
+        polygons.append(
+            {
+                "type": "Polygon",
+                "coordinates": [
+                    [
+                        [west, south],
+                        [east, south],
+                        [east, north],
+                        [west, north],
+                        [west, south],
+                    ]
+                ],
+            }
+        )
+    return polygons
@@ -0,0 +1,123 @@
+import asyncio
+from typing import Any, Dict, List, Tuple
+
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import IndexModel
+
+from .artista_service import ArtistaService
+from .avaliacao_service import AvaliacaoService
+from .local_service import LocalService
+from .mural_service import MuralService
+from .rollup_service import RollupService
+from .search_service import SearchService
+from .tag_stats import TagStatsService
+from .tokens import TokenManager
+from .usuario_service import UsuarioService
+
+# Serviços que declaram índices (atributo INDEXES: coleção -> índices)
+INDEXED_SERVICES = (
+    MuralService,
+    LocalService,
+    ArtistaService,
+    AvaliacaoService,
+    UsuarioService,
+    SearchService,
+    RollupService,
+    TagStatsService,
+    TokenManager,
+)
+
+# Opções que distinguem dois índices de mesmo nome
+COMPARED_OPTIONS = ("unique", "sparse", "expireAfterSeconds", "partialFilterExpression")
+
+
+def declared_indexes() -> Dict[str, List[IndexModel]]:
+    """Índices declarados pelos serviços, agrupados por coleção"""
+    indexes: Dict[str, List[IndexModel]] = {}
+    for service in INDEXED_SERVICES:
+        for collection, models in service.INDEXES.items():
+            indexes.setdefault(collection, []).extend(models)
+    return indexes
+
+
+def _key(key: Dict[str, Any]) -> List[Tuple[str, Any]]:
+    # list_indexes devolve direções como float em alguns servidores
+    return [
+        (field, int(value) if isinstance(value, float) else value)
+        for field, value in key.items()
+    ]
+
+
+def index_matches(declared: dict, existing: dict) -> bool:
+    """Se um índice existente equivale ao declarado (IndexModel.document)"""
+    key = _key(declared["key"])
+    if existing["key"].get("_fts") == "text":
+        # Índices de texto aparecem como _fts/_ftsx; os campos estão nos pesos
+        weights = declared.get("weights") or {field: 1 for field, _ in key}
+        if existing.get("weights") != weights:
+            return False
+        if existing.get("default_language") != declared.get(
+            "default_language", "english"
+        ):
+            return False
+    elif _key(existing["key"]) != key:
+        return False
+
+    return all(
+        (
+            bool(declared.get(option)) == bool(existing.get(option))
+            if option in ("unique", "sparse")
+            else declared.get(option) == existing.get(option)
+        )
+        for option in COMPARED_OPTIONS
+    )
+
+
+async def reconcile_collection(
+    database: AsyncIOMotorDatabase,
+    collection: str,
+    models: List[IndexModel],
+    replace: bool = False,
+) -> Dict[str, List[str]]:
+    """Cria, em um único createIndexes, os índices que faltam em uma coleção.
+
+    Índices de mesmo nome e definição diferente só são recriados com replace;
+    índices não declarados nunca são removidos.
+    """
+    existing = {
+        index["name"]: index async for index in database[collection].list_indexes()
+    }
+    report = {"criados": [], "inalterados": [], "divergentes": [], "recriados": []}
+
+    missing = []
+    for model in models:
+        name = model.document["name"]
+        if name not in existing:
+            missing.append(model)
+            report["criados"].append(name)
+        elif index_matches(model.document, existing[name]):
+            report["inalterados"].append(name)
+        elif replace:
+            await database[collection].drop_index(name)
+            missing.append(model)
+            report["recriados"].append(name)
+        else:
+            report["divergentes"].append(name)
+
+    if missing:
+        await database[collection].create_indexes(missing)
+    return report
+
+
+async def reconcile_indexes(
+    database: AsyncIOMotorDatabase, replace: bool = False
+) -> Dict[str, Dict[str, List[str]]]:
+    """Aplica os índices declarados, com as coleções tratadas em paralelo"""
+    indexes = declared_indexes()
+    reports = await asyncio.gather(
+        *[
+            reconcile_collection(database, collection, models, replace)
+            for collection, models in indexes.items()
+        ]
+    )
+    return dict(zip(indexes, reports))
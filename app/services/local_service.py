@@ -1,41 +1,222 @@
+from collections import Counter
+from typing import Any, Dict, List, Optional
+
+from bson import ObjectId
 from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import GEOSPHERE, IndexModel
 
+from models.common import object_id_or_none
 from models.local import LocalCreate, LocalUpdate
 from .base import BaseService
+from .autocomplete import AutocompleteType, autocomplete
+from .cache import analytics_cache
+from .generation import GenerationService
+from .geo import geo_point, geohash_encode
+from .rollup_service import RollupService
+from .tag_stats import TagStatsService
+from .normalization import normalize_text, prefix_filter, shadow_fields
+
+# Campos do local necessários para desnormalização no mural
+LOCAL_PROJECTION = {"bairro": 1, "cidade": 1, "latitude": 1, "longitude": 1}
+
+# Ponto GeoJSON calculado a partir dos campos latitude/longitude do próprio documento
+LOCALIZACAO_EXPR = {
+    "type": "Point",
+    "coordinates": ["$longitude", "$latitude"],
+}
+
+
+def denormalized_fields(local: dict) -> dict:
+    """Campos do local copiados para os murais, para filtragem e buscas indexadas"""
+    fields = {}
+    if "bairro" in local:
+        fields["bairro"] = normalize_text(local["bairro"])
+    if "cidade" in local:
+        fields["cidade"] = normalize_text(local["cidade"])
+    if local.get("latitude") is not None and local.get("longitude") is not None:
+        fields["localizacao"] = geo_point(local["latitude"], local["longitude"])
+        fields["geohash"] = geohash_encode(local["latitude"], local["longitude"])
+    return fields
 
 
 class LocalService(BaseService):
-    def __init__(self, database: AsyncIOMotorDatabase):
-        super().__init__(database, "locais")
+    NORMALIZED_FIELDS = ("nome", "bairro", "cidade")
+    GENERATIONS = ("locais",)
+    INDEXES = {
+        "locais": (
+            IndexModel([("localizacao", GEOSPHERE)]),
+            IndexModel("nome_norm"),
+            IndexModel("bairro_norm"),
+            IndexModel("cidade_norm"),
+        )
+    }
+
+    def __init__(
+        self,
+        database: AsyncIOMotorDatabase,
+        generations: Optional[GenerationService] = None,
+        tag_stats: Optional[TagStatsService] = None,
+        rollups: Optional[RollupService] = None,
+    ):
+        super().__init__(database, "locais", generations)
+        self.tag_stats = tag_stats or TagStatsService(database, self.generations)
+        self.rollups = rollups or RollupService(database, self.generations)
 
     async def create_local(self, local_data: LocalCreate) -> str:
         """Cria um novo local"""
-        data = local_data.dict()
-        return await self.create(data)
+        data = self._prepare_document(local_data.dict())
+        local_id = await self.create(data)
+        autocomplete.add(AutocompleteType.BAIRRO, [data["bairro"]])
+        return local_id
+
+    def _prepare_document(self, local_data: dict) -> dict:
+        """Monta o documento de um novo local, com o ponto GeoJSON indexável"""
+        local_data["localizacao"] = geo_point(
+            local_data["latitude"], local_data["longitude"]
+        )
+        local_data.update(shadow_fields(local_data, self.NORMALIZED_FIELDS))
+        return local_data
+
+    async def _prepare_batch(self, batch):
+        documents = [
+            (line_number, self._prepare_document(item.dict()))
+            for line_number, item in batch
+        ]
+        return documents, []
+
+    async def _after_bulk_insert(self, documents: List[dict]) -> None:
+        autocomplete.add(
+            AutocompleteType.BAIRRO, [document.get("bairro") for document in documents]
+        )
+
+    async def delete(self, id: str) -> bool:
+        """Deleta um local"""
+        deleted = await self.delete_and_get(id, {"bairro": 1})
+        if deleted is None:
+            return False
+
+        autocomplete.remove(AutocompleteType.BAIRRO, [deleted.get("bairro")])
+        return True
 
     async def update_local(self, id: str, local_data: LocalUpdate) -> bool:
         """Atualiza um local"""
-        data = local_data.dict(exclude_unset=True)
-        return await self.update(id, data)
+        object_id = object_id_or_none(id)
+        if object_id is None:
+            return False
 
-    async def search_by_city(self, cidade: str):
-        """Busca locais por cidade"""
-        filters = {"cidade": {"$regex": cidade, "$options": "i"}}
-        cursor = self.collection.find(filters)
-        documents = await cursor.to_list(length=100)
+        data = {
+            k: v
+            for k, v in local_data.dict(exclude_unset=True).items()
+            if v is not None
+        }
+        if not data:
+            return False
 
-        for doc in documents:
-            doc["_id"] = str(doc["_id"])
+        data.update(shadow_fields(data, self.NORMALIZED_FIELDS))
+        stages = [
+            {
+                "$set": {
+                    **{k: {"$literal": v} for k, v in data.items()},
+                    "versao": {"$add": [{"$ifNull": ["$versao", 0]}, 1]},
+                }
+            }
+        ]
+        if "latitude" in data or "longitude" in data:
+            # Em um segundo estágio, para enxergar as coordenadas já atualizadas
+            stages.append({"$set": {"localizacao": LOCALIZACAO_EXPR}})
 
-        return documents
+        previous = await self.collection.find_one_and_update(
+            self.changed_filter(object_id, data), stages, projection=LOCAL_PROJECTION
+        )
+        if not previous:
+            return False
+        local = {**previous, **data}
 
-    async def search_by_neighborhood(self, bairro: str):
-        """Busca locais por bairro"""
-        filters = {"bairro": {"$regex": bairro, "$options": "i"}}
-        cursor = self.collection.find(filters)
-        documents = await cursor.to_list(length=100)
+        if "bairro" in data:
+            autocomplete.replace(
+                AutocompleteType.BAIRRO, [previous.get("bairro")], [data["bairro"]]
+            )
+
+        # Manter bairro/cidade/localização desnormalizados nos murais deste local
+        denormalized = {
+            field: value
+            for field, value in denormalized_fields(local).items()
+            if field in data
+            or (field in ("localizacao", "geohash") and len(stages) > 1)
+        }
+        if "bairro" in denormalized:
+            await self._move_tag_counts(
+                object_id,
+                normalize_text(previous.get("bairro")),
+                denormalized["bairro"],
+            )
+        if denormalized:
+            await self.database.murais.update_many(
+                {"local_id": object_id}, {"$set": denormalized}
+            )
+        if "bairro" in denormalized:
+            await self.rollups.mark_dirty("bairro")
+        if "geohash" in denormalized:
+            analytics_cache.invalidate_prefix("bbox")
+        await self.generations.bump(
+            *self.GENERATIONS, *(("murais",) if denormalized else ())
+        )
+
+        return True
+
+    async def _move_tag_counts(
+        self, local_id: ObjectId, old_bairro: Optional[str], new_bairro: str
+    ) -> None:
+        """Transfere para o novo bairro os contadores de tags dos murais deste local"""
+        if old_bairro == new_bairro:
+            return
+
+        pipeline = [
+            {"$match": {"local_id": local_id}},
+            {"$unwind": "$tags"},
+            {"$group": {"_id": {"mural": "$_id", "tag": "$tags"}}},
+            {"$group": {"_id": "$_id.tag", "total": {"$sum": 1}}},
+        ]
+        delta = Counter()
+        async for item in self.database.murais.aggregate(pipeline):
+            delta[(item["_id"], old_bairro)] -= item["total"]
+            delta[(item["_id"], new_bairro)] += item["total"]
+        await self.tag_stats.apply(delta)
 
-        for doc in documents:
-            doc["_id"] = str(doc["_id"])
+    async def sync_localizacao(self) -> int:
+        """Preenche o ponto GeoJSON de todos os locais a partir de latitude/longitude"""
+        result = await self.collection.update_many(
+            {"latitude": {"$ne": None}, "longitude": {"$ne": None}},
+            [{"$set": {"localizacao": LOCALIZACAO_EXPR}}],
+        )
+        return result.modified_count
+
+    async def near(
+        self, lat: float, lng: float, radius: float, limit: int = 10
+    ) -> List[Dict[str, Any]]:
+        """Locais mais próximos de um ponto, ordenados pela distância em metros"""
+        pipeline = [
+            {
+                "$geoNear": {
+                    "near": geo_point(lat, lng),
+                    "key": "localizacao",
+                    "distanceField": "distancia",
+                    "maxDistance": radius,
+                    "spherical": True,
+                }
+            },
+            {"$limit": limit},
+        ]
+        return await self.collection.aggregate(pipeline).to_list(limit)
+
+    async def search_by_city(self, cidade: str):
+        """Busca locais cuja cidade começa com o termo (sem acentos/maiúsculas)"""
+        return await self._search_prefix("cidade", cidade)
+
+    async def search_by_neighborhood(self, bairro: str):
+        """Busca locais cujo bairro começa com o termo (sem acentos/maiúsculas)"""
+        return await self._search_prefix("bairro", bairro)
 
-        return documents
+    async def _search_prefix(self, field: str, value: str, limit: int = 100):
+        cursor = self.collection.find(prefix_filter(field, value)).limit(limit)
+        return await cursor.to_list(length=limit)
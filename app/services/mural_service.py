@@ -1,19 +1,107 @@
+import asyncio
+from collections import Counter
 from datetime import datetime
-from typing import Any, Dict, List, Optional
+from enum import Enum
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence, Tuple
 
 from models.mural import MuralCreate, MuralUpdate
 from models.local import LocalCreate
+from models.common import object_id_or_none, parse_object_id
 from motor.motor_asyncio import AsyncIOMotorDatabase
 from bson import ObjectId
+from pymongo import GEOSPHERE, IndexModel, UpdateMany
+
+from config.settings import settings
+from .base import BaseService, CountMode
+from .autocomplete import AutocompleteType, autocomplete
+from .cache import analytics_cache
+from .generation import GenerationService
+from .geo import (
+    bbox_polygons,
+    geo_point,
+    geohash_cell_size,
+    geohash_cover,
+    precision_for_zoom,
+)
+from .local_service import LOCAL_PROJECTION, denormalized_fields
+from .normalization import normalize_text
+from .pagination import decode_cursor, encode_cursor, seek_filter
+from .rollup_service import (
+    RollupService,
+    media_por_bairro_pipeline,
+    top_artistas_pipeline,
+)
+from .tag_stats import TagStatsService, tag_delta
+
+# Renomeia _id para id no próprio pipeline; ObjectId e datetime são convertidos
+# apenas na renderização da resposta (MongoJSONResponse)
+RENAME_ID = [{"$set": {"id": "$_id"}}, {"$unset": "_id"}]
+
+# Estágios que anexam o local ao mural; devem vir após filtros e paginação.
+# A forma concisa do $lookup (localField + pipeline) exige MongoDB 5.0+
+LOOKUP_LOCAL = [
+    {
+        "$lookup": {
+            "from": "locais",
+            "localField": "local_id",
+            "foreignField": "_id",
+            "pipeline": [
+                {"$set": {"id": "$_id"}},
+                {"$unset": ["_id", "nome_norm", "bairro_norm", "cidade_norm"]},
+            ],
+            "as": "local",
+        }
+    },
+    {"$unwind": {"path": "$local", "preserveNullAndEmptyArrays": True}},
+    *RENAME_ID,
+]
+# Campos mínimos para desenhar murais individuais no mapa
+BBOX_PROJECTION = {
+    "titulo": 1,
+    "imagem_url": 1,
+    "tags": 1,
+    "local_id": 1,
+    "localizacao": 1,
+}
+
+NOTAS = range(1, 6)
+
+
+class TagMatch(str, Enum):
+    """Se o mural precisa ter todas as tags filtradas ou ao menos uma"""
 
-from .base import BaseService
-from .artista_service import ArtistaService
-from .local_service import LocalService
+    ALL = "all"
+    ANY = "any"
+
+
+def resumo_vazio() -> dict:
+    """Resumo de avaliações de um mural ainda não avaliado"""
+    return {"total": 0, "soma": 0, "notas": {str(nota): 0 for nota in NOTAS}}
 
 
 class MuralService(BaseService):
-    def __init__(self, database: AsyncIOMotorDatabase):
-        super().__init__(database, "murais")
+    GENERATIONS = ("murais",)
+    INDEXES = {
+        "murais": (
+            IndexModel("tags"),
+            IndexModel("bairro"),
+            IndexModel("artista_ids"),
+            IndexModel([("data_criacao", 1), ("_id", 1)]),
+            IndexModel([("localizacao", GEOSPHERE)]),
+            IndexModel("geohash"),
+        )
+    }
+
+    def __init__(
+        self,
+        database: AsyncIOMotorDatabase,
+        generations: Optional[GenerationService] = None,
+        tag_stats: Optional[TagStatsService] = None,
+        rollups: Optional[RollupService] = None,
+    ):
+        super().__init__(database, "murais", generations)
+        self.tag_stats = tag_stats or TagStatsService(database, self.generations)
+        self.rollups = rollups or RollupService(database, self.generations)
 
     async def create_mural(self, mural_data: MuralCreate) -> str:
         """Cria um novo mural"""
@@ -28,279 +116,538 @@ class MuralService(BaseService):
         artista_id: Optional[str] = None,
         page: int = 1,
         limit: int = 10,
+        cursor: Optional[str] = None,
+        count_mode: CountMode = CountMode.EXACT,
+        tags: Optional[List[str]] = None,
+        match: TagMatch = TagMatch.ALL,
     ) -> Dict[str, Any]:
         """Lista murais com filtros"""
-        # Construir pipeline de agregação para fazer lookup com locais
-        pipeline = []
+        match_filters = self._build_filters(
+            bairro=bairro, tag=tag, artista_id=artista_id, tags=tags, match=match
+        )
+
+        if cursor is not None:
+            return await self._list_keyset(match_filters, ("_id",), cursor, limit)
+
+        return await self._list_paginated(
+            match_filters, ("_id",), page, limit, count_mode
+        )
 
-        # Fazer lookup com a coleção de locais
-        pipeline.append(
+    async def near(
+        self,
+        lat: float,
+        lng: float,
+        radius: float,
+        limit: int = 10,
+        bairro: Optional[str] = None,
+        tag: Optional[str] = None,
+        artista_id: Optional[str] = None,
+        tags: Optional[List[str]] = None,
+        match: TagMatch = TagMatch.ALL,
+    ) -> Dict[str, Any]:
+        """Murais mais próximos de um ponto, ordenados pela distância em metros"""
+        match_filters = self._build_filters(
+            bairro=bairro, tag=tag, artista_id=artista_id, tags=tags, match=match
+        )
+        pipeline = [
             {
-                "$lookup": {
-                    "from": "locais",
-                    "localField": "local_id",
-                    "foreignField": "_id",
-                    "as": "local",
+                "$geoNear": {
+                    "near": geo_point(lat, lng),
+                    "key": "localizacao",
+                    "distanceField": "distancia",
+                    "maxDistance": radius,
+                    "query": match_filters,
+                    "spherical": True,
                 }
-            }
+            },
+            {"$limit": limit},
+            *LOOKUP_LOCAL,
+        ]
+        murais = await self.collection.aggregate(pipeline).to_list(limit)
+
+        return {
+            "murais": murais,
+            "limit": limit,
+        }
+
+    async def bbox(
+        self, sw: Tuple[float, float], ne: Tuple[float, float], zoom: int
+    ) -> Dict[str, Any]:
+        """Murais dentro de um retângulo (lat, lng); em zoom baixo, agrupados em clusters"""
+        if sw[0] >= ne[0] or sw[1] >= ne[1]:
+            raise ValueError("Retângulo inválido: sw deve estar a sudoeste de ne")
+
+        if zoom >= settings.BBOX_CLUSTER_MAX_ZOOM:
+            return await self._bbox_murais(sw, ne, zoom)
+        return await self._bbox_clusters(sw, ne, zoom)
+
+    async def _bbox_murais(
+        self, sw: Tuple[float, float], ne: Tuple[float, float], zoom: int
+    ) -> Dict[str, Any]:
+        geo_filters = [
+            {"localizacao": {"$geoWithin": {"$geometry": polygon}}}
+            for polygon in bbox_polygons(sw, ne)
+        ]
+        filters = geo_filters[0] if len(geo_filters) == 1 else {"$or": geo_filters}
+
+        max_murais = settings.BBOX_MAX_MURAIS
+        cursor = self.collection.find(filters, BBOX_PROJECTION).limit(max_murais + 1)
+        murais = await cursor.to_list(length=max_murais + 1)
+
+        return {
+            "zoom": zoom,
+            "modo": "murais",
+            "murais": [
+                {
+                    "id": str(mural["_id"]),
+                    "titulo": mural.get("titulo"),
+                    "imagem_url": mural.get("imagem_url"),
+                    "tags": mural.get("tags", []),
+                    "local_id": str(mural["local_id"]),
+                    "longitude": mural["localizacao"]["coordinates"][0],
+                    "latitude": mural["localizacao"]["coordinates"][1],
+                }
+                for mural in murais[:max_murais]
+            ],
+            "truncado": len(murais) > max_murais,
+        }
+
+    async def _bbox_clusters(
+        self, sw: Tuple[float, float], ne: Tuple[float, float], zoom: int
+    ) -> Dict[str, Any]:
+        precision = precision_for_zoom(zoom)
+
+        # Tiles são prefixos de geohash mais curtos; cada um é calculado e
+        # mantido em cache separadamente, independente do enquadramento exato
+        tile_precision = precision - 1
+        tiles = geohash_cover(sw, ne, tile_precision)
+        while tile_precision > 0 and len(tiles) > settings.BBOX_MAX_TILES:
+            tile_precision -= 1
+            tiles = geohash_cover(sw, ne, tile_precision)
+
+        results = await asyncio.gather(
+            *[
+                analytics_cache.get_or_compute(
+                    ("bbox", tile, precision),
+                    lambda tile=tile: self._cluster_tile(tile, precision),
+                )
+                for tile in tiles
+            ]
         )
 
-        # Unwind para transformar array em objeto
-        pipeline.append(
-            {"$unwind": {"path": "$local", "preserveNullAndEmptyArrays": True}}
+        # Mantém clusters cujo centróide está no retângulo ou a até uma célula dele
+        cell_lat, cell_lng = geohash_cell_size(precision)
+        clusters = [
+            cluster
+            for tile_clusters in results
+            for cluster in tile_clusters
+            if sw[0] - cell_lat <= cluster["latitude"] <= ne[0] + cell_lat
+            and sw[1] - cell_lng <= cluster["longitude"] <= ne[1] + cell_lng
+        ]
+        clusters.sort(key=lambda cluster: cluster["total"], reverse=True)
+
+        max_clusters = settings.BBOX_MAX_CLUSTERS
+        return {
+            "zoom": zoom,
+            "modo": "clusters",
+            "clusters": clusters[:max_clusters],
+            "truncado": len(clusters) > max_clusters,
+        }
+
+    async def _cluster_tile(self, tile: str, precision: int) -> List[Dict[str, Any]]:
+        """Agrupa os murais de um tile em células de geohash da precisão dada"""
+        # Prefixo ancorado: varredura por intervalo no índice de geohash
+        match_filters = {"geohash": {"$regex": f"^{tile}"}} if tile else {}
+        celula = {"$substrCP": ["$geohash", 0, precision]}
+        pipeline = [
+            {"$match": match_filters},
+            {
+                "$facet": {
+                    "celulas": [
+                        {
+                            "$group": {
+                                "_id": celula,
+                                "total": {"$sum": 1},
+                                "longitude": {
+                                    "$avg": {
+                                        "$arrayElemAt": ["$localizacao.coordinates", 0]
+                                    }
+                                },
+                                "latitude": {
+                                    "$avg": {
+                                        "$arrayElemAt": ["$localizacao.coordinates", 1]
+                                    }
+                                },
+                            }
+                        }
+                    ],
+                    "tags": [
+                        {"$unwind": "$tags"},
+                        {
+                            "$group": {
+                                "_id": {"celula": celula, "tag": "$tags"},
+                                "total": {"$sum": 1},
+                            }
+                        },
+                        {"$sort": {"total": -1}},
+                        {
+                            "$group": {
+                                "_id": "$_id.celula",
+                                "tag": {"$first": "$_id.tag"},
+                            }
+                        },
+                    ],
+                }
+            },
+        ]
+        result = await self.collection.aggregate(pipeline).to_list(1)
+        if not result:
+            return []
+
+        top_tags = {item["_id"]: item["tag"] for item in result[0]["tags"]}
+        return [
+            {
+                "geohash": cell["_id"],
+                "total": cell["total"],
+                "latitude": cell["latitude"],
+                "longitude": cell["longitude"],
+                "top_tag": top_tags.get(cell["_id"]),
+            }
+            for cell in result[0]["celulas"]
+        ]
+
+    async def export_murais(
+        self,
+        bairro: Optional[str] = None,
+        tag: Optional[str] = None,
+        artista_id: Optional[str] = None,
+        batch_size: int = 500,
+        tags: Optional[List[str]] = None,
+        match: TagMatch = TagMatch.ALL,
+    ) -> AsyncIterator[dict]:
+        """Percorre os murais filtrados com o local incluído, sem carregar tudo em memória"""
+        match_filters = self._build_filters(
+            bairro=bairro, tag=tag, artista_id=artista_id, tags=tags, match=match
         )
+        pipeline = [{"$match": match_filters}, {"$sort": {"_id": 1}}, *LOOKUP_LOCAL]
 
-        # Aplicar filtros
+        cursor = self.collection.aggregate(pipeline, batchSize=batch_size)
+        async for mural in cursor:
+            yield mural
+
+    def _build_filters(
+        self,
+        bairro: Optional[str] = None,
+        tag: Optional[str] = None,
+        artista_id: Optional[str] = None,
+        tags: Optional[List[str]] = None,
+        match: TagMatch = TagMatch.ALL,
+    ) -> dict:
+        """Monta os filtros sobre campos indexados da própria coleção de murais"""
         match_filters = {}
 
         if bairro:
-            match_filters["local.bairro"] = {"$regex": bairro, "$options": "i"}
+            match_filters["bairro"] = normalize_text(bairro)
 
-        if tag:
-            match_filters["tags"] = {"$in": [tag]}
+        # Todos os operadores abaixo usam o índice multikey de tags
+        tags = list(dict.fromkeys(([tag] if tag else []) + (tags or [])))
+        if len(tags) == 1:
+            match_filters["tags"] = tags[0]
+        elif tags:
+            operator = "$all" if match == TagMatch.ALL else "$in"
+            match_filters["tags"] = {operator: tags}
 
         if artista_id:
-            match_filters["artista_ids"] = {"$in": [ObjectId(artista_id)]}
+            match_filters["artista_ids"] = parse_object_id(
+                artista_id, "ID do artista inválido"
+            )
 
-        if match_filters:
-            pipeline.append({"$match": match_filters})
+        return match_filters
 
-        # Adicionar paginação
-        pipeline.extend([{"$skip": (page - 1) * limit}, {"$limit": limit}])
+    def _plan_pipeline(
+        self,
+        match_filters: dict,
+        sort_keys: Sequence[str],
+        limit: int,
+    ) -> List[dict]:
+        """Ordena os estágios: $match indexável e paginação antes do $lookup"""
+        return [
+            {"$match": match_filters},
+            {"$sort": {key: 1 for key in sort_keys}},
+            {"$limit": limit},
+            *LOOKUP_LOCAL,
+        ]
+
+    async def _list_keyset(
+        self,
+        match_filters: dict,
+        sort_keys: Sequence[str],
+        cursor: str,
+        limit: int,
+    ) -> Dict[str, Any]:
+        """Paginação por cursor: busca por intervalo no índice, sem $skip"""
+        if cursor:
+            after = decode_cursor(cursor, sort_keys)
+            seek = seek_filter(after, sort_keys)
+            match_filters = {"$and": [match_filters, seek]} if match_filters else seek
 
-        # Executar agregação
+        pipeline = self._plan_pipeline(match_filters, sort_keys, limit)
         murais = await self.collection.aggregate(pipeline).to_list(limit)
 
-        # Contar total (sem paginação)
-        count_pipeline = [
-            {
-                "$lookup": {
-                    "from": "locais",
-                    "localField": "local_id",
-                    "foreignField": "_id",
-                    "as": "local",
-                }
-            },
-            {"$unwind": {"path": "$local", "preserveNullAndEmptyArrays": True}},
-        ]
+        next_cursor = self._next_cursor(murais, sort_keys, limit)
 
-        if match_filters:
-            count_pipeline.append({"$match": match_filters})
+        return {
+            "murais": murais,
+            "limit": limit,
+            "next_cursor": next_cursor,
+        }
 
-        count_pipeline.append({"$count": "total"})
+    async def _list_paginated(
+        self,
+        match_filters: dict,
+        sort_keys: Sequence[str],
+        page: int,
+        limit: int,
+        count_mode: CountMode = CountMode.EXACT,
+    ) -> Dict[str, Any]:
+        """Paginação legada por page/limit"""
+        page_stages = [
+            {"$skip": (page - 1) * limit},
+            {"$limit": limit},
+            *LOOKUP_LOCAL,
+        ]
+        murais, total = await self._paginate(
+            match_filters,
+            {key: 1 for key in sort_keys},
+            page_stages,
+            limit,
+            count_mode,
+        )
 
-        total_result = await self.collection.aggregate(count_pipeline).to_list(1)
-        total = total_result[0]["total"] if total_result else 0
+        next_cursor = self._next_cursor(murais, sort_keys, limit)
 
-        # Serialize each mural
-        serialized_murais = [
-            self._serialize_mural_with_local(mural) for mural in murais
-        ]
+        if total is None:
+            pages = None
+        else:
+            pages = (total + limit - 1) // limit if total > 0 else 0
 
         return {
-            "murais": serialized_murais,
+            "murais": murais,
             "total": total,
             "page": page,
-            "pages": (total + limit - 1) // limit if total > 0 else 0,
+            "pages": pages,
+            "next_cursor": next_cursor,
         }
 
+    @staticmethod
+    def _next_cursor(
+        murais: List[dict], sort_keys: Sequence[str], limit: int
+    ) -> Optional[str]:
+        # Se a página veio cheia, pode haver mais resultados
+        if len(murais) < limit:
+            return None
+        last = murais[-1]
+        # O _id já foi renomeado para id pelo pipeline
+        return encode_cursor(
+            {key: last["id" if key == "_id" else key] for key in sort_keys}, sort_keys
+        )
+
     async def count_by_bairro(self, bairro: str) -> int:
         """Conta murais por bairro"""
-        pipeline = [
-            {
-                "$lookup": {
-                    "from": "locais",
-                    "localField": "local_id",
-                    "foreignField": "_id",
-                    "as": "local",
-                }
-            },
-            {"$unwind": {"path": "$local", "preserveNullAndEmptyArrays": True}},
-            {"$match": {"local.bairro": {"$regex": bairro, "$options": "i"}}},
-            {"$count": "total"},
-        ]
-
-        result = await self.collection.aggregate(pipeline).to_list(1)
-        return result[0]["total"] if result else 0
+        return await self.collection.count_documents({"bairro": normalize_text(bairro)})
 
     async def update_mural(self, id: str, mural_data: MuralUpdate) -> bool:
         """Atualiza um mural"""
         data = mural_data.dict(exclude_unset=True)
-        return await self.update(id, data)
-
-    async def get_top_artistas_by_murais(self, limit: int = 5) -> List[Dict[str, Any]]:
-        """Retorna top artistas com mais murais"""
-        pipeline = [
-            {"$unwind": "$artista_ids"},
-            {"$group": {"_id": "$artista_ids", "total_murais": {"$sum": 1}}},
-            {"$sort": {"total_murais": -1}},
-            {"$limit": limit},
-            {
-                "$lookup": {
-                    "from": "artistas",
-                    "localField": "_id",
-                    "foreignField": "_id",
-                    "as": "artista",
-                }
-            },
-            {"$unwind": "$artista"},
-            {
-                "$project": {
-                    "artista_id": {
-                        "$toString": "$_id"
-                    },  # Converter ObjectId para string
-                    "nome": "$artista.nome",
-                    "biografia": "$artista.biografia",
-                    "total_murais": 1,
-                    "_id": 0,  # Remover o campo _id do resultado
-                }
-            },
-        ]
 
-        cursor = self.collection.aggregate(pipeline)
-        result = await cursor.to_list(length=limit)
+        if "imagem_url" in data and data["imagem_url"]:
+            data["imagem_url"] = str(data["imagem_url"])
 
-        # Garantir que todos os ObjectIds sejam serializados
-        for item in result:
-            if "artista_id" in item and isinstance(item["artista_id"], ObjectId):
-                item["artista_id"] = str(item["artista_id"])
-
-        return result
+        local, artista_ids = await self._resolve_references(
+            data.get("local_id"), data.get("artista_ids")
+        )
+        if local:
+            data["local_id"] = local["_id"]
+            data.update(denormalized_fields(local))
+        if data.get("artista_ids") is not None:
+            data["artista_ids"] = artista_ids
+
+        if data.get("tags") is not None or "bairro" in data:
+            # Tags e bairro anteriores mantêm o autocompletar e stats_tag
+            previous = await self.update_and_get_previous(
+                id, data, {"tags": 1, "bairro": 1}
+            )
+            updated = previous is not None
+            if updated:
+                await self._update_tag_counts(previous, data)
+        else:
+            updated = await self.update(id, data)
+
+        if updated:
+            await self._invalidate_analytics(data)
+        return updated
+
+    async def delete(self, id: str) -> bool:
+        """Deleta um mural"""
+        deleted = await self.delete_and_get(id, {"tags": 1, "bairro": 1})
+        if deleted is None:
+            return False
+
+        autocomplete.remove(AutocompleteType.TAG, deleted.get("tags", []))
+        await self.tag_stats.apply(
+            tag_delta(deleted.get("tags"), deleted.get("bairro"), -1)
+        )
+        await self._invalidate_analytics()
+        # Mesma chave de get_media_por_mural (hex minúsculo do ObjectId)
+        analytics_cache.invalidate(("media_mural", str(deleted["_id"])))
+        return True
+
+    async def _update_tag_counts(self, previous: dict, changed: dict) -> None:
+        old_tags = previous.get("tags", [])
+        new_tags = changed["tags"] if changed.get("tags") is not None else old_tags
+        autocomplete.replace(AutocompleteType.TAG, old_tags, new_tags)
+
+        delta = tag_delta(old_tags, previous.get("bairro"), -1)
+        delta.update(tag_delta(new_tags, changed.get("bairro", previous.get("bairro"))))
+        await self.tag_stats.apply(delta)
+
+    async def get_tag_counts(
+        self, bairro: Optional[str] = None, limit: int = 50
+    ) -> List[Dict[str, Any]]:
+        """Tags mais usadas, a partir dos contadores mantidos em stats_tag"""
+        return await self.tag_stats.top(bairro, limit)
+
+    async def _invalidate_analytics(self, changed: Optional[dict] = None) -> None:
+        """Marca as estatísticas afetadas por uma escrita em murais"""
+        dirty = []
+        if changed is None or "artista_ids" in changed:
+            dirty.append("artista")
+        if changed is None or "local_id" in changed:
+            dirty.append("bairro")
+        if dirty:
+            await self.rollups.mark_dirty(*dirty)
+        if changed is None or "local_id" in changed or "tags" in changed:
+            analytics_cache.invalidate_prefix("bbox")
+
+    async def sync_local_fields(self, batch_size: int = 500) -> int:
+        """Recalcula os campos do local desnormalizados em todos os murais"""
+        updated = 0
+        operations = []
+
+        async for local in self.database.locais.find({}, LOCAL_PROJECTION):
+            operations.append(
+                UpdateMany(
+                    {"local_id": local["_id"]}, {"$set": denormalized_fields(local)}
+                )
+            )
+            if len(operations) >= batch_size:
+                result = await self.collection.bulk_write(operations, ordered=False)
+                updated += result.modified_count
+                operations = []
 
-    async def get_media_avaliacao_por_bairro(self) -> List[Dict[str, Any]]:
-        """Retorna média de avaliação por bairro"""
-        pipeline = [
-            {
-                "$lookup": {
-                    "from": "locais",
-                    "localField": "local_id",
-                    "foreignField": "_id",
-                    "as": "local",
-                }
-            },
-            {"$unwind": {"path": "$local", "preserveNullAndEmptyArrays": True}},
-            {
-                "$lookup": {
-                    "from": "avaliacoes",
-                    "localField": "_id",
-                    "foreignField": "mural_id",
-                    "as": "avaliacoes",
-                }
-            },
-            {"$unwind": {"path": "$avaliacoes", "preserveNullAndEmptyArrays": True}},
-            {
-                "$group": {
-                    "_id": "$local.bairro",
-                    "media_avaliacao": {"$avg": "$avaliacoes.nota"},
-                    "total_avaliacoes": {"$sum": 1},
-                }
-            },
-            {
-                "$project": {
-                    "bairro": "$_id",
-                    "media_avaliacao": {"$round": ["$media_avaliacao", 2]},
-                    "total_avaliacoes": 1,
-                    "_id": 0,  # Remover o campo _id
-                }
-            },
-            {"$sort": {"media_avaliacao": -1}},
-        ]
+        if operations:
+            result = await self.collection.bulk_write(operations, ordered=False)
+            updated += result.modified_count
 
-        cursor = self.collection.aggregate(pipeline)
-        return await cursor.to_list(length=None)
+        return updated
 
-    async def get_by_date_range(
-        self, start_date: datetime, end_date: datetime, page: int = 1, limit: int = 10
+    async def get_top_artistas_by_murais(
+        self, limit: int = 5, fresh: bool = False
     ) -> Dict[str, Any]:
-        """Filtrar murais por intervalo de datas"""
-        # Construir pipeline de agregação
-        pipeline = []
-
-        # Fazer lookup com a coleção de locais
-        pipeline.append(
-            {
-                "$lookup": {
-                    "from": "locais",
-                    "localField": "local_id",
-                    "foreignField": "_id",
-                    "as": "local",
-                }
+        """Retorna top artistas com mais murais"""
+        if fresh:
+            return {
+                "items": await self._compute_top_artistas(limit),
+                "atualizado_em": datetime.utcnow(),
             }
-        )
 
-        # Unwind para transformar array em objeto
-        pipeline.append(
-            {"$unwind": {"path": "$local", "preserveNullAndEmptyArrays": True}}
+        return await analytics_cache.get_or_compute(
+            ("top_artistas", limit), lambda: self._rollup_top_artistas(limit)
         )
 
-        # Filtro por data
-        pipeline.append(
-            {
-                "$match": {
-                    "data_criacao": {
-                        "$gte": start_date,
-                        "$lte": end_date,
-                    }
-                }
-            }
-        )
+    async def _rollup_top_artistas(self, limit: int) -> Dict[str, Any]:
+        result = await self.rollups.get_top_artistas(limit)
+        if result["atualizado_em"] is None and not await self.rollups.built("artista"):
+            # stats_artista ainda não foi construída (primeira inicialização)
+            return await self.get_top_artistas_by_murais(limit, fresh=True)
+        return result
 
-        # Adicionar paginação
-        pipeline.extend([{"$skip": (page - 1) * limit}, {"$limit": limit}])
+    async def _compute_top_artistas(self, limit: int) -> List[Dict[str, Any]]:
+        pipeline = top_artistas_pipeline(limit) + [{"$project": {"_id": 0}}]
+        cursor = self.collection.aggregate(pipeline)
+        return await cursor.to_list(length=limit)
 
-        # Executar agregação
-        murais = await self.collection.aggregate(pipeline).to_list(limit)
+    async def get_media_avaliacao_por_bairro(
+        self, fresh: bool = False
+    ) -> Dict[str, Any]:
+        """Retorna média de avaliação por bairro"""
+        if fresh:
+            return {
+                "items": await self._compute_media_avaliacao_por_bairro(),
+                "atualizado_em": datetime.utcnow(),
+            }
 
-        # Contar total (sem paginação)
-        count_pipeline = [
-            {
-                "$lookup": {
-                    "from": "locais",
-                    "localField": "local_id",
-                    "foreignField": "_id",
-                    "as": "local",
-                }
-            },
-            {"$unwind": {"path": "$local", "preserveNullAndEmptyArrays": True}},
-            {
-                "$match": {
-                    "data_criacao": {
-                        "$gte": start_date,
-                        "$lte": end_date,
-                    }
-                }
-            },
-            {"$count": "total"},
-        ]
+        return await analytics_cache.get_or_compute(
+            ("media_por_bairro",), self._rollup_media_por_bairro
+        )
 
-        total_result = await self.collection.aggregate(count_pipeline).to_list(1)
-        total = total_result[0]["total"] if total_result else 0
+    async def _rollup_media_por_bairro(self) -> Dict[str, Any]:
+        result = await self.rollups.get_media_por_bairro()
+        if result["atualizado_em"] is None and not await self.rollups.built("bairro"):
+            # stats_bairro ainda não foi construída (primeira inicialização)
+            return await self.get_media_avaliacao_por_bairro(fresh=True)
+        return result
 
-        # Serialize each mural
-        serialized_murais = [
-            self._serialize_mural_with_local(mural) for mural in murais
+    async def _compute_media_avaliacao_por_bairro(self) -> List[Dict[str, Any]]:
+        pipeline = media_por_bairro_pipeline() + [
+            {"$project": {"_id": 0}},
+            {"$sort": {"media_avaliacao": -1}},
         ]
+        cursor = self.collection.aggregate(pipeline)
+        return await cursor.to_list(length=None)
 
-        return {
-            "murais": serialized_murais,
-            "total": total,
-            "page": page,
-            "pages": (total + limit - 1) // limit if total > 0 else 0,
-            "periodo": {
-                "inicio": start_date.isoformat(),
-                "fim": end_date.isoformat(),
-            },
+    async def get_by_date_range(
+        self,
+        start_date: datetime,
+        end_date: datetime,
+        page: int = 1,
+        limit: int = 10,
+        cursor: Optional[str] = None,
+        count_mode: CountMode = CountMode.EXACT,
+    ) -> Dict[str, Any]:
+        """Filtrar murais por intervalo de datas"""
+        match_filters = {"data_criacao": {"$gte": start_date, "$lte": end_date}}
+        sort_keys = ("data_criacao", "_id")
+
+        if cursor is not None:
+            result = await self._list_keyset(match_filters, sort_keys, cursor, limit)
+        else:
+            result = await self._list_paginated(
+                match_filters, sort_keys, page, limit, count_mode
+            )
+
+        result["periodo"] = {
+            "inicio": start_date.isoformat(),
+            "fim": end_date.isoformat(),
         }
+        return result
 
     async def get_by_year(
-        self, year: int, page: int = 1, limit: int = 10
+        self,
+        year: int,
+        page: int = 1,
+        limit: int = 10,
+        cursor: Optional[str] = None,
+        count_mode: CountMode = CountMode.EXACT,
     ) -> Dict[str, Any]:
         """Filtrar murais por ano"""
         # Criar datas de início e fim do ano
         start_date = datetime(year, 1, 1)
         end_date = datetime(year, 12, 31, 23, 59, 59)
 
-        return await self.get_by_date_range(start_date, end_date, page, limit)
+        return await self.get_by_date_range(
+            start_date, end_date, page, limit, cursor, count_mode
+        )
 
     def _validar_local(self, local_data: dict) -> dict:
         """Valida os dados do local"""
@@ -331,108 +678,157 @@ class MuralService(BaseService):
 
     async def create(self, mural_data: dict) -> dict:
         """Criar mural com validação de relacionamentos"""
+        # Validar local e artistas com uma consulta por coleção
+        local, artista_ids = await self._resolve_references(
+            mural_data.get("local_id"), mural_data.get("artista_ids")
+        )
+        mural_data = self._prepare_document(mural_data, local, artista_ids)
+
+        # insert_one preenche o _id no próprio dicionário, dispensando a releitura
+        await self.collection.insert_one(mural_data)
+        await self.bump_generations()
+        autocomplete.add(AutocompleteType.TAG, mural_data.get("tags", []))
+        await self.tag_stats.apply(
+            tag_delta(mural_data.get("tags"), mural_data.get("bairro"))
+        )
+        await self._invalidate_analytics()
+
+        mural_data["id"] = mural_data.pop("_id")
+        return mural_data
+
+    def _prepare_document(
+        self, mural_data: dict, local: Optional[dict], artista_ids: List[ObjectId]
+    ) -> dict:
+        """Monta o documento de um novo mural a partir dos dados já validados"""
         # Converter HttpUrl para string se presente
         if "imagem_url" in mural_data and mural_data["imagem_url"]:
             mural_data["imagem_url"] = str(mural_data["imagem_url"])
 
-        # Validar se local existe
-        if "local_id" in mural_data and mural_data["local_id"]:
-            local_service = LocalService(self.database)
-            local = await local_service.get_by_id(mural_data["local_id"])
-            if not local:
-                raise ValueError(
-                    f"Local com ID {mural_data['local_id']} não encontrado"
-                )
-
-            # Converter para ObjectId
-            mural_data["local_id"] = ObjectId(mural_data["local_id"])
-
-        # Validar se artistas existem
-        if "artista_ids" in mural_data and mural_data["artista_ids"]:
-            artista_service = ArtistaService(self.database)
-            for artista_id in mural_data["artista_ids"]:
-                artista = await artista_service.get_by_id(artista_id)
-                if not artista:
-                    raise ValueError(f"Artista com ID {artista_id} não encontrado")
-
-            # Converter string IDs para ObjectId
-            mural_data["artista_ids"] = [
-                ObjectId(id) for id in mural_data["artista_ids"]
-            ]
+        if local:
+            mural_data["local_id"] = local["_id"]
+            mural_data.update(denormalized_fields(local))
+        if mural_data.get("artista_ids"):
+            mural_data["artista_ids"] = artista_ids
 
         mural_data["data_criacao"] = datetime.utcnow()
-        result = await self.collection.insert_one(mural_data)
-
-        created_mural = await self.collection.find_one({"_id": result.inserted_id})
-        return self._serialize_mural(created_mural)
-
-    def _serialize_mural(self, mural: dict) -> dict:
-        """Serializa um mural para o formato de resposta"""
-        if not mural:
-            return None
-
-        mural["id"] = str(mural["_id"])
-        del mural["_id"]
+        mural_data["resumo_avaliacoes"] = resumo_vazio()
+        return mural_data
+
+    async def _prepare_batch(self, batch):
+        """Valida as referências de um lote inteiro com um $in por coleção"""
+        errors = []
+        parsed = []
+        for line_number, item in batch:
+            data = item.dict()
+            try:
+                local_oid = self._parse_reference(data["local_id"], "Local")
+                artista_oids = [
+                    self._parse_reference(artista_id, "Artista")
+                    for artista_id in data["artista_ids"]
+                ]
+            except ValueError as e:
+                errors.append((line_number, str(e)))
+                continue
+            parsed.append((line_number, data, local_oid, artista_oids))
+
+        locais, artistas = await asyncio.gather(
+            self._find_by_ids(
+                self.database.locais,
+                [local_oid for _, _, local_oid, _ in parsed],
+                LOCAL_PROJECTION,
+            ),
+            self._find_by_ids(
+                self.database.artistas,
+                [oid for _, _, _, artista_oids in parsed for oid in artista_oids],
+                {"_id": 1},
+            ),
+        )
 
-        # Converter ObjectIds para strings
-        if "local_id" in mural and mural["local_id"]:
-            mural["local_id"] = str(mural["local_id"])
+        documents = []
+        for line_number, data, local_oid, artista_oids in parsed:
+            if local_oid not in locais:
+                errors.append(
+                    (line_number, f"Local com ID {data['local_id']} não encontrado")
+                )
+                continue
 
-        if "artista_ids" in mural and mural["artista_ids"]:
-            mural["artista_ids"] = [str(id) for id in mural["artista_ids"]]
+            missing = [
+                artista_id
+                for artista_id, oid in zip(data["artista_ids"], artista_oids)
+                if oid not in artistas
+            ]
+            if missing:
+                errors.append(
+                    (line_number, f"Artista com ID {missing[0]} não encontrado")
+                )
+                continue
 
-        return mural
+            documents.append(
+                (
+                    line_number,
+                    self._prepare_document(data, locais[local_oid], artista_oids),
+                )
+            )
+
+        return documents, errors
+
+    async def _after_bulk_insert(self, documents: List[dict]) -> None:
+        if documents:
+            delta = Counter()
+            for document in documents:
+                autocomplete.add(AutocompleteType.TAG, document.get("tags", []))
+                delta.update(tag_delta(document.get("tags"), document.get("bairro")))
+            await self.tag_stats.apply(delta)
+            await self._invalidate_analytics()
+
+    async def _resolve_references(
+        self, local_id: Optional[str], artista_ids: Optional[List[str]]
+    ) -> Tuple[Optional[dict], List[ObjectId]]:
+        """Valida local e artistas referenciados, consultando as duas coleções em paralelo"""
+        local_oid = self._parse_reference(local_id, "Local") if local_id else None
+        artista_oids = [
+            self._parse_reference(artista_id, "Artista")
+            for artista_id in artista_ids or []
+        ]
 
-    def _serialize_mural_with_local(self, mural: dict) -> dict:
-        """Serializa um mural com dados do local incluídos"""
-        if not mural:
-            return None
+        locais, artistas = await asyncio.gather(
+            self._find_by_ids(
+                self.database.locais,
+                [local_oid] if local_oid else [],
+                LOCAL_PROJECTION,
+            ),
+            self._find_by_ids(self.database.artistas, artista_oids, {"_id": 1}),
+        )
 
-        # Converter _id principal para string
-        mural["id"] = str(mural["_id"])
-        del mural["_id"]
+        if local_oid and local_oid not in locais:
+            raise ValueError(f"Local com ID {local_id} não encontrado")
 
-        # Converter ObjectIds para strings
-        if "local_id" in mural and mural["local_id"]:
-            mural["local_id"] = str(mural["local_id"])
+        for artista_id, artista_oid in zip(artista_ids or [], artista_oids):
+            if artista_oid not in artistas:
+                raise ValueError(f"Artista com ID {artista_id} não encontrado")
 
-        if "artista_ids" in mural and mural["artista_ids"]:
-            mural["artista_ids"] = [str(id) for id in mural["artista_ids"]]
+        return locais.get(local_oid), artista_oids
 
-        # Serializar dados do local se existir
-        if "local" in mural and mural["local"]:
-            local = mural["local"]
-            if "_id" in local:
-                local["id"] = str(local["_id"])
-                del local["_id"]
+    @staticmethod
+    async def _find_by_ids(
+        collection, ids: List[ObjectId], projection: dict
+    ) -> Dict[ObjectId, dict]:
+        """Busca vários documentos por _id com um único $in"""
+        if not ids:
+            return {}
+        cursor = collection.find({"_id": {"$in": list(set(ids))}}, projection)
+        return {doc["_id"]: doc async for doc in cursor}
 
-        return mural
+    @staticmethod
+    def _parse_reference(id: str, entidade: str) -> ObjectId:
+        return parse_object_id(id, f"{entidade} com ID {id} não encontrado")
 
     async def get_by_id(self, mural_id: str) -> dict:
         """Obter mural por ID com dados do local"""
-        try:
-            # Pipeline para fazer lookup com local
-            pipeline = [
-                {"$match": {"_id": ObjectId(mural_id)}},
-                {
-                    "$lookup": {
-                        "from": "locais",
-                        "localField": "local_id",
-                        "foreignField": "_id",
-                        "as": "local",
-                    }
-                },
-                {"$unwind": {"path": "$local", "preserveNullAndEmptyArrays": True}},
-            ]
-
-            result = await self.collection.aggregate(pipeline).to_list(1)
-
-            if not result:
-                return None
-
-            mural = result[0]
-            return self._serialize_mural_with_local(mural)
-
-        except Exception as e:
-            print(f"Erro ao buscar mural {mural_id}: {e}")
+        object_id = object_id_or_none(mural_id)
+        if object_id is None:
             return None
+
+        pipeline = [{"$match": {"_id": object_id}}, *LOOKUP_LOCAL]
+        result = await self.collection.aggregate(pipeline).to_list(1)
+        return result[0] if result else None
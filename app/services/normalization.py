@@ -0,0 +1,34 @@
+import re
+import unicodedata
+from typing import Iterable, Optional
+
+
+def normalize_text(value: Optional[str]) -> Optional[str]:
+    """Normaliza um texto para comparações por igualdade (sem acentos, espaços extras ou maiúsculas)"""
+    if value is None:
+        return None
+    decomposed = unicodedata.normalize("NFKD", value)
+    stripped = "".join(char for char in decomposed if not unicodedata.combining(char))
+    return " ".join(stripped.split()).casefold()
+
+
+def normalized_field(field: str) -> str:
+    """Nome do campo-sombra normalizado de um campo"""
+    return f"{field}_norm"
+
+
+def shadow_fields(document: dict, fields: Iterable[str]) -> dict:
+    """Campos-sombra normalizados dos campos presentes no documento"""
+    return {
+        normalized_field(field): normalize_text(document[field])
+        for field in fields
+        if document.get(field) is not None
+    }
+
+
+def prefix_filter(field: str, value: str) -> dict:
+    """Prefixo ancorado sobre o campo-sombra: vira uma varredura por intervalo no índice"""
+    normalized = normalize_text(value)
+    if not normalized:
+        raise ValueError("Termo de busca vazio")
+    return {normalized_field(field): {"$regex": "^" + re.escape(normalized)}}
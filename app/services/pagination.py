@@ -0,0 +1,46 @@
+import base64
+import binascii
+from datetime import datetime
+from typing import Any, Dict, Sequence
+
+from bson import ObjectId, json_util
+from bson.errors import BSONError
+
+# Tipo de cada chave de ordenação aceita em cursores; o valor decodificado vai
+# direto para o filtro, então operadores ({"$ne": null}) não podem passar
+CURSOR_VALUE_TYPES = {"_id": ObjectId, "data_criacao": datetime}
+
+
+def encode_cursor(document: dict, sort_keys: Sequence[str]) -> str:
+    """Gera um cursor opaco a partir das chaves de ordenação do último documento"""
+    values = {key: document[key] for key in sort_keys}
+    raw = json_util.dumps(values).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, sort_keys: Sequence[str]) -> Dict[str, Any]:
+    """Decodifica um cursor opaco, validando as chaves de ordenação esperadas"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json_util.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except (binascii.Error, ValueError, UnicodeError, BSONError, TypeError):
+        # Cursores adulterados podem trazer valores estendidos inválidos ({"$oid": "zz"})
+        raise ValueError("Cursor inválido")
+
+    if not isinstance(values, dict) or set(values) != set(sort_keys):
+        raise ValueError("Cursor inválido")
+    if not all(isinstance(values[key], CURSOR_VALUE_TYPES[key]) for key in sort_keys):
+        raise ValueError("Cursor inválido")
+
+    return values
+
+
+def seek_filter(after: Dict[str, Any], sort_keys: Sequence[str]) -> dict:
+    """Predicado de intervalo que posiciona a consulta após o cursor (ordem ascendente)"""
+    clauses = []
+    for i, key in enumerate(sort_keys):
+        clause = {prev: after[prev] for prev in sort_keys[:i]}
+        clause[key] = {"$gt": after[key]}
+        clauses.append(clause)
+
+    return clauses[0] if len(clauses) == 1 else {"$or": clauses}
@@ -0,0 +1,98 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Optional, Tuple
+
+import bcrypt
+
+from config.settings import settings
+
+# bcrypt considera só os primeiros 72 bytes; versões antigas truncavam sozinhas
+BCRYPT_MAX_BYTES = 72
+
+
+class PasswordHasherBusy(Exception):
+    """Fila de hashing de senhas cheia; a requisição deve ser recusada (503)"""
+
+
+def _encode(password: str) -> bytes:
+    return password.encode("utf-8")[:BCRYPT_MAX_BYTES]
+
+
+def hash_rounds(password_hash: str) -> int:
+    """Custo (log2 das rodadas) gravado em um hash bcrypt ($2b$12$...)"""
+    return int(password_hash.split("$")[2])
+
+
+class PasswordHasher:
+    """bcrypt em um pool de threads próprio e limitado.
+
+    O hashing leva centenas de milissegundos e bloquearia o event loop; as
+    chamadas além de max_pending (em execução + na fila) são recusadas.
+    """
+
+    def __init__(self, workers: int, max_pending: int, rounds: int):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.rounds = rounds
+        self._executor: Optional[ThreadPoolExecutor] = None
+        # Só alterado no event loop, dispensa lock
+        self._pending = 0
+        self._rejected = 0
+
+    async def _run(self, func, *args):
+        if self._pending >= self.max_pending:
+            self._rejected += 1
+            raise PasswordHasherBusy("Muitas requisições de autenticação")
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.workers, thread_name_prefix="bcrypt"
+            )
+
+        self._pending += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, func, *args)
+        finally:
+            self._pending -= 1
+
+    def _hash(self, password: str) -> str:
+        salt = bcrypt.gensalt(rounds=self.rounds)
+        return bcrypt.hashpw(_encode(password), salt).decode("ascii")
+
+    def _verify_and_update(
+        self, password: str, password_hash: str
+    ) -> Tuple[bool, Optional[str]]:
+        if not bcrypt.checkpw(_encode(password), password_hash.encode("ascii")):
+            return False, None
+        if hash_rounds(password_hash) != self.rounds:
+            return True, self._hash(password)
+        return True, None
+
+    async def hash(self, password: str) -> str:
+        return await self._run(self._hash, password)
+
+    async def verify_and_update(
+        self, password: str, password_hash: str
+    ) -> Tuple[bool, Optional[str]]:
+        """Verifica a senha; se o custo do hash mudou, devolve também um novo hash"""
+        return await self._run(self._verify_and_update, password, password_hash)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "em_andamento": self._pending,
+            "limite": self.max_pending,
+            "recusadas": self._rejected,
+            "custo": self.rounds,
+        }
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+password_hasher = PasswordHasher(
+    workers=settings.PASSWORD_HASH_WORKERS,
+    max_pending=settings.PASSWORD_HASH_MAX_PENDING,
+    rounds=settings.BCRYPT_ROUNDS,
+)
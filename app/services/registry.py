@@ -0,0 +1,57 @@
+from typing import Any, Dict
+
+from motor.motor_asyncio import AsyncIOMotorDatabase
+
+from .artista_service import ArtistaService
+from .autocomplete import autocomplete
+from .avaliacao_service import AvaliacaoService
+from .base import estimated_count_cache
+from .cache import analytics_cache
+from .generation import GenerationService
+from .local_service import LocalService
+from .mural_service import MuralService
+from .rollup_service import RollupService
+from .search_service import SearchService
+from .tag_stats import TagStatsService
+from .tokens import token_manager
+from .usuario_service import UsuarioService
+
+
+class ServiceRegistry:
+    """Instâncias dos serviços compartilhadas pela aplicação.
+
+    Criado uma vez no lifespan e guardado em app.state.services; os serviços
+    não guardam estado por requisição, só o banco e os handles das coleções.
+    """
+
+    def __init__(self, database: AsyncIOMotorDatabase):
+        self.database = database
+        # Colaboradores compartilhados, injetados nos construtores dos serviços
+        self.generations = GenerationService(database)
+        self.search = SearchService(database)
+        self.tag_stats = TagStatsService(database, self.generations)
+        self.rollups = RollupService(database, self.generations)
+
+        self.murais = MuralService(
+            database, self.generations, tag_stats=self.tag_stats, rollups=self.rollups
+        )
+        self.artistas = ArtistaService(
+            database, self.generations, search=self.search, rollups=self.rollups
+        )
+        self.locais = LocalService(
+            database, self.generations, tag_stats=self.tag_stats, rollups=self.rollups
+        )
+        self.usuarios = UsuarioService(database, self.generations)
+        self.avaliacoes = AvaliacaoService(
+            database, self.generations, rollups=self.rollups
+        )
+        self.tokens = token_manager
+
+    def stats(self) -> Dict[str, Any]:
+        """Estatísticas dos caches e contadores em memória do processo"""
+        return {
+            "analytics": analytics_cache.stats(),
+            "contagens": estimated_count_cache.stats(),
+            "autocompletar": autocomplete.stats(),
+            "tokens": self.tokens.stats(),
+        }
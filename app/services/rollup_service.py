@@ -0,0 +1,299 @@
+import asyncio
+import logging
+import os
+import socket
+import uuid
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import IndexModel
+from pymongo.errors import DuplicateKeyError
+
+from .cache import analytics_cache
+from .generation import GenerationService
+
+logger = logging.getLogger(__name__)
+
+ROLLUPS = ("bairro", "artista")
+# Prefixos do analytics_cache servidos a partir de cada rollup
+CACHE_PREFIXES = {"bairro": "media_por_bairro", "artista": "top_artistas"}
+# Documento de rollup_estado que elege o processo responsável pelas atualizações
+LEASE_ID = "lease"
+
+
+def media_por_bairro_pipeline() -> List[dict]:
+    """Agrupa os murais por bairro usando os resumos de avaliação mantidos em cada mural"""
+    # O lookup de locais é feito uma vez por bairro apenas para recuperar o nome original
+    return [
+        {
+            "$group": {
+                "_id": "$bairro",
+                "local_id": {"$first": "$local_id"},
+                "soma": {"$sum": "$resumo_avaliacoes.soma"},
+                "total_avaliacoes": {"$sum": "$resumo_avaliacoes.total"},
+                "total_murais": {"$sum": 1},
+            }
+        },
+        {
+            "$lookup": {
+                "from": "locais",
+                "localField": "local_id",
+                "foreignField": "_id",
+                "as": "local",
+            }
+        },
+        {
+            "$project": {
+                "bairro": {"$ifNull": [{"$arrayElemAt": ["$local.bairro", 0]}, "$_id"]},
+                "media_avaliacao": {
+                    "$cond": [
+                        {"$gt": ["$total_avaliacoes", 0]},
+                        {"$round": [{"$divide": ["$soma", "$total_avaliacoes"]}, 2]},
+                        None,
+                    ]
+                },
+                "total_avaliacoes": 1,
+                "total_murais": 1,
+            }
+        },
+    ]
+
+
+def top_artistas_pipeline(limit: Optional[int] = None) -> List[dict]:
+    """Conta murais por artista; com limite, o lookup ocorre apenas para o top N"""
+    pipeline = [
+        {"$unwind": "$artista_ids"},
+        {"$group": {"_id": "$artista_ids", "total_murais": {"$sum": 1}}},
+    ]
+    if limit is not None:
+        pipeline.extend([{"$sort": {"total_murais": -1}}, {"$limit": limit}])
+
+    pipeline.extend(
+        [
+            {
+                "$lookup": {
+                    "from": "artistas",
+                    "localField": "_id",
+                    "foreignField": "_id",
+                    "as": "artista",
+                }
+            },
+            {"$unwind": "$artista"},
+            {
+                "$project": {
+                    "artista_id": {"$toString": "$_id"},
+                    "nome": "$artista.nome",
+                    "biografia": "$artista.biografia",
+                    "total_murais": 1,
+                }
+            },
+        ]
+    )
+    return pipeline
+
+
+class RollupService:
+    """Coleções materializadas de estatísticas por bairro e por artista"""
+
+    INDEXES = {
+        "stats_bairro": (IndexModel([("media_avaliacao", -1)]),),
+        "stats_artista": (IndexModel([("total_murais", -1)]),),
+    }
+
+    def __init__(
+        self,
+        database: AsyncIOMotorDatabase,
+        generations: Optional[GenerationService] = None,
+    ):
+        self.database = database
+        self.stats_bairro = database["stats_bairro"]
+        self.stats_artista = database["stats_artista"]
+        # Por rollup: escritas pendentes (contador) e a última construção;
+        # compartilhado entre processos, ao contrário de uma marca em memória
+        self.estado = database["rollup_estado"]
+        self.generations = generations or GenerationService(database)
+
+    async def mark_dirty(self, *names: str) -> None:
+        """Registra escritas que desatualizam os rollups indicados"""
+        await asyncio.gather(
+            *[
+                self.estado.update_one(
+                    {"_id": name}, {"$inc": {"escritas": 1}}, upsert=True
+                )
+                for name in names
+            ]
+        )
+
+    async def states(self) -> Dict[str, dict]:
+        """Estado de cada rollup ({} para os nunca marcados nem construídos)"""
+        states = {name: {} for name in ROLLUPS}
+        async for document in self.estado.find({"_id": {"$in": list(ROLLUPS)}}):
+            states[document["_id"]] = document
+        return states
+
+    async def pending(self) -> List[str]:
+        """Rollups nunca construídos ou com escritas após a última construção"""
+        return [
+            name
+            for name, state in (await self.states()).items()
+            if "construido" not in state
+            or state["construido"] != state.get("escritas", 0)
+        ]
+
+    async def built(self, name: str) -> bool:
+        document = await self.estado.find_one(
+            {"_id": name, "atualizado_em": {"$exists": True}}, {"_id": 1}
+        )
+        return document is not None
+
+    async def acquire_lease(self, owner: str, ttl: float) -> bool:
+        """Obtém ou renova o lease de atualização; False se outro processo o detém"""
+        now = datetime.utcnow()
+        try:
+            await self.estado.update_one(
+                {
+                    "_id": LEASE_ID,
+                    "$or": [{"dono": owner}, {"expira_em": {"$lte": now}}],
+                },
+                {"$set": {"dono": owner, "expira_em": now + timedelta(seconds=ttl)}},
+                upsert=True,
+            )
+        except DuplicateKeyError:
+            # O lease existe, é de outro processo e ainda não expirou
+            return False
+        return True
+
+    async def release_lease(self, owner: str) -> None:
+        await self.estado.delete_one({"_id": LEASE_ID, "dono": owner})
+
+    async def refresh_bairro(self) -> datetime:
+        """Recalcula stats_bairro a partir dos murais"""
+        return await self._refresh(self.stats_bairro, media_por_bairro_pipeline())
+
+    async def refresh_artista(self) -> datetime:
+        """Recalcula stats_artista a partir dos murais"""
+        return await self._refresh(self.stats_artista, top_artistas_pipeline())
+
+    async def refresh(self, *names: str) -> None:
+        """Recalcula os rollups indicados (todos, se nenhum for informado)"""
+        for name in names or ROLLUPS:
+            # Escritas feitas durante a reconstrução ficam pendentes para a próxima
+            state = await self.estado.find_one({"_id": name}) or {}
+            if name == "bairro":
+                atualizado_em = await self.refresh_bairro()
+            elif name == "artista":
+                atualizado_em = await self.refresh_artista()
+            else:
+                continue
+            await self.estado.update_one(
+                {"_id": name},
+                {
+                    "$set": {
+                        "construido": state.get("escritas", 0),
+                        "atualizado_em": atualizado_em,
+                    }
+                },
+                upsert=True,
+            )
+            analytics_cache.invalidate_prefix(CACHE_PREFIXES[name])
+
+    async def _refresh(self, target, pipeline: List[dict]) -> datetime:
+        atualizado_em = datetime.utcnow()
+        pipeline = pipeline + [
+            {"$set": {"atualizado_em": atualizado_em}},
+            {
+                "$merge": {
+                    "into": target.name,
+                    "on": "_id",
+                    "whenMatched": "replace",
+                    "whenNotMatched": "insert",
+                }
+            },
+        ]
+        await self.database.murais.aggregate(pipeline).to_list(length=None)
+
+        # Grupos que deixaram de existir não foram tocados por esta execução
+        await target.delete_many({"atualizado_em": {"$lt": atualizado_em}})
+        await self.generations.bump(target.name)
+        return atualizado_em
+
+    async def get_media_por_bairro(self) -> Dict[str, Any]:
+        """Média de avaliação por bairro a partir de stats_bairro"""
+        cursor = self.stats_bairro.find({}, {"_id": 0}).sort("media_avaliacao", -1)
+        return self._with_timestamp(await cursor.to_list(length=None))
+
+    async def get_top_artistas(self, limit: int) -> Dict[str, Any]:
+        """Top artistas a partir de stats_artista"""
+        cursor = (
+            self.stats_artista.find({}, {"_id": 0})
+            .sort("total_murais", -1)
+            .limit(limit)
+        )
+        return self._with_timestamp(await cursor.to_list(length=limit))
+
+    @staticmethod
+    def _with_timestamp(items: List[dict]) -> Dict[str, Any]:
+        atualizado_em = min(
+            (item.pop("atualizado_em") for item in items if "atualizado_em" in item),
+            default=None,
+        )
+        return {"items": items, "atualizado_em": atualizado_em}
+
+
+class RollupScheduler:
+    """Atualiza periodicamente os rollups com escritas pendentes.
+
+    As marcas de escrita ficam em rollup_estado e um lease nessa coleção faz
+    com que só um processo (entre os workers do uvicorn) reconstrua os rollups;
+    os demais apenas descartam do cache local os rollups reconstruídos.
+    """
+
+    def __init__(self):
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._seen: Dict[str, Optional[datetime]] = {}
+        self._service: Optional[RollupService] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self, service: RollupService, interval: float) -> None:
+        if self._task is None:
+            self._service = service
+            self._task = asyncio.create_task(self._run(service, interval))
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+            try:
+                await self._service.release_lease(self.owner)
+            except Exception:
+                logger.exception("Erro ao liberar o lease de estatísticas")
+
+    async def run_once(self, service: RollupService, interval: float) -> None:
+        # O lease dura alguns intervalos: sobrevive a uma atualização lenta,
+        # mas expira logo se o processo responsável parar
+        if await service.acquire_lease(self.owner, interval * 3):
+            names = await service.pending()
+            if names:
+                await service.refresh(*names)
+
+        for name, state in (await service.states()).items():
+            atualizado_em = state.get("atualizado_em")
+            if name in self._seen and self._seen[name] != atualizado_em:
+                analytics_cache.invalidate_prefix(CACHE_PREFIXES[name])
+            self._seen[name] = atualizado_em
+
+    async def _run(self, service: RollupService, interval: float) -> None:
+        while True:
+            try:
+                await self.run_once(service, interval)
+            except Exception:
+                logger.exception("Erro ao atualizar estatísticas")
+            await asyncio.sleep(interval)
+
+
+rollup_scheduler = RollupScheduler()
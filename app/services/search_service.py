@@ -0,0 +1,158 @@
+import asyncio
+import math
+from enum import Enum
+from typing import Any, Dict, List, Optional, Sequence
+
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import IndexModel
+
+from config.settings import settings
+
+TEXT_SCORE = {"$meta": "textScore"}
+TEXT_INDEX_NAME = "busca_texto"
+
+
+class SearchType(str, Enum):
+    MURAL = "mural"
+    ARTISTA = "artista"
+    LOCAL = "local"
+
+
+# Coleção, pesos do índice de texto e campos devolvidos por tipo de resultado
+SEARCH_TYPES: Dict[SearchType, Dict[str, Any]] = {
+    SearchType.MURAL: {
+        "collection": "murais",
+        "weights": {"titulo": 10, "tags": 5, "descricao": 1},
+        "projection": {
+            "titulo": 1,
+            "descricao": 1,
+            "tags": 1,
+            "imagem_url": 1,
+            "local_id": 1,
+        },
+    },
+    SearchType.ARTISTA: {
+        "collection": "artistas",
+        "weights": {"nome": 10, "biografia": 1},
+        "projection": {"nome": 1, "biografia": 1, "site": 1},
+    },
+    SearchType.LOCAL: {
+        "collection": "locais",
+        "weights": {"nome": 10, "bairro": 5, "cidade": 5},
+        "projection": {
+            "nome": 1,
+            "bairro": 1,
+            "cidade": 1,
+            "latitude": 1,
+            "longitude": 1,
+        },
+    },
+}
+
+
+class SearchService:
+    """Busca textual em murais, artistas e locais ordenada por relevância"""
+
+    # Índices de texto (português, sem acentos), um por coleção pesquisada
+    INDEXES = {
+        spec["collection"]: (
+            IndexModel(
+                [(field, "text") for field in spec["weights"]],
+                weights=spec["weights"],
+                default_language="portuguese",
+                name=TEXT_INDEX_NAME,
+            ),
+        )
+        for spec in SEARCH_TYPES.values()
+    }
+
+    def __init__(self, database: AsyncIOMotorDatabase):
+        self.database = database
+
+    async def search(
+        self,
+        q: str,
+        tipos: Optional[Sequence[SearchType]] = None,
+        page: int = 1,
+        limit: int = 10,
+    ) -> Dict[str, Any]:
+        """Busca em todos os tipos (ou nos indicados), com facetas por tipo"""
+        q = self._validate_query(q)
+        tipos = list(dict.fromkeys(tipos or SearchType))
+
+        skip = (page - 1) * limit
+        if skip + limit > settings.SEARCH_MAX_RESULTS:
+            raise ValueError(
+                f"Busca limitada aos {settings.SEARCH_MAX_RESULTS} primeiros resultados"
+            )
+
+        # Cada coleção devolve apenas seus skip + limit melhores resultados;
+        # a página final sai da intercalação deles por relevância
+        resultados, contagens = await asyncio.gather(
+            asyncio.gather(*[self._top(tipo, q, skip + limit) for tipo in tipos]),
+            asyncio.gather(*[self._count(tipo, q) for tipo in tipos]),
+        )
+
+        items = sorted(
+            (item for itens in resultados for item in itens),
+            key=lambda item: item["score"],
+            reverse=True,
+        )[skip : skip + limit]
+
+        facets = {tipo.value: total for tipo, total in zip(tipos, contagens)}
+        total = sum(contagens)
+        return {
+            "items": items,
+            "facets": facets,
+            "total": total,
+            "page": page,
+            "limit": limit,
+            "pages": math.ceil(total / limit) if total else 0,
+        }
+
+    async def search_collection(
+        self,
+        tipo: SearchType,
+        q: str,
+        filters: Optional[dict] = None,
+        limit: int = 100,
+    ) -> List[dict]:
+        """Documentos completos de um tipo que casam com a busca, por relevância"""
+        q = self._validate_query(q)
+        collection = self.database[SEARCH_TYPES[tipo]["collection"]]
+        cursor = (
+            collection.find({"$text": {"$search": q}, **(filters or {})})
+            .sort([("score", TEXT_SCORE)])
+            .limit(limit)
+        )
+        return await cursor.to_list(length=limit)
+
+    async def _top(self, tipo: SearchType, q: str, limit: int) -> List[dict]:
+        spec = SEARCH_TYPES[tipo]
+        cursor = (
+            self.database[spec["collection"]]
+            .find(
+                {"$text": {"$search": q}},
+                {**spec["projection"], "score": TEXT_SCORE},
+            )
+            .sort([("score", TEXT_SCORE)])
+            .limit(limit)
+        )
+        documents = await cursor.to_list(length=limit)
+        return [self._serialize(tipo, doc) for doc in documents]
+
+    async def _count(self, tipo: SearchType, q: str) -> int:
+        collection = self.database[SEARCH_TYPES[tipo]["collection"]]
+        return await collection.count_documents({"$text": {"$search": q}})
+
+    @staticmethod
+    def _serialize(tipo: SearchType, doc: dict) -> dict:
+        doc["id"] = doc.pop("_id")
+        return {"tipo": tipo.value, **doc}
+
+    @staticmethod
+    def _validate_query(q: str) -> str:
+        q = " ".join(q.split())
+        if not q:
+            raise ValueError("Termo de busca vazio")
+        return q
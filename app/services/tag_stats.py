@@ -0,0 +1,126 @@
+from collections import Counter
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional
+
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import IndexModel, UpdateOne
+
+from .generation import GenerationService
+from .normalization import normalize_text
+
+
+def tag_delta(tags: Iterable[str], bairro: Optional[str], sign: int = 1) -> Counter:
+    """Variação dos contadores causada por um mural com estas tags neste bairro"""
+    # Chaves (tag, bairro); bairro None guarda o total geral da tag
+    delta = Counter()
+    for tag in set(tags or []):
+        delta[(tag, None)] += sign
+        if bairro:
+            delta[(tag, bairro)] += sign
+    return delta
+
+
+def _counter_id(tag: str, bairro: Optional[str]) -> dict:
+    return {"tag": tag, "bairro": bairro}
+
+
+class TagStatsService:
+    """Contadores de murais por tag (geral e por bairro) em stats_tag"""
+
+    INDEXES = {"stats_tag": (IndexModel([("bairro", 1), ("total", -1)]),)}
+
+    def __init__(
+        self,
+        database: AsyncIOMotorDatabase,
+        generations: Optional[GenerationService] = None,
+    ):
+        self.database = database
+        self.collection = database["stats_tag"]
+        self.generations = generations or GenerationService(database)
+
+    async def apply(self, delta: Counter) -> None:
+        """Aplica variações com $inc em upsert, removendo contadores zerados"""
+        operations = [
+            UpdateOne(
+                {"_id": _counter_id(tag, bairro)},
+                {"$inc": {"total": value}, "$set": {"tag": tag, "bairro": bairro}},
+                upsert=True,
+            )
+            for (tag, bairro), value in delta.items()
+            if value
+        ]
+        if not operations:
+            return
+
+        await self.collection.bulk_write(operations, ordered=False)
+        if any(value < 0 for value in delta.values()):
+            await self.collection.delete_many({"total": {"$lte": 0}})
+        await self.generations.bump(self.collection.name)
+
+    async def top(
+        self, bairro: Optional[str] = None, limit: int = 50
+    ) -> List[Dict[str, Any]]:
+        """Tags mais usadas, no geral ou em um bairro"""
+        cursor = (
+            self.collection.find(
+                {"bairro": normalize_text(bairro) if bairro else None},
+                {"_id": 0, "tag": 1, "total": 1},
+            )
+            .sort("total", -1)
+            .limit(limit)
+        )
+        return await cursor.to_list(length=limit)
+
+    async def rebuild(self) -> int:
+        """Recalcula todos os contadores a partir dos murais"""
+        atualizado_em = datetime.utcnow()
+
+        # Primeiro os totais gerais (bairro None), depois os por bairro
+        for bairro_expr in (None, "$bairro"):
+            pipeline = [
+                {"$unwind": "$tags"},
+                # Tags repetidas no mesmo mural contam uma vez
+                {
+                    "$group": {
+                        "_id": {"mural": "$_id", "tag": "$tags", "b": bairro_expr}
+                    }
+                },
+                {
+                    "$group": {
+                        "_id": {
+                            "tag": "$_id.tag",
+                            "bairro": {"$ifNull": ["$_id.b", None]},
+                        },
+                        "total": {"$sum": 1},
+                    }
+                },
+            ]
+            if bairro_expr:
+                pipeline.append({"$match": {"_id.bairro": {"$ne": None}}})
+            pipeline += [
+                {
+                    "$set": {
+                        "tag": "$_id.tag",
+                        "bairro": "$_id.bairro",
+                        "atualizado_em": atualizado_em,
+                    }
+                },
+                {
+                    "$merge": {
+                        "into": self.collection.name,
+                        "on": "_id",
+                        "whenMatched": "replace",
+                        "whenNotMatched": "insert",
+                    }
+                },
+            ]
+            await self.database.murais.aggregate(pipeline).to_list(length=None)
+
+        await self._delete_stale(atualizado_em)
+        await self.generations.bump(self.collection.name)
+        return await self.collection.count_documents({"bairro": None})
+
+    async def _delete_stale(self, atualizado_em: datetime) -> None:
+        """Remove os contadores que a reconstrução não regravou"""
+        # Contadores criados por apply() não têm atualizado_em: $ne os inclui
+        await self.collection.delete_many({"atualizado_em": {"$ne": atualizado_em}})
@@ -0,0 +1,172 @@
+import asyncio
+import logging
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from enum import Enum
+from typing import Any, Dict, Optional, Set
+
+from jose import JWTError, jwt
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import IndexModel
+
+from config.settings import settings
+from .cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+# HS256 com chave curta é vulnerável a força bruta; valores publicados (o antigo
+# exemplo do .env.example) permitiriam a qualquer um forjar tokens
+JWT_SECRET_MIN_LENGTH = 32
+INSECURE_SECRET_KEYS = frozenset({"troque-esta-chave"})
+
+
+class TokenType(str, Enum):
+    ACCESS = "access"
+    REFRESH = "refresh"
+
+
+class InvalidToken(Exception):
+    """Token malformado, expirado, de outro tipo ou revogado"""
+
+
+class TokenManager:
+    """Emissão e verificação de JWTs de acesso e de renovação.
+
+    A verificação é feita no processo, sem consulta ao banco: claims já
+    decodificados ficam em um LRU e os tokens revogados (logout, renovação)
+    são gravados no MongoDB e recarregados periodicamente.
+    """
+
+    # Revogações expiram junto com o token (índice TTL)
+    INDEXES = {"tokens_revogados": (IndexModel("expira_em", expireAfterSeconds=0),)}
+
+    def __init__(self):
+        self._claims = TTLCache(
+            maxsize=settings.TOKEN_CACHE_MAXSIZE,
+            ttl=settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60,
+        )
+        self._revoked: Set[str] = set()
+        self._task: Optional[asyncio.Task] = None
+
+    def check_secret_key(self) -> None:
+        """Recusa iniciar sem uma chave de assinatura própria e longa o bastante"""
+        key = settings.JWT_SECRET_KEY
+        if not key:
+            raise RuntimeError("JWT_SECRET_KEY não definida")
+        if key in INSECURE_SECRET_KEYS:
+            raise RuntimeError(
+                "JWT_SECRET_KEY ainda é o valor de exemplo; gere uma chave própria"
+            )
+        if len(key) < JWT_SECRET_MIN_LENGTH:
+            raise RuntimeError(
+                f"JWT_SECRET_KEY deve ter pelo menos {JWT_SECRET_MIN_LENGTH} caracteres"
+            )
+
+    def issue(self, subject: str) -> Dict[str, Any]:
+        """Par de tokens (acesso e renovação) para o usuário"""
+        access_ttl = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+        refresh_ttl = timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
+        return {
+            "access_token": self._encode(subject, TokenType.ACCESS, access_ttl),
+            "refresh_token": self._encode(subject, TokenType.REFRESH, refresh_ttl),
+            "token_type": "bearer",
+            "expires_in": int(access_ttl.total_seconds()),
+        }
+
+    def _encode(self, subject: str, token_type: TokenType, ttl: timedelta) -> str:
+        now = datetime.now(timezone.utc)
+        claims = {
+            "sub": subject,
+            "type": token_type.value,
+            "jti": uuid.uuid4().hex,
+            "iat": now,
+            "exp": now + ttl,
+        }
+        return jwt.encode(
+            claims, settings.JWT_SECRET_KEY, algorithm=settings.JWT_ALGORITHM
+        )
+
+    def verify(
+        self, token: str, token_type: TokenType = TokenType.ACCESS
+    ) -> Dict[str, Any]:
+        """Claims de um token válido; InvalidToken caso contrário"""
+        claims = self._claims.get(token)
+        if claims is None:
+            try:
+                claims = jwt.decode(
+                    token, settings.JWT_SECRET_KEY, algorithms=[settings.JWT_ALGORITHM]
+                )
+            except JWTError as e:
+                raise InvalidToken("Token inválido ou expirado") from e
+            self._claims.set(token, claims)
+        elif claims["exp"] <= time.time():
+            self._claims.invalidate(token)
+            raise InvalidToken("Token inválido ou expirado")
+
+        if claims.get("type") != token_type.value:
+            raise InvalidToken("Tipo de token inválido")
+        if claims.get("jti") in self._revoked:
+            raise InvalidToken("Token revogado")
+        return claims
+
+    async def revoke(self, database: AsyncIOMotorDatabase, claims: dict) -> bool:
+        """Revoga um token; False se ele já estava revogado"""
+        self._revoked.add(claims["jti"])
+        result = await database.tokens_revogados.update_one(
+            {"_id": claims["jti"]},
+            {
+                "$setOnInsert": {
+                    "expira_em": datetime.fromtimestamp(claims["exp"], timezone.utc)
+                }
+            },
+            upsert=True,
+        )
+        return result.upserted_id is not None
+
+    async def refresh(
+        self, database: AsyncIOMotorDatabase, refresh_token: str
+    ) -> Dict[str, Any]:
+        """Troca um token de renovação por um novo par, invalidando o anterior"""
+        claims = self.verify(refresh_token, TokenType.REFRESH)
+        # A revogação no banco é atômica: um token de renovação vale uma vez,
+        # mesmo que outro processo ainda não tenha recarregado a lista
+        if not await self.revoke(database, claims):
+            raise InvalidToken("Token revogado")
+        return self.issue(claims["sub"])
+
+    async def load_revoked(self, database: AsyncIOMotorDatabase) -> None:
+        cursor = database.tokens_revogados.find(
+            {"expira_em": {"$gt": datetime.now(timezone.utc)}}, {"_id": 1}
+        )
+        self._revoked = {document["_id"] async for document in cursor}
+
+    def stats(self) -> Dict[str, int]:
+        stats = self._claims.stats()
+        stats["revogados"] = len(self._revoked)
+        return stats
+
+    def start(self, database: AsyncIOMotorDatabase, interval: float) -> None:
+        """Recarrega periodicamente as revogações feitas por outros processos"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(database, interval))
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self, database: AsyncIOMotorDatabase, interval: float) -> None:
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.load_revoked(database)
+            except Exception:
+                logger.exception("Erro ao recarregar tokens revogados")
+
+
+token_manager = TokenManager()
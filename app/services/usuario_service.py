@@ -1,14 +1,25 @@
 from datetime import datetime
+from typing import Optional
 
-from models.usuario import Usuario, UsuarioCreate, UsuarioUpdate
+from models.common import object_id_or_none
+from models.usuario import UsuarioCreate, UsuarioUpdate
 from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import IndexModel
 
 from .base import BaseService
+from .generation import GenerationService
+from .passwords import password_hasher
 
 
 class UsuarioService(BaseService):
-    def __init__(self, database: AsyncIOMotorDatabase):
-        super().__init__(database, "usuarios")
+    INDEXES = {"usuarios": (IndexModel("email", unique=True),)}
+
+    def __init__(
+        self,
+        database: AsyncIOMotorDatabase,
+        generations: Optional[GenerationService] = None,
+    ):
+        super().__init__(database, "usuarios", generations)
 
     async def create_usuario(self, usuario_data: UsuarioCreate) -> str:
         """Cria um novo usuário"""
@@ -17,16 +28,35 @@ class UsuarioService(BaseService):
             raise ValueError("Email já cadastrado")
 
         data = usuario_data.dict(exclude={"senha"})
-        data["senha_hash"] = Usuario.hash_password(usuario_data.senha)
+        data["senha_hash"] = await password_hasher.hash(usuario_data.senha)
         data["data_cadastro"] = datetime.utcnow()
 
         return await self.create(data)
 
     async def get_by_email(self, email: str):
         """Busca usuário por email"""
-        document = await self.collection.find_one({"email": email})
-        if document:
-            document["_id"] = str(document["_id"])
+        return await self.collection.find_one({"email": email})
+
+    async def authenticate(self, email: str, senha: str):
+        """Usuário com este email e senha, ou None"""
+        document = await self.get_by_email(email)
+        if not document:
+            return None
+
+        valid, new_hash = await password_hasher.verify_and_update(
+            senha, document["senha_hash"]
+        )
+        if not valid:
+            return None
+        if new_hash:
+            # BCRYPT_ROUNDS mudou: regrava o hash com o custo atual
+            await self.collection.update_one(
+                {
+                    "_id": document["_id"],
+                    "senha_hash": document["senha_hash"],
+                },
+                {"$set": {"senha_hash": new_hash}},
+            )
         return document
 
     async def update_usuario(self, id: str, usuario_data: UsuarioUpdate) -> bool:
@@ -35,7 +65,7 @@ class UsuarioService(BaseService):
 
         if "email" in data:
             existing = await self.collection.find_one(
-                {"email": data["email"], "_id": {"$ne": id}}
+                {"email": data["email"], "_id": {"$ne": object_id_or_none(id)}}
             )
             if existing:
                 raise ValueError("Email já cadastrado")
@@ -0,0 +1,102 @@
+"""Avaliações criadas por segundo via POST /avaliacoes.
+
+Uso, com a API rodando e murais cadastrados:
+
+    python benchmarks/escrita_avaliacoes.py --usuarios 50 -c 16
+
+Cadastra --usuarios usuários descartáveis, faz login de cada um e envia uma
+avaliação por par (usuário, mural) para os murais da primeira página de
+/murais, com -c threads. Ao final repete alguns pares para medir as
+respostas 409 (avaliação duplicada).
+"""
+
+import argparse
+import json
+import time
+import urllib.error
+import urllib.request
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def request(url, body=None, token=None):
+    headers = {"Content-Type": "application/json"}
+    if token:
+        headers["Authorization"] = f"Bearer {token}"
+    data = json.dumps(body).encode() if body is not None else None
+    try:
+        with urllib.request.urlopen(
+            urllib.request.Request(url, data=data, headers=headers)
+        ) as response:
+            return response.status, json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        return e.code, None
+
+
+def create_user(url):
+    email = f"bench-{uuid.uuid4().hex[:12]}@example.com"
+    request(
+        f"{url}/usuarios/", {"nome": "Benchmark", "email": email, "senha": "segredo"}
+    )
+    status, body = request(
+        f"{url}/usuarios/login", {"email": email, "senha": "segredo"}
+    )
+    if status != 200:
+        raise SystemExit(f"login falhou ({status})")
+    return body["access_token"]
+
+
+def rate(url, token, mural_id):
+    start = time.perf_counter()
+    status, _ = request(f"{url}/avaliacoes/", {"mural_id": mural_id, "nota": 4}, token)
+    return status, (time.perf_counter() - start) * 1000
+
+
+def run(url, pairs, concurrency):
+    statuses = {}
+    latencies = []
+    start = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as executor:
+        for status, latency in executor.map(lambda pair: rate(url, *pair), pairs):
+            statuses[status] = statuses.get(status, 0) + 1
+            latencies.append(latency)
+    elapsed = time.perf_counter() - start
+    print(
+        f"{len(pairs) / elapsed:>10.0f} {percentile(latencies, 0.5):>8.2f} "
+        f"{percentile(latencies, 0.99):>8.2f}   {statuses}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--usuarios", type=int, default=50)
+    parser.add_argument("-c", "--concurrency", type=int, default=16)
+    args = parser.parse_args()
+
+    _, page = request(f"{args.url}/murais/?limit=100&count=none")
+    mural_ids = [mural["id"] for mural in page["murais"]]
+    if not mural_ids:
+        raise SystemExit("nenhum mural cadastrado")
+
+    with ThreadPoolExecutor(args.concurrency) as executor:
+        tokens = list(
+            executor.map(lambda _: create_user(args.url), range(args.usuarios))
+        )
+
+    pairs = [(token, mural_id) for token in tokens for mural_id in mural_ids]
+    print(f"{len(pairs)} avaliações, {args.concurrency} threads")
+    print(f"{'escritas/s':>10} {'p50 ms':>8} {'p99 ms':>8}   status")
+    run(args.url, pairs, args.concurrency)
+    # Pares repetidos: barrados pelo índice único com 409
+    run(args.url, pairs[: len(pairs) // 10 or 1], args.concurrency)
+
+
+if __name__ == "__main__":
+    main()
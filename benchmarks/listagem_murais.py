@@ -0,0 +1,136 @@
+"""Latência (p50/p99) e bytes trafegados de uma página de 100 murais.
+
+Uso, com a API rodando:
+
+    python benchmarks/listagem_murais.py --url http://localhost:8000 -n 200
+
+Compara a mesma página sem compressão, com gzip e com brotli. Com --render,
+mede também apenas a serialização de uma página sintética: encoder padrão do
+FastAPI (jsonable_encoder + json) contra o MongoJSONResponse (orjson).
+"""
+
+import argparse
+import sys
+import time
+import urllib.request
+from datetime import datetime
+from pathlib import Path
+
+ENCODINGS = ("identity", "gzip", "br")
+
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def bench_http(url, requests):
+    print(f"GET {url}")
+    print(f"{'encoding':<10} {'p50 ms':>8} {'p99 ms':>8} {'bytes':>10}")
+    for encoding in ENCODINGS:
+        latencies = []
+        size = 0
+        for _ in range(requests):
+            request = urllib.request.Request(url, headers={"Accept-Encoding": encoding})
+            start = time.perf_counter()
+            with urllib.request.urlopen(request) as response:
+                size = len(response.read())
+            latencies.append((time.perf_counter() - start) * 1000)
+        print(
+            f"{encoding:<10} {percentile(latencies, 0.5):>8.2f} "
+            f"{percentile(latencies, 0.99):>8.2f} {size:>10}"
+        )
+
+
+def sample_page(size=100):
+    from bson import ObjectId
+
+    murais = []
+    for i in range(size):
+        local_id = ObjectId()
+        murais.append(
+            {
+                "id": ObjectId(),
+                "titulo": f"Mural {i}",
+                "descricao": "Painel em muro de escola pública " * 8,
+                "imagem_url": f"https://example.com/murais/{i}.jpg",
+                "tags": ["grafite", "muralismo", "centro"],
+                "local_id": local_id,
+                "artista_ids": [ObjectId(), ObjectId()],
+                "data_criacao": datetime.utcnow(),
+                "resumo_avaliacoes": {"total": 12, "soma": 50},
+                "local": {
+                    "id": local_id,
+                    "nome": "Praça",
+                    "bairro": "Centro",
+                    "cidade": "Fortaleza",
+                    "latitude": -3.73,
+                    "longitude": -38.52,
+                },
+            }
+        )
+    return {"murais": murais, "total": 10000, "page": 1, "pages": 100}
+
+
+def stringify(page):
+    """Conversão prévia que o encoder padrão exige (ObjectId -> str)"""
+    from bson import ObjectId
+
+    def convert(value):
+        if isinstance(value, ObjectId):
+            return str(value)
+        if isinstance(value, dict):
+            return {key: convert(item) for key, item in value.items()}
+        if isinstance(value, list):
+            return [convert(item) for item in value]
+        return value
+
+    return convert(page)
+
+
+def bench_render(rounds):
+    sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "app"))
+    from fastapi.encoders import jsonable_encoder
+    from fastapi.responses import JSONResponse
+
+    from routes.responses import MongoJSONResponse
+
+    page = sample_page()
+
+    def default_encoder():
+        return JSONResponse(jsonable_encoder(stringify(page))).body
+
+    def orjson_encoder():
+        return MongoJSONResponse(page).body
+
+    print(f"\nSerialização de 100 murais ({rounds} rodadas)")
+    print(f"{'encoder':<10} {'p50 ms':>8} {'p99 ms':>8} {'bytes':>10}")
+    for name, render in (("padrao", default_encoder), ("orjson", orjson_encoder)):
+        timings = []
+        for _ in range(rounds):
+            start = time.perf_counter()
+            body = render()
+            timings.append((time.perf_counter() - start) * 1000)
+        print(
+            f"{name:<10} {percentile(timings, 0.5):>8.3f} "
+            f"{percentile(timings, 0.99):>8.3f} {len(body):>10}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("-n", "--requests", type=int, default=200)
+    parser.add_argument("--render", action="store_true")
+    parser.add_argument("--sem-http", action="store_true")
+    args = parser.parse_args()
+
+    if not args.sem_http:
+        bench_http(f"{args.url}/murais/?limit=100&count=none", args.requests)
+    if args.render:
+        bench_render(args.requests)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+"""Latência de /murais/{id} durante uma rajada de logins.
+
+Uso, com a API rodando e um usuário cadastrado:
+
+    python benchmarks/login_concorrente.py --mural-id <id> \\
+        --email ana@example.com --senha segredo -c 32 -d 10
+
+Mede p50/p99 de /murais/{id} sem carga e depois com -c threads fazendo login
+sem parar; informa também quantos logins foram recusados com 503. Com
+--sem-http, mede em processo o atraso do event loop enquanto verificações
+bcrypt rodam no próprio loop (como antes) e no PasswordHasher.
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def report(name, latencies):
+    print(
+        f"{name:<24} {percentile(latencies, 0.5):>8.2f} "
+        f"{percentile(latencies, 0.99):>8.2f} {len(latencies):>8}"
+    )
+
+
+def probe(url, duration):
+    latencies = []
+    deadline = time.perf_counter() + duration
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        with urllib.request.urlopen(url) as response:
+            response.read()
+        latencies.append((time.perf_counter() - start) * 1000)
+    return latencies
+
+
+def login_storm(url, email, senha, stop, counts):
+    body = json.dumps({"email": email, "senha": senha}).encode()
+    while not stop.is_set():
+        request = urllib.request.Request(
+            url, data=body, headers={"Content-Type": "application/json"}
+        )
+        try:
+            with urllib.request.urlopen(request) as response:
+                response.read()
+            counts["ok"] += 1
+        except urllib.error.HTTPError as e:
+            counts[e.code] = counts.get(e.code, 0) + 1
+
+
+def bench_http(args):
+    mural_url = f"{args.url}/murais/{args.mural_id}"
+    print(f"{'':<24} {'p50 ms':>8} {'p99 ms':>8} {'amostras':>8}")
+    report("sem logins", probe(mural_url, args.duration))
+
+    stop = threading.Event()
+    counts = {"ok": 0}
+    with ThreadPoolExecutor(args.concurrency) as executor:
+        for _ in range(args.concurrency):
+            executor.submit(
+                login_storm,
+                f"{args.url}/usuarios/login",
+                args.email,
+                args.senha,
+                stop,
+                counts,
+            )
+        try:
+            report(
+                f"{args.concurrency} logins simultâneos",
+                probe(mural_url, args.duration),
+            )
+        finally:
+            stop.set()
+    print(f"logins: {counts}")
+
+
+async def loop_lag(duration, interval=0.005):
+    """Atraso (ms) do event loop em acordar de um sleep curto"""
+    lags = []
+    deadline = time.perf_counter() + duration
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        lags.append((time.perf_counter() - start - interval) * 1000)
+    return lags
+
+
+async def bench_loop(concurrency, duration, rounds):
+    sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "app"))
+    import bcrypt
+
+    from services.passwords import PasswordHasher, PasswordHasherBusy
+
+    hasher = PasswordHasher(workers=4, max_pending=concurrency, rounds=rounds)
+    password_hash = await hasher.hash("segredo")
+    stop = asyncio.Event()
+
+    async def inline():
+        while not stop.is_set():
+            bcrypt.checkpw(b"segredo", password_hash.encode())
+            await asyncio.sleep(0)
+
+    async def offloaded():
+        while not stop.is_set():
+            try:
+                await hasher.verify_and_update("segredo", password_hash)
+            except PasswordHasherBusy:
+                await asyncio.sleep(0.01)
+
+    print(f"{'':<24} {'p50 ms':>8} {'p99 ms':>8} {'amostras':>8}")
+    report("sem logins", await loop_lag(duration))
+    for name, worker in (
+        ("bcrypt no event loop", inline),
+        ("PasswordHasher", offloaded),
+    ):
+        stop.clear()
+        tasks = [asyncio.create_task(worker()) for _ in range(concurrency)]
+        report(name, await loop_lag(duration))
+        stop.set()
+        await asyncio.gather(*tasks)
+    hasher.shutdown()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--mural-id")
+    parser.add_argument("--email")
+    parser.add_argument("--senha")
+    parser.add_argument("-c", "--concurrency", type=int, default=32)
+    parser.add_argument("-d", "--duration", type=float, default=10.0)
+    parser.add_argument("--rounds", type=int, default=12)
+    parser.add_argument("--sem-http", action="store_true")
+    args = parser.parse_args()
+
+    if args.sem_http:
+        asyncio.run(bench_loop(args.concurrency, args.duration, args.rounds))
+        return
+    if not (args.mural_id and args.email and args.senha):
+        parser.error("--mural-id, --email e --senha são obrigatórios")
+    bench_http(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+"""Requisições por segundo em /health e /murais/{id}.
+
+Uso, com a API rodando (repita na versão anterior para comparar):
+
+    python benchmarks/requisicoes_por_segundo.py --mural-id <id> -c 16 -d 10
+
+Com --asgi, mede em processo, sem servidor nem MongoDB, apenas o custo da
+pilha de middlewares em uma rota trivial: o antigo ErrorHandlerMiddleware
+(BaseHTTPMiddleware, reproduzido aqui) contra os exception handlers e
+middlewares ASGI puros atuais.
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def report(name, latencies, elapsed):
+    print(
+        f"{name:<24} {len(latencies) / elapsed:>10.0f} "
+        f"{percentile(latencies, 0.5):>8.2f} {percentile(latencies, 0.99):>8.2f}"
+    )
+
+
+def bench_http(url, concurrency, duration):
+    deadline = time.perf_counter() + duration
+
+    def worker():
+        latencies = []
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            with urllib.request.urlopen(url) as response:
+                response.read()
+            latencies.append((time.perf_counter() - start) * 1000)
+        return latencies
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as executor:
+        results = [executor.submit(worker) for _ in range(concurrency)]
+        latencies = [value for result in results for value in result.result()]
+    return latencies, time.perf_counter() - start
+
+
+def build_apps():
+    sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "app"))
+    from fastapi import FastAPI, Request
+    from fastapi.middleware.cors import CORSMiddleware
+    from fastapi.responses import JSONResponse
+    from starlette.middleware.base import BaseHTTPMiddleware
+
+    from middleware.compression import CompressionMiddleware
+    from middleware.error_handler import register_exception_handlers
+    from middleware.timing import TimingMiddleware
+
+    class LegacyErrorHandler(BaseHTTPMiddleware):
+        async def dispatch(self, request: Request, call_next):
+            try:
+                return await call_next(request)
+            except ValueError as e:
+                return JSONResponse(status_code=400, content={"detail": str(e)})
+            except Exception:
+                return JSONResponse(
+                    status_code=500, content={"detail": "Erro interno do servidor"}
+                )
+
+    def base_app():
+        app = FastAPI()
+
+        @app.get("/health")
+        async def health_check():
+            return {"status": "healthy"}
+
+        app.add_middleware(CORSMiddleware, allow_origins=["*"])
+        return app
+
+    legacy = base_app()
+    legacy.add_middleware(LegacyErrorHandler)
+    legacy.add_middleware(CompressionMiddleware)
+
+    current = base_app()
+    register_exception_handlers(current)
+    current.add_middleware(CompressionMiddleware)
+    current.add_middleware(TimingMiddleware)
+    return {"BaseHTTPMiddleware": legacy, "ASGI puro": current}
+
+
+async def call(app, path):
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": b"",
+        "root_path": "",
+        "headers": [(b"host", b"bench")],
+        "client": ("127.0.0.1", 0),
+        "server": ("bench", 80),
+    }
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        pass
+
+    await app(scope, receive, send)
+
+
+async def bench_asgi(app, requests, concurrency):
+    latencies = []
+
+    async def worker(count):
+        for _ in range(count):
+            start = time.perf_counter()
+            await call(app, "/health")
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    # Aquecimento (montagem da pilha de middlewares na primeira chamada)
+    await call(app, "/health")
+    start = time.perf_counter()
+    await asyncio.gather(*[worker(requests // concurrency) for _ in range(concurrency)])
+    return latencies, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--mural-id")
+    parser.add_argument("-c", "--concurrency", type=int, default=16)
+    parser.add_argument("-d", "--duration", type=float, default=10.0)
+    parser.add_argument("-n", "--requests", type=int, default=20000)
+    parser.add_argument("--asgi", action="store_true")
+    args = parser.parse_args()
+
+    print(f"{'':<24} {'req/s':>10} {'p50 ms':>8} {'p99 ms':>8}")
+    if args.asgi:
+        for name, app in build_apps().items():
+            latencies, elapsed = asyncio.run(
+                bench_asgi(app, args.requests, args.concurrency)
+            )
+            report(name, latencies, elapsed)
+        return
+
+    paths = ["/health"]
+    if args.mural_id:
+        paths.append(f"/murais/{args.mural_id}")
+    for path in paths:
+        latencies, elapsed = bench_http(
+            f"{args.url}{path}", args.concurrency, args.duration
+        )
+        report(path, latencies, elapsed)
+
+
+if __name__ == "__main__":
+    main()
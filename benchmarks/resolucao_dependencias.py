@@ -0,0 +1,143 @@
+"""Custo da resolução de dependências: serviço por requisição contra registro.
+
+Uso (em processo, sem servidor nem MongoDB):
+
+    python benchmarks/resolucao_dependencias.py -n 20000 -c 16
+
+Mede primeiro só a obtenção do serviço (construir MuralService a cada
+chamada contra ler o atributo do ServiceRegistry) e depois requisições ASGI
+a uma rota trivial que recebe o serviço por Depends: na forma antiga,
+get_database + MuralService(db); na atual, get_mural_service lendo
+app.state.services. O cliente Motor não conecta enquanto nada é consultado.
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+import timeit
+from pathlib import Path
+
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def report(name, latencies, elapsed):
+    print(
+        f"{name:<24} {len(latencies) / elapsed:>10.0f} "
+        f"{percentile(latencies, 0.5):>8.3f} {percentile(latencies, 0.99):>8.3f}"
+    )
+
+
+def build_apps():
+    sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "app"))
+    from fastapi import Depends, FastAPI
+    from motor.motor_asyncio import AsyncIOMotorClient
+
+    from config.database import database_manager, get_database
+    from routes.murais import get_mural_service
+    from services.mural_service import MuralService
+    from services.registry import ServiceRegistry
+
+    database_manager.client = AsyncIOMotorClient("mongodb://localhost:27017")
+    database_manager.database = database_manager.client["benchmark"]
+    registry = ServiceRegistry(database_manager.database)
+
+    legacy = FastAPI()
+
+    async def get_legacy_service(db=Depends(get_database)) -> MuralService:
+        return MuralService(db)
+
+    @legacy.get("/murais/{mural_id}")
+    async def legacy_route(mural_id: str, service=Depends(get_legacy_service)):
+        return {"id": mural_id}
+
+    current = FastAPI()
+    current.state.services = registry
+
+    @current.get("/murais/{mural_id}")
+    async def current_route(mural_id: str, service=Depends(get_mural_service)):
+        return {"id": mural_id}
+
+    return (
+        database_manager.database,
+        registry,
+        {
+            "serviço por requisição": legacy,
+            "registro (app.state)": current,
+        },
+    )
+
+
+async def call(app, path):
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": b"",
+        "root_path": "",
+        "headers": [(b"host", b"bench")],
+        "client": ("127.0.0.1", 0),
+        "server": ("bench", 80),
+        "app": app,
+    }
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        pass
+
+    await app(scope, receive, send)
+
+
+async def bench_asgi(app, requests, concurrency):
+    latencies = []
+    path = "/murais/64b7f0c2a1b2c3d4e5f60718"
+
+    async def worker(count):
+        for _ in range(count):
+            start = time.perf_counter()
+            await call(app, path)
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    await call(app, path)
+    start = time.perf_counter()
+    await asyncio.gather(*[worker(requests // concurrency) for _ in range(concurrency)])
+    return latencies, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("-c", "--concurrency", type=int, default=16)
+    parser.add_argument("-n", "--requests", type=int, default=20000)
+    args = parser.parse_args()
+
+    database, registry, apps = build_apps()
+    from services.mural_service import MuralService
+
+    print(f"{'':<24} {'µs/chamada':>10}")
+    for name, func in (
+        ("MuralService(db)", lambda: MuralService(database)),
+        ("registry.murais", lambda: registry.murais),
+    ):
+        seconds = min(timeit.repeat(func, number=args.requests, repeat=5))
+        print(f"{name:<24} {seconds / args.requests * 1e6:>10.2f}")
+
+    print(f"\n{'':<24} {'req/s':>10} {'p50 ms':>8} {'p99 ms':>8}")
+    for name, app in apps.items():
+        latencies, elapsed = asyncio.run(
+            bench_asgi(app, args.requests, args.concurrency)
+        )
+        report(name, latencies, elapsed)
+
+
+if __name__ == "__main__":
+    main()
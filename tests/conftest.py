@@ -0,0 +1,47 @@
+import os
+
+# A aplicação não inicia sem uma chave JWT própria; definida antes dos imports
+os.environ.setdefault("JWT_SECRET_KEY", "chave-de-teste-com-mais-de-32-caracteres")
+
+import functools
+
+import httpx
+import pytest
+from mongomock.collection import BulkOperationBuilder
+from mongomock_motor import AsyncMongoMockClient
+
+from main import app
+from services.registry import ServiceRegistry
+
+
+def _without_sort(method):
+    # O pymongo 4.9+ passa sort= às operações de bulk_write (UpdateOne,
+    # ReplaceOne), argumento que o mongomock ainda não conhece
+    @functools.wraps(method)
+    def wrapper(self, *args, sort=None, **kwargs):
+        return method(self, *args, **kwargs)
+
+    return wrapper
+
+
+BulkOperationBuilder.add_update = _without_sort(BulkOperationBuilder.add_update)
+BulkOperationBuilder.add_replace = _without_sort(BulkOperationBuilder.add_replace)
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture
+def database():
+    return AsyncMongoMockClient()["mural_map_test"]
+
+
+@pytest.fixture
+async def client(database):
+    # Sem lifespan: os serviços usam o banco do mongomock
+    app.state.services = ServiceRegistry(database)
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        yield client
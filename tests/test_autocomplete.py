@@ -0,0 +1,77 @@
+import random
+
+from services.autocomplete import TOP_SIZE, PrefixIndex
+
+
+def _texts(suggestions):
+    return [item["texto"] for item in suggestions]
+
+
+def _expected(counts, prefix, limit):
+    matches = [
+        (value, total) for value, total in counts.items() if value.startswith(prefix)
+    ]
+    matches.sort(key=lambda item: (-item[1], item[0]))
+    return [value for value, _ in matches[:limit]]
+
+
+def test_suggest_orders_by_frequency_and_ignores_accents():
+    index = PrefixIndex.build([("São Bento", 3), ("Santo Amaro", 5), ("Boa Vista", 9)])
+
+    assert _texts(index.suggest("sa")) == ["Santo Amaro", "São Bento"]
+    assert _texts(index.suggest("SÃO")) == ["São Bento"]
+    assert index.suggest("x") == []
+
+
+def test_build_merges_values_with_the_same_normalized_form():
+    index = PrefixIndex.build([("Ribeira", 2), ("ribeira", 1)])
+
+    assert len(index) == 1
+    assert index.suggest("rib") == [{"texto": "Ribeira", "total": 3}]
+
+
+def test_precomputed_short_prefixes_follow_writes():
+    index = PrefixIndex.build([("aa", 2), ("ab", 1)])
+    assert _texts(index.suggest("a")) == ["aa", "ab"]
+
+    index.add("ab", 5)
+    index.add("ac")
+    assert _texts(index.suggest("a")) == ["ab", "aa", "ac"]
+
+    index.remove("ab", 6)
+    assert _texts(index.suggest("a")) == ["aa", "ac"]
+
+
+def test_short_prefix_refills_after_a_top_value_drops():
+    counts = {f"a{i:03d}": i + 1 for i in range(TOP_SIZE + 5)}
+    index = PrefixIndex.build(counts.items())
+    assert len(index.suggest("a", TOP_SIZE)) == TOP_SIZE
+
+    # O mais frequente cai para o fim: quem estava fora da lista entra
+    top = max(counts, key=counts.get)
+    index.remove(top, counts[top] - 1)
+    counts[top] = 1
+
+    assert _texts(index.suggest("a", TOP_SIZE)) == _expected(counts, "a", TOP_SIZE)
+
+
+def test_suggestions_match_a_full_scan_under_random_writes():
+    rng = random.Random(42)
+    alphabet = "abc"
+    counts = {}
+    index = PrefixIndex()
+    for _ in range(2000):
+        value = "".join(rng.choice(alphabet) for _ in range(rng.randint(1, 4)))
+        if counts.get(value) and rng.random() < 0.4:
+            amount = rng.randint(1, counts[value])
+            index.remove(value, amount)
+            counts[value] -= amount
+            if not counts[value]:
+                del counts[value]
+        else:
+            index.add(value)
+            counts[value] = counts.get(value, 0) + 1
+
+        prefix = "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 3)))
+        limit = rng.choice([1, 5, TOP_SIZE])
+        assert _texts(index.suggest(prefix, limit)) == _expected(counts, prefix, limit)
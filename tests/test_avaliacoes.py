@@ -0,0 +1,171 @@
+import pytest
+from bson import ObjectId
+
+from models.avaliacao import AvaliacaoCreate, AvaliacaoUpdate
+from services.avaliacao_service import AvaliacaoService
+from services.base import ConflictError
+from services.cache import analytics_cache
+from services.mural_service import MuralService
+from services.tokens import token_manager
+
+pytestmark = pytest.mark.anyio
+
+USUARIO_ID = str(ObjectId())
+
+
+@pytest.fixture
+async def service(database):
+    service = AvaliacaoService(database)
+    await database.avaliacoes.create_indexes(list(service.INDEXES["avaliacoes"]))
+    return service
+
+
+async def _mural(database) -> ObjectId:
+    result = await database.murais.insert_one({"titulo": "Mural", "versao": 0})
+    return result.inserted_id
+
+
+def _auth(usuario_id: str) -> dict:
+    token = token_manager.issue(usuario_id)["access_token"]
+    return {"Authorization": f"Bearer {token}"}
+
+
+async def _resumo(database, mural_id):
+    mural = await database.murais.find_one({"_id": mural_id})
+    return mural.get("resumo_avaliacoes"), mural["versao"]
+
+
+async def test_resumo_follows_create_update_and_delete(database, service):
+    mural_id = await _mural(database)
+
+    avaliacao = await service.create_avaliacao(
+        AvaliacaoCreate(mural_id=mural_id, nota=4), USUARIO_ID
+    )
+    await service.create_avaliacao(
+        AvaliacaoCreate(mural_id=mural_id, nota=2), str(ObjectId())
+    )
+    resumo, versao = await _resumo(database, mural_id)
+    assert resumo == {"total": 2, "soma": 6, "notas": {"4": 1, "2": 1}}
+    assert versao == 2
+
+    await service.update_avaliacao(
+        avaliacao["id"], AvaliacaoUpdate(nota=5), USUARIO_ID
+    )
+    resumo, _ = await _resumo(database, mural_id)
+    assert resumo == {"total": 2, "soma": 7, "notas": {"4": 0, "2": 1, "5": 1}}
+
+    await service.delete(avaliacao["id"], USUARIO_ID)
+    resumo, versao = await _resumo(database, mural_id)
+    assert resumo == {"total": 1, "soma": 2, "notas": {"4": 0, "2": 1, "5": 0}}
+    assert versao == 4
+
+
+async def test_media_por_mural_reads_the_resumo(database, service):
+    mural_id = await _mural(database)
+    for nota in (5, 4, 4):
+        await service.create_avaliacao(
+            AvaliacaoCreate(mural_id=mural_id, nota=nota), str(ObjectId())
+        )
+
+    media = await service.get_media_por_mural(str(mural_id))
+
+    assert media == {"media": 4.33, "total": 3, "distribuicao": {"5": 1, "4": 2}}
+
+
+async def test_second_avaliacao_of_the_same_user_is_a_conflict(database, service):
+    mural_id = await _mural(database)
+    await service.create_avaliacao(
+        AvaliacaoCreate(mural_id=mural_id, nota=4), USUARIO_ID
+    )
+
+    with pytest.raises(ConflictError):
+        await service.create_avaliacao(
+            AvaliacaoCreate(mural_id=mural_id, nota=1), USUARIO_ID
+        )
+
+    # A tentativa recusada não entra no resumo
+    resumo, _ = await _resumo(database, mural_id)
+    assert resumo["total"] == 1
+    assert await database.avaliacoes.count_documents({}) == 1
+
+
+async def test_avaliacao_of_a_missing_mural_is_rejected(service):
+    with pytest.raises(ValueError):
+        await service.create_avaliacao(
+            AvaliacaoCreate(mural_id=ObjectId(), nota=4), USUARIO_ID
+        )
+
+
+async def test_media_por_mural_is_invalidated_for_any_id_spelling(database, service):
+    mural_id = await _mural(database)
+    upper_id = str(mural_id).upper()
+    assert (await service.get_media_por_mural(upper_id))["total"] == 0
+
+    await service.create_avaliacao(
+        AvaliacaoCreate(mural_id=mural_id, nota=3), USUARIO_ID
+    )
+
+    assert (await service.get_media_por_mural(upper_id))["total"] == 1
+
+
+async def test_update_without_changes_is_not_found(database, service):
+    mural_id = await _mural(database)
+    avaliacao = await service.create_avaliacao(
+        AvaliacaoCreate(mural_id=mural_id, nota=4), USUARIO_ID
+    )
+
+    avaliacao_id = avaliacao["id"]
+    unchanged = AvaliacaoUpdate(nota=4)
+    assert await service.update_avaliacao(avaliacao_id, unchanged, USUARIO_ID) is False
+    comentario = AvaliacaoUpdate(comentario="Bonito")
+    assert await service.update_avaliacao(avaliacao_id, comentario, USUARIO_ID) is True
+
+    resumo, _ = await _resumo(database, mural_id)
+    assert resumo == {"total": 1, "soma": 4, "notas": {"4": 1}}
+    document = await database.avaliacoes.find_one({"_id": avaliacao["id"]})
+    assert document["versao"] == 1
+
+
+async def test_only_the_author_can_change_an_avaliacao(database, service):
+    mural_id = await _mural(database)
+    avaliacao = await service.create_avaliacao(
+        AvaliacaoCreate(mural_id=mural_id, nota=4), USUARIO_ID
+    )
+    outro = str(ObjectId())
+
+    assert await service.update_avaliacao(
+        avaliacao["id"], AvaliacaoUpdate(nota=1), outro
+    ) is False
+    assert await service.delete(avaliacao["id"], outro) is False
+
+    resumo, _ = await _resumo(database, mural_id)
+    assert resumo == {"total": 1, "soma": 4, "notas": {"4": 1}}
+    assert await service.delete(avaliacao["id"], USUARIO_ID) is True
+
+
+async def test_avaliacao_routes_require_the_author_token(database, client):
+    mural_id = await _mural(database)
+    await database.avaliacoes.create_indexes(
+        list(AvaliacaoService.INDEXES["avaliacoes"])
+    )
+    autor, outro = _auth(USUARIO_ID), _auth(str(ObjectId()))
+    response = await client.post(
+        "/avaliacoes/", json={"mural_id": str(mural_id), "nota": 4}, headers=autor
+    )
+    url = f"/avaliacoes/{response.json()['id']}"
+
+    assert (await client.put(url, json={"nota": 1})).status_code == 401
+    assert (await client.delete(url)).status_code == 401
+    assert (await client.put(url, json={"nota": 1}, headers=outro)).status_code == 404
+    assert (await client.delete(url, headers=outro)).status_code == 404
+    assert (await client.put(url, json={"nota": 1}, headers=autor)).status_code == 200
+    assert (await client.delete(url, headers=autor)).status_code == 200
+
+
+async def test_deleting_a_mural_drops_its_cached_media(database, service):
+    mural_id = await _mural(database)
+    await service.get_media_por_mural(str(mural_id))
+
+    assert await MuralService(database).delete(str(mural_id).upper())
+
+    assert analytics_cache.get(("media_mural", str(mural_id))) is None
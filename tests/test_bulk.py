@@ -0,0 +1,87 @@
+import json
+
+import pytest
+
+from config.settings import settings
+from models.artista import ArtistaCreate
+from models.mural import MuralCreate
+from services.artista_service import ArtistaService
+from services.bulk import iter_ndjson
+from services.mural_service import MuralService
+
+pytestmark = pytest.mark.anyio
+
+
+async def _chunks(*chunks: bytes):
+    for chunk in chunks:
+        yield chunk
+
+
+async def _lines(*chunks: bytes, max_line_bytes: int = 1000):
+    return [item async for item in iter_ndjson(_chunks(*chunks), max_line_bytes)]
+
+
+async def test_iter_ndjson_numbers_lines_across_chunks():
+    lines = await _lines(b'{"a": 1}\n\n{"b"', b': 2}\n{"c": 3}')
+
+    assert lines == [(1, b'{"a": 1}'), (3, b'{"b": 2}'), (4, b'{"c": 3}')]
+
+
+async def test_iter_ndjson_rejects_unbounded_lines():
+    with pytest.raises(ValueError, match="Linha 2 excede"):
+        await _lines(b"{}\n", b"x" * 20, max_line_bytes=10)
+
+
+async def test_mural_bulk_import_reports_errors_per_line(database):
+    local = await database.locais.insert_one({"nome": "Praça", "bairro": "Boa Vista"})
+    valido = {"titulo": "Mural", "local_id": str(local.inserted_id), "tags": ["cor"]}
+    linhas = [
+        json.dumps(valido),
+        "{não é json",
+        json.dumps({"local_id": str(local.inserted_id)}),
+        json.dumps({**valido, "local_id": "65f000000000000000000000"}),
+        json.dumps({**valido, "titulo": "Outro"}),
+    ]
+    body = "\n".join(linhas).encode("utf-8")
+
+    report = await MuralService(database).bulk_import(
+        _chunks(body[:50], body[50:]), MuralCreate, chunk_size=2
+    )
+
+    assert report["total"] == 5
+    assert report["inseridos"] == 2
+    assert [erro["linha"] for erro in report["erros"]] == [2, 3, 4]
+    assert "titulo" in report["erros"][1]["erro"]
+    assert "não encontrado" in report["erros"][2]["erro"]
+    murais = await database.murais.find().to_list(None)
+    assert {mural["bairro"] for mural in murais} == {"boa vista"}
+
+
+async def test_bulk_import_reports_write_errors_and_caps_the_list(
+    database, monkeypatch
+):
+    monkeypatch.setattr(settings, "BULK_MAX_ERRORS", 1)
+    await database.artistas.create_index("nome", unique=True)
+    body = b"\n".join(
+        json.dumps({"nome": nome}).encode() for nome in ("A", "A", "B", "A")
+    )
+
+    report = await ArtistaService(database).bulk_import(
+        _chunks(body), ArtistaCreate, chunk_size=10
+    )
+
+    assert report["inseridos"] == 2
+    assert [erro["linha"] for erro in report["erros"]] == [2]
+    assert report["erros_omitidos"] == 1
+
+
+async def test_bulk_route_streams_ndjson(client):
+    response = await client.post(
+        "/artistas/bulk",
+        content=b'{"nome": "Kobra"}\n{"nome": ""}\n',
+        headers={"Content-Type": "application/x-ndjson"},
+    )
+
+    assert response.status_code == 200
+    assert response.json()["inseridos"] == 1
+    assert response.json()["erros"][0]["linha"] == 2
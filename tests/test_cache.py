@@ -0,0 +1,140 @@
+import asyncio
+
+import pytest
+
+from services.cache import AsyncTTLCache, TTLCache
+
+pytestmark = pytest.mark.anyio
+
+
+def test_ttl_cache_expires_entries():
+    cache = TTLCache(maxsize=10, ttl=-1)
+    cache.set("a", 1)
+
+    assert cache.get("a") is None
+    assert cache.stats()["expirations"] == 1
+
+
+def test_ttl_cache_evicts_least_recently_used():
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert cache.stats()["evictions"] == 1
+
+
+def test_ttl_cache_invalidate_prefix():
+    cache = TTLCache(maxsize=10, ttl=60)
+    cache.set(("top_artistas", 5), 1)
+    cache.set(("top_artistas", 10), 2)
+    cache.set(("media_mural", "x"), 3)
+
+    cache.invalidate_prefix("top_artistas")
+
+    assert cache.get(("top_artistas", 5)) is None
+    assert cache.get(("top_artistas", 10)) is None
+    assert cache.get(("media_mural", "x")) == 3
+
+
+class SlowFactory:
+    """Fábrica que só conclui quando o teste libera o evento"""
+
+    def __init__(self, value):
+        self.value = value
+        self.calls = 0
+        self.release = asyncio.Event()
+
+    async def __call__(self):
+        self.calls += 1
+        await self.release.wait()
+        return self.value
+
+
+async def _start(cache, key, factory):
+    task = asyncio.create_task(cache.get_or_compute(key, factory))
+    await asyncio.sleep(0)
+    return task
+
+
+async def test_concurrent_requests_share_one_computation():
+    cache = AsyncTTLCache()
+    factory = SlowFactory("valor")
+
+    tasks = [await _start(cache, ("k",), factory) for _ in range(3)]
+    factory.release.set()
+
+    assert await asyncio.gather(*tasks) == ["valor"] * 3
+    assert factory.calls == 1
+    assert cache.stats()["coalesced"] == 2
+    assert cache.get(("k",)) == "valor"
+
+
+async def test_invalidating_another_key_keeps_inflight_result():
+    cache = AsyncTTLCache()
+    factory = SlowFactory("valor")
+
+    task = await _start(cache, ("media_por_bairro",), factory)
+    cache.invalidate(("media_mural", "1"))
+    cache.invalidate_prefix("top_artistas")
+    factory.release.set()
+    await task
+
+    assert cache.get(("media_por_bairro",)) == "valor"
+
+
+@pytest.mark.parametrize(
+    "invalidate",
+    [
+        lambda cache: cache.invalidate(("media_mural", "1")),
+        lambda cache: cache.invalidate_prefix("media_mural"),
+        lambda cache: cache.clear(),
+    ],
+)
+async def test_invalidated_inflight_result_is_not_stored(invalidate):
+    cache = AsyncTTLCache()
+    factory = SlowFactory("antigo")
+
+    task = await _start(cache, ("media_mural", "1"), factory)
+    invalidate(cache)
+    factory.release.set()
+
+    # Quem pediu recebe o valor, mas ele não fica em cache
+    assert await task == "antigo"
+    assert cache.get(("media_mural", "1")) is None
+
+
+async def test_cancelled_leader_does_not_cancel_followers():
+    cache = AsyncTTLCache()
+    factory = SlowFactory("valor")
+
+    leader = await _start(cache, ("k",), factory)
+    follower = await _start(cache, ("k",), factory)
+    leader.cancel()
+    await asyncio.sleep(0)
+    factory.release.set()
+
+    assert await follower == "valor"
+    with pytest.raises(asyncio.CancelledError):
+        await leader
+    assert cache.get(("k",)) == "valor"
+
+
+async def test_failed_computation_is_not_cached():
+    cache = AsyncTTLCache()
+
+    async def failing():
+        raise RuntimeError("falhou")
+
+    with pytest.raises(RuntimeError):
+        await cache.get_or_compute(("k",), failing)
+
+    async def succeeding():
+        return "ok"
+
+    assert cache.stats()["inflight"] == 0
+    assert await cache.get_or_compute(("k",), succeeding) == "ok"
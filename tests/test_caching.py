@@ -0,0 +1,62 @@
+import httpx
+import pytest
+from fastapi import FastAPI, Request
+
+from middleware.compression import CompressionMiddleware
+from routes.caching import is_not_modified, make_etag, not_modified, set_cache_headers
+from routes.responses import MongoJSONResponse
+
+pytestmark = pytest.mark.anyio
+
+CACHE_CONTROL = "public, max-age=60"
+ETAG = make_etag("mural", 3)
+
+
+def _client() -> httpx.AsyncClient:
+    app = FastAPI()
+    app.add_middleware(CompressionMiddleware, minimum_size=64)
+
+    @app.get("/recurso")
+    async def recurso(request: Request):
+        # Mesmo fluxo das rotas de detalhe (routes/murais.obter_mural)
+        if is_not_modified(request, ETAG):
+            return not_modified(request, ETAG, CACHE_CONTROL)
+        response = MongoJSONResponse({"texto": "mural " * 100})
+        set_cache_headers(response, ETAG, CACHE_CONTROL)
+        return response
+
+    transport = httpx.ASGITransport(app=app)
+    return httpx.AsyncClient(transport=transport, base_url="http://test")
+
+
+@pytest.mark.parametrize("encoding", ["gzip", "identity"])
+async def test_304_repeats_the_validator_sent_with_the_200(encoding):
+    async with _client() as client:
+        first = await client.get("/recurso", headers={"Accept-Encoding": encoding})
+        assert first.status_code == 200
+        validator = first.headers["ETag"]
+        if encoding == "gzip":
+            assert validator == f'{ETAG[:-1]}-gzip"'
+
+        second = await client.get(
+            "/recurso",
+            headers={"Accept-Encoding": encoding, "If-None-Match": validator},
+        )
+    assert second.status_code == 304
+    assert second.headers["ETag"] == validator
+    assert second.headers["Cache-Control"] == CACHE_CONTROL
+
+
+async def test_other_etags_are_not_matched():
+    async with _client() as client:
+        response = await client.get(
+            "/recurso", headers={"If-None-Match": make_etag("mural", 2)}
+        )
+    assert response.status_code == 200
+
+
+async def test_wildcard_returns_the_current_etag():
+    async with _client() as client:
+        response = await client.get("/recurso", headers={"If-None-Match": "*"})
+    assert response.status_code == 304
+    assert response.headers["ETag"] == ETAG
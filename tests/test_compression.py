@@ -0,0 +1,111 @@
+import gzip
+
+import brotli
+import httpx
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse, StreamingResponse
+
+from middleware.compression import CompressionMiddleware, negotiate_encoding
+
+pytestmark = pytest.mark.anyio
+
+GRANDE = "mural " * 100
+ETAG = '"abc"'
+
+
+def _client() -> httpx.AsyncClient:
+    app = FastAPI()
+    app.add_middleware(CompressionMiddleware, minimum_size=64)
+
+    @app.get("/grande")
+    async def grande():
+        return PlainTextResponse(GRANDE, headers={"ETag": ETAG})
+
+    @app.get("/pequeno")
+    async def pequeno():
+        return PlainTextResponse("mural", headers={"ETag": ETAG})
+
+    @app.get("/stream")
+    async def stream():
+        # Blocos menores que o mínimo: a decisão espera acumular o suficiente
+        return StreamingResponse(iter([b"mural "] * 100), media_type="text/plain")
+
+    @app.get("/codificado")
+    async def codificado():
+        headers = {"Content-Encoding": "gzip"}
+        return PlainTextResponse(gzip.compress(GRANDE.encode()), headers=headers)
+
+    transport = httpx.ASGITransport(app=app)
+    return httpx.AsyncClient(transport=transport, base_url="http://test")
+
+
+@pytest.mark.parametrize(
+    "encoding, decompress", [("gzip", gzip.decompress), ("br", brotli.decompress)]
+)
+async def test_large_responses_are_compressed(encoding, decompress):
+    async with _client() as client:
+        async with client.stream(
+            "GET", "/grande", headers={"Accept-Encoding": encoding}
+        ) as response:
+            raw = b"".join([chunk async for chunk in response.aiter_raw()])
+
+    assert response.headers["Content-Encoding"] == encoding
+    assert response.headers["Vary"] == "Accept-Encoding"
+    assert response.headers["ETag"] == f'"abc-{encoding}"'
+    assert int(response.headers["Content-Length"]) == len(raw)
+    assert decompress(raw).decode() == GRANDE
+
+
+async def test_small_responses_are_left_alone():
+    async with _client() as client:
+        response = await client.get("/pequeno", headers={"Accept-Encoding": "gzip"})
+
+    assert "Content-Encoding" not in response.headers
+    assert "Vary" not in response.headers
+    assert response.headers["ETag"] == ETAG
+    assert response.text == "mural"
+
+
+async def test_uncompressed_variant_keeps_the_original_etag():
+    async with _client() as client:
+        response = await client.get("/grande", headers={"Accept-Encoding": "identity"})
+
+    assert "Content-Encoding" not in response.headers
+    assert response.headers["ETag"] == ETAG
+    assert response.text == GRANDE
+
+
+async def test_streaming_responses_are_compressed_in_chunks():
+    async with _client() as client:
+        response = await client.get("/stream", headers={"Accept-Encoding": "gzip"})
+
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert response.headers["Vary"] == "Accept-Encoding"
+    assert "Content-Length" not in response.headers
+    assert response.text == GRANDE
+
+
+async def test_already_encoded_responses_are_not_compressed_again():
+    async with _client() as client:
+        async with client.stream(
+            "GET", "/codificado", headers={"Accept-Encoding": "gzip"}
+        ) as response:
+            raw = b"".join([chunk async for chunk in response.aiter_raw()])
+
+    assert gzip.decompress(raw).decode() == GRANDE
+
+
+@pytest.mark.parametrize(
+    "accept_encoding, expected",
+    [
+        ("gzip, deflate, br", "br"),
+        ("gzip, br;q=0", "gzip"),
+        ("*", "br"),
+        ("*, br;q=0", "gzip"),
+        ("gzip;q=0, identity", None),
+        ("", None),
+    ],
+)
+def test_negotiate_encoding_respects_q_zero(accept_encoding, expected):
+    assert negotiate_encoding(accept_encoding) == expected
@@ -0,0 +1,67 @@
+import re
+
+import httpx
+import pytest
+from fastapi import FastAPI
+from pymongo.errors import DuplicateKeyError
+
+from middleware.error_handler import register_exception_handlers
+from middleware.timing import TimingMiddleware
+from services.base import ConflictError
+from services.passwords import PasswordHasherBusy
+
+pytestmark = pytest.mark.anyio
+
+ERROS = {
+    "valor": ValueError("Valor inválido"),
+    "conflito": ConflictError("Avaliação já existe"),
+    "duplicado": DuplicateKeyError("E11000 duplicate key"),
+    "ocupado": PasswordHasherBusy("Servidor ocupado"),
+    "interno": RuntimeError("detalhe que não deve vazar"),
+}
+
+
+def _client() -> httpx.AsyncClient:
+    app = FastAPI()
+    register_exception_handlers(app)
+    app.add_middleware(TimingMiddleware)
+
+    @app.get("/erro/{nome}")
+    async def erro(nome: str):
+        raise ERROS[nome]
+
+    @app.get("/ok")
+    async def ok():
+        return {"ok": True}
+
+    # O handler de Exception roda no ServerErrorMiddleware, que relança o erro
+    transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+    return httpx.AsyncClient(transport=transport, base_url="http://test")
+
+
+@pytest.mark.parametrize(
+    "nome, status_code, detail",
+    [
+        ("valor", 400, "Valor inválido"),
+        ("conflito", 409, "Avaliação já existe"),
+        ("duplicado", 409, "Registro duplicado"),
+        ("ocupado", 503, "Servidor ocupado"),
+        ("interno", 500, "Erro interno do servidor"),
+    ],
+)
+async def test_exceptions_are_mapped_to_json_responses(nome, status_code, detail):
+    async with _client() as client:
+        response = await client.get(f"/erro/{nome}")
+
+    assert response.status_code == status_code
+    assert response.json() == {"detail": detail}
+    if nome == "ocupado":
+        assert response.headers["Retry-After"] == "1"
+
+
+async def test_timing_header_reports_the_processing_time():
+    async with _client() as client:
+        response = await client.get("/ok")
+
+    assert re.fullmatch(r"app;dur=\d+\.\d", response.headers["Server-Timing"])
+
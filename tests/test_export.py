@@ -0,0 +1,86 @@
+import csv
+import io
+import json
+from datetime import datetime
+
+import pytest
+from bson import ObjectId
+
+from main import app
+from services import export
+from services.export import CSV_COLUMNS, ExportFormat, encode_murais
+
+pytestmark = pytest.mark.anyio
+
+MURAL = {
+    "id": ObjectId("65f000000000000000000001"),
+    "titulo": "Mural, com vírgula",
+    "data_criacao": datetime(2024, 3, 1, 12, 0),
+    "tags": ["grafite", "cor"],
+    "artista_ids": [ObjectId("65f000000000000000000002")],
+    "local_id": ObjectId("65f000000000000000000003"),
+    "local": {"nome": "Praça", "bairro": "Boa Vista", "latitude": -8.0},
+}
+
+
+async def _murais(count: int):
+    for _ in range(count):
+        yield dict(MURAL)
+
+
+async def _encode(count: int, export_format: ExportFormat) -> list:
+    return [chunk async for chunk in encode_murais(_murais(count), export_format)]
+
+
+async def test_ndjson_has_one_document_per_line():
+    body = b"".join(await _encode(2, ExportFormat.NDJSON))
+
+    lines = body.decode("utf-8").splitlines()
+    assert len(lines) == 2
+    assert json.loads(lines[0]) == {
+        "id": "65f000000000000000000001",
+        "titulo": "Mural, com vírgula",
+        "data_criacao": "2024-03-01T12:00:00",
+        "tags": ["grafite", "cor"],
+        "artista_ids": ["65f000000000000000000002"],
+        "local_id": "65f000000000000000000003",
+        "local": {"nome": "Praça", "bairro": "Boa Vista", "latitude": -8.0},
+    }
+
+
+async def test_csv_flattens_the_local():
+    body = b"".join(await _encode(1, ExportFormat.CSV)).decode("utf-8")
+
+    header, row = list(csv.reader(io.StringIO(body)))
+    assert header == CSV_COLUMNS
+    values = dict(zip(header, row))
+    assert values["titulo"] == "Mural, com vírgula"
+    assert values["tags"] == "grafite|cor"
+    assert values["bairro"] == "Boa Vista"
+    assert values["longitude"] == ""
+
+
+@pytest.mark.parametrize("export_format", list(ExportFormat))
+async def test_output_is_sent_in_bounded_chunks(monkeypatch, export_format):
+    monkeypatch.setattr(export, "CHUNK_BYTES", 512)
+
+    chunks = await _encode(20, export_format)
+
+    assert len(chunks) > 1
+    # Cada bloco é enviado ao passar do limite, com no máximo um documento a mais
+    assert all(len(chunk) < 512 * 2 for chunk in chunks)
+
+
+async def test_export_route_streams_with_download_headers(client):
+    async def export_murais(**kwargs):
+        async for mural in _murais(3):
+            yield mural
+
+    app.state.services.murais.export_murais = export_murais
+
+    response = await client.get("/murais/export", params={"format": "csv"})
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "text/csv; charset=utf-8"
+    assert 'filename="murais.csv"' in response.headers["content-disposition"]
+    assert len(response.text.splitlines()) == 4
@@ -0,0 +1,99 @@
+import pytest
+
+from config.settings import settings
+from services.cache import analytics_cache
+from services.geo import (
+    bbox_polygons,
+    geohash_cover,
+    geohash_encode,
+    precision_for_zoom,
+)
+from services.mural_service import MuralService
+
+pytestmark = pytest.mark.anyio
+
+
+def test_geohash_encode_matches_the_reference_value():
+    # Exemplo clássico do geohash (Jutlândia, Dinamarca)
+    assert geohash_encode(57.64911, 10.40744, 11) == "u4pruydqqvj"
+
+
+def test_geohash_cover_contains_every_point_of_the_box():
+    sw, ne = (-8.10, -34.95), (-8.00, -34.85)
+    cells = geohash_cover(sw, ne, 5)
+
+    for lat in (-8.10, -8.05, -8.0001):
+        for lng in (-34.95, -34.90, -34.8501):
+            assert geohash_encode(lat, lng, 5) in cells
+
+
+def test_precision_grows_with_zoom():
+    precisions = [precision_for_zoom(zoom) for zoom in range(0, 20)]
+
+    assert precisions == sorted(precisions)
+    assert precisions[0] == 1
+
+
+def test_wide_boxes_are_split_into_polygons_under_90_degrees():
+    polygons = bbox_polygons((-10, -170), (10, 170))
+
+    assert len(polygons) == 4
+    for polygon in polygons:
+        ring = polygon["coordinates"][0]
+        assert ring[1][0] - ring[0][0] <= 90
+
+
+async def test_low_zoom_clusters_are_computed_once_per_tile(database, monkeypatch):
+    # O $substrCP do agrupamento não existe no mongomock: cada tile devolve
+    # uma célula no centro da sua área e outra bem longe do retângulo
+    analytics_cache.clear()
+    monkeypatch.setattr(settings, "BBOX_MAX_CLUSTERS", 3)
+    service = MuralService(database)
+    computed = []
+
+    async def cluster_tile(tile, precision):
+        computed.append(tile)
+        return [
+            {
+                "geohash": tile + "0",
+                "total": len(computed),
+                "latitude": -8.05,
+                "longitude": -34.9,
+                "top_tag": "grafite",
+            },
+            {
+                "geohash": tile + "1",
+                "total": 100,
+                "latitude": 40.0,
+                "longitude": 10.0,
+                "top_tag": "lambe",
+            },
+        ]
+
+    monkeypatch.setattr(service, "_cluster_tile", cluster_tile)
+    sw, ne = (-8.2, -35.0), (-7.9, -34.7)
+    zoom = settings.BBOX_CLUSTER_MAX_ZOOM - 4
+
+    first = await service.bbox(sw, ne, zoom)
+    tiles = list(computed)
+    second = await service.bbox(sw, ne, zoom)
+
+    assert computed == tiles
+    assert first == second
+    assert first["modo"] == "clusters"
+    # Só as células próximas do retângulo, da maior para a menor
+    totals = [cluster["total"] for cluster in first["clusters"]]
+    assert totals == sorted(totals, reverse=True)
+    assert all(cluster["top_tag"] == "grafite" for cluster in first["clusters"])
+    assert first["truncado"] is (len(tiles) > 3)
+
+    # Um mural novo descarta os tiles em cache
+    local = await database.locais.insert_one({"latitude": -8.05, "longitude": -34.9})
+    await service.create({"titulo": "Mural", "local_id": str(local.inserted_id)})
+    await service.bbox(sw, ne, zoom)
+    assert len(computed) == 2 * len(tiles)
+
+
+async def test_invalid_box_is_rejected(database):
+    with pytest.raises(ValueError, match="Retângulo inválido"):
+        await MuralService(database).bbox((-7.9, -35.0), (-8.2, -34.7), 5)
@@ -0,0 +1,104 @@
+import pytest
+from pymongo import ASCENDING, IndexModel
+
+from config import database as database_config
+from config.settings import settings
+from services.indexes import index_matches, reconcile_collection
+from services.search_service import TEXT_INDEX_NAME, SearchService
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+def manager(monkeypatch):
+    manager = database_config.database_manager
+    for attribute, value in (
+        ("index_report", None),
+        ("index_error", None),
+        ("index_attempts", 0),
+    ):
+        monkeypatch.setattr(manager, attribute, value)
+    return manager
+
+
+async def test_reconcile_creates_only_missing_indexes(database):
+    models = [IndexModel("nome", name="nome"), IndexModel("bairro", name="bairro")]
+    await database.locais.create_index("nome", name="nome")
+
+    report = await reconcile_collection(database, "locais", models)
+
+    assert report["criados"] == ["bairro"]
+    assert report["inalterados"] == ["nome"]
+    again = await reconcile_collection(database, "locais", models)
+    assert again["inalterados"] == ["nome", "bairro"]
+    assert again["criados"] == []
+
+
+async def test_divergent_indexes_are_only_rebuilt_on_request(database):
+    await database.usuarios.create_index("email", name="email")
+    models = [IndexModel("email", name="email", unique=True)]
+
+    report = await reconcile_collection(database, "usuarios", models)
+    assert report["divergentes"] == ["email"]
+
+    report = await reconcile_collection(database, "usuarios", models, replace=True)
+    assert report["recriados"] == ["email"]
+    indexes = await database.usuarios.index_information()
+    assert indexes["email"].get("unique") is True
+
+
+def test_text_indexes_are_compared_by_weights_and_language():
+    declared = SearchService.INDEXES["artistas"][0].document
+    existing = {
+        "name": TEXT_INDEX_NAME,
+        "key": {"_fts": "text", "_ftsx": 1},
+        "weights": {"nome": 10, "biografia": 1},
+        "default_language": "portuguese",
+    }
+
+    assert index_matches(declared, existing)
+    assert not index_matches(declared, {**existing, "weights": {"nome": 1}})
+    assert not index_matches(declared, {**existing, "default_language": "english"})
+
+
+def test_float_directions_match_integer_ones():
+    declared = IndexModel([("nome", ASCENDING)]).document
+
+    assert index_matches(declared, {"key": {"nome": 1.0}})
+
+
+async def test_background_build_retries_with_backoff(monkeypatch, manager):
+    attempts, delays = [], []
+
+    async def create_indexes():
+        attempts.append(1)
+        if len(attempts) < 3:
+            raise RuntimeError("servidor indisponível")
+        manager.index_report = {}
+
+    async def sleep(delay):
+        delays.append(delay)
+
+    monkeypatch.setattr(database_config, "create_indexes", create_indexes)
+    monkeypatch.setattr(database_config.asyncio, "sleep", sleep)
+
+    await database_config._build_indexes()
+
+    assert delays == [1.0, 2.0]
+    assert manager.index_attempts == 3
+    assert manager.index_error is None
+
+
+async def test_ready_waits_for_the_indexes(client, monkeypatch, manager):
+    monkeypatch.setattr(settings, "INDEX_BUILD_MODE", "background")
+    manager.index_error = "servidor indisponível"
+
+    response = await client.get("/ready")
+    assert response.status_code == 503
+    assert response.json()["indices"]["erro"] == "servidor indisponível"
+
+    manager.index_error = None
+    manager.index_report = {"murais": {"divergentes": ["titulo_1"]}}
+    response = await client.get("/ready")
+    assert response.status_code == 200
+    assert response.json()["indices"]["divergentes"] == {"murais": ["titulo_1"]}
@@ -0,0 +1,56 @@
+import pytest
+
+from services.base import BaseService, CountMode, estimated_count_cache
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+async def service(database):
+    await database.artistas.insert_many(
+        [{"nome": f"Artista {i}", "ativo": i % 2 == 0} for i in range(5)]
+    )
+    estimated_count_cache.clear()
+    return BaseService(database, "artistas")
+
+
+async def test_exact_mode_returns_page_and_total_from_one_facet(service):
+    result = await service.list_with_pagination(page=2, limit=2, sort_by="nome")
+
+    assert [item["nome"] for item in result["items"]] == ["Artista 2", "Artista 3"]
+    assert result["total"] == 5
+    assert result["pages"] == 3
+
+
+async def test_exact_mode_past_the_last_page(service):
+    result = await service.list_with_pagination(page=4, limit=2)
+
+    assert result["items"] == []
+    assert result["total"] == 5
+
+
+async def test_none_mode_skips_the_count(service):
+    result = await service.list_with_pagination(limit=2, count_mode=CountMode.NONE)
+
+    assert len(result["items"]) == 2
+    assert result["total"] is None
+    assert result["pages"] is None
+
+
+async def test_estimated_mode_reuses_cached_filtered_counts(database, service):
+    filters = {"ativo": True}
+    first = await service.list_with_pagination(
+        filters, limit=1, count_mode=CountMode.ESTIMATED
+    )
+    assert first["total"] == 3
+
+    # Nova escrita não altera a contagem até a entrada do cache expirar
+    await database.artistas.insert_one({"nome": "Artista 5", "ativo": True})
+    second = await service.list_with_pagination(
+        filters, limit=1, count_mode=CountMode.ESTIMATED
+    )
+    assert second["total"] == 3
+
+    # Sem filtros, usa os metadados da coleção
+    unfiltered = await service.list_with_pagination(count_mode=CountMode.ESTIMATED)
+    assert unfiltered["total"] == 6
@@ -0,0 +1,109 @@
+import pytest
+from bson import ObjectId
+
+from models.local import LocalCreate, LocalUpdate
+from services.geo import geohash_encode
+from services.local_service import LocalService
+from services.mural_service import MuralService
+from services.normalization import normalize_text, prefix_filter
+from services.tag_stats import tag_delta
+
+pytestmark = pytest.mark.anyio
+
+
+async def _local(service: LocalService) -> ObjectId:
+    local_id = await service.create_local(
+        LocalCreate(
+            nome="Praça",
+            latitude=-8.05,
+            longitude=-34.9,
+            bairro="São José",
+            cidade="Recife",
+        )
+    )
+    return ObjectId(local_id)
+
+
+async def test_locais_store_geojson_points_with_2dsphere_indexes(database):
+    service = LocalService(database)
+    local_id = await _local(service)
+
+    local = await database.locais.find_one({"_id": local_id})
+    # GeoJSON usa a ordem longitude, latitude
+    assert local["localizacao"] == {"type": "Point", "coordinates": [-34.9, -8.05]}
+    for indexes in (LocalService.INDEXES["locais"], MuralService.INDEXES["murais"]):
+        assert any(
+            index.document["key"] == {"localizacao": "2dsphere"} for index in indexes
+        )
+
+
+async def test_moving_a_local_moves_its_murais(database):
+    service = LocalService(database)
+    local_id = await _local(service)
+    await database.murais.insert_one({"local_id": local_id, "titulo": "Mural"})
+
+    assert await service.update_local(
+        str(local_id), LocalUpdate(latitude=-8.06, longitude=-34.88)
+    )
+
+    mural = await database.murais.find_one({"local_id": local_id})
+    assert mural["localizacao"] == {"type": "Point", "coordinates": [-34.88, -8.06]}
+    assert mural["geohash"] == geohash_encode(-8.06, -34.88)
+
+
+async def test_renaming_the_bairro_syncs_the_murais_copy(database):
+    service = LocalService(database)
+    local_id = await _local(service)
+    await database.murais.insert_one(
+        {"local_id": local_id, "bairro": "sao jose", "tags": ["grafite"]}
+    )
+    await service.tag_stats.apply(tag_delta(["grafite"], "sao jose"))
+    before = await service.generations.get("locais", "murais")
+
+    assert await service.update_local(str(local_id), LocalUpdate(bairro="Boa  Vista"))
+
+    local = await database.locais.find_one({"_id": local_id})
+    assert (local["bairro"], local["bairro_norm"]) == ("Boa  Vista", "boa vista")
+    assert local["versao"] == 1
+    mural = await database.murais.find_one({"local_id": local_id})
+    assert mural["bairro"] == "boa vista"
+    assert await service.tag_stats.top("Boa Vista") == [
+        {"tag": "grafite", "total": 1}
+    ]
+    assert await service.tag_stats.top("São José") == []
+    after = await service.generations.get("locais", "murais")
+    assert after == {name: value + 1 for name, value in before.items()}
+
+
+async def test_update_without_changes_leaves_local_and_murais_alone(database):
+    service = LocalService(database)
+    local_id = await _local(service)
+    await database.murais.insert_one({"local_id": local_id, "bairro": "sao jose"})
+    before = await service.generations.get("locais", "murais")
+
+    unchanged = LocalUpdate(bairro="São José", cidade="Recife")
+    assert await service.update_local(str(local_id), unchanged) is False
+
+    local = await database.locais.find_one({"_id": local_id})
+    assert "versao" not in local
+    assert await service.generations.get("locais", "murais") == before
+
+
+async def test_search_by_neighborhood_ignores_accents_and_case(database):
+    service = LocalService(database)
+    local_id = await _local(service)
+
+    for termo in ("sao j", "SÃO  JOSÉ", "São"):
+        locais = await service.search_by_neighborhood(termo)
+        assert [local["_id"] for local in locais] == [local_id]
+    assert await service.search_by_neighborhood("José") == []
+    # Caracteres de regex no termo são literais
+    assert await service.search_by_neighborhood("s.o") == []
+    with pytest.raises(ValueError):
+        prefix_filter("bairro", "   ")
+
+
+def test_normalize_text_strips_accents_spaces_and_case():
+    assert normalize_text("  Ação   ÉPICA ") == "acao epica"
+    assert normalize_text("Straße") == "strasse"
+    assert normalize_text(None) is None
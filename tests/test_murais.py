@@ -0,0 +1,93 @@
+import pytest
+from bson import ObjectId
+
+from services.mural_service import MuralService
+
+pytestmark = pytest.mark.anyio
+
+
+async def _local(database, bairro="São José") -> ObjectId:
+    result = await database.locais.insert_one(
+        {
+            "nome": "Praça",
+            "latitude": -8.05,
+            "longitude": -34.9,
+            "bairro": bairro,
+            "cidade": "Recife",
+        }
+    )
+    return result.inserted_id
+
+
+async def test_create_copies_the_local_fields_used_by_filters(database):
+    service = MuralService(database)
+    local_id = await _local(database)
+
+    mural = await service.create({"titulo": "Mural", "local_id": str(local_id)})
+
+    document = await database.murais.find_one({"_id": mural["id"]})
+    assert document["local_id"] == local_id
+    assert document["bairro"] == "sao jose"
+    assert document["cidade"] == "recife"
+    assert document["localizacao"] == {"type": "Point", "coordinates": [-34.9, -8.05]}
+    assert await service.count_by_bairro("SAO JOSÉ") == 1
+    assert await service.count_by_bairro("Boa Vista") == 0
+
+
+def test_plan_pipeline_filters_and_pages_before_the_lookup(database):
+    service = MuralService(database)
+    filters = service._build_filters(bairro="São José", tag="grafite")
+
+    pipeline = service._plan_pipeline(filters, ("_id",), 10)
+
+    assert pipeline[:3] == [
+        {"$match": {"bairro": "sao jose", "tags": "grafite"}},
+        {"$sort": {"_id": 1}},
+        {"$limit": 10},
+    ]
+    assert "$lookup" in pipeline[3]
+
+
+async def test_create_validates_references_with_one_query_per_collection(
+    database, monkeypatch
+):
+    service = MuralService(database)
+    local_id = await _local(database)
+    result = await database.artistas.insert_many([{"nome": "A"}, {"nome": "B"}])
+    artista_ids = [str(oid) for oid in result.inserted_ids]
+    queries = []
+    collection_type = type(database.locais)
+    find = collection_type.find
+
+    def counting_find(self, *args, **kwargs):
+        queries.append(self.name)
+        return find(self, *args, **kwargs)
+
+    monkeypatch.setattr(collection_type, "find", counting_find)
+
+    mural = await service.create(
+        {"titulo": "Mural", "local_id": str(local_id), "artista_ids": artista_ids}
+    )
+
+    assert sorted(queries) == ["artistas", "locais"]
+    assert mural["artista_ids"] == result.inserted_ids
+    assert mural["id"] == (await database.murais.find_one())["_id"]
+
+
+@pytest.mark.parametrize("missing", ["local", "artista"])
+async def test_create_rejects_missing_references(database, missing):
+    service = MuralService(database)
+    local_id = await _local(database) if missing != "local" else ObjectId()
+    artista_id = ObjectId()
+    if missing != "artista":
+        await database.artistas.insert_one({"_id": artista_id, "nome": "A"})
+
+    with pytest.raises(ValueError, match="não encontrado"):
+        await service.create(
+            {
+                "titulo": "Mural",
+                "local_id": str(local_id),
+                "artista_ids": [str(artista_id)],
+            }
+        )
+    assert await database.murais.count_documents({}) == 0
@@ -0,0 +1,70 @@
+import pytest
+from bson import ObjectId
+
+from models.common import object_id_or_none, parse_object_id
+from models.mural import Mural
+from models.usuario import UsuarioUpdate
+from services.usuario_service import UsuarioService
+
+pytestmark = pytest.mark.anyio
+
+
+def test_parse_object_id_accepts_hex_and_object_id():
+    oid = ObjectId()
+    assert parse_object_id(str(oid)) == oid
+    assert parse_object_id(oid) is oid
+
+
+@pytest.mark.parametrize("value", ["zz", "", None, 123])
+def test_parse_object_id_rejects_invalid_values(value):
+    with pytest.raises(ValueError, match="ID do mural inválido"):
+        parse_object_id(value, "ID do mural inválido")
+    assert object_id_or_none(value) is None
+
+
+def test_response_model_serializes_object_ids_as_strings():
+    local_id, artista_id = ObjectId(), ObjectId()
+    mural = Mural.model_validate(
+        {
+            "_id": ObjectId(),
+            "titulo": "Mural",
+            "data_criacao": "2024-01-01T00:00:00",
+            "local_id": local_id,
+            "artista_ids": [str(artista_id)],
+        }
+    )
+
+    assert mural.local_id == local_id
+    assert mural.artista_ids == [artista_id]
+    dumped = mural.model_dump(mode="json")
+    assert dumped["local_id"] == str(local_id)
+    assert dumped["artista_ids"] == [str(artista_id)]
+
+
+async def test_services_treat_invalid_ids_as_missing(database):
+    service = UsuarioService(database)
+
+    assert await service.get_by_id("não-é-id") is None
+    assert await service.update("não-é-id", {"nome": "x"}) is False
+    assert await service.delete("não-é-id") is False
+
+
+async def test_get_by_id_returns_object_id(database):
+    service = UsuarioService(database)
+    usuario_id = await service.create({"nome": "Ana", "email": "ana@example.com"})
+
+    usuario = await service.get_by_id(usuario_id)
+
+    assert usuario["_id"] == ObjectId(usuario_id)
+
+
+async def test_update_usuario_keeps_own_email(database):
+    service = UsuarioService(database)
+    usuario_id = await service.create({"nome": "Ana", "email": "ana@example.com"})
+    await service.create({"nome": "Bia", "email": "bia@example.com"})
+
+    assert await service.update_usuario(
+        usuario_id, UsuarioUpdate(nome="Ana Maria", email="ana@example.com")
+    )
+    with pytest.raises(ValueError, match="Email já cadastrado"):
+        await service.update_usuario(usuario_id, UsuarioUpdate(email="bia@example.com"))
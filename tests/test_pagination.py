@@ -0,0 +1,165 @@
+import base64
+from datetime import datetime
+
+import pytest
+from bson import ObjectId
+
+from main import app
+from services.mural_service import MuralService, TagMatch
+from services.pagination import decode_cursor, encode_cursor, seek_filter
+
+
+def _raw_cursor(raw: bytes) -> str:
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def test_cursor_round_trip():
+    document = {
+        "_id": ObjectId(),
+        "nome": "Mural",
+        "data_criacao": datetime(2020, 5, 17, 12, 30),
+    }
+
+    cursor = encode_cursor(document, ["data_criacao", "_id"])
+
+    assert "=" not in cursor
+    values = decode_cursor(cursor, ["data_criacao", "_id"])
+    assert values["_id"] == document["_id"]
+    assert values["data_criacao"].replace(tzinfo=None) == document["data_criacao"]
+
+
+@pytest.mark.parametrize(
+    "cursor",
+    [
+        "não é base64",
+        _raw_cursor(b"\xff\xfe"),
+        _raw_cursor(b"[1, 2]"),
+        _raw_cursor(b'{"_id": {"$oid": "zz"}}'),
+        _raw_cursor(b'{"_id": {"$date": []}}'),
+        _raw_cursor(b'{"outro": 1}'),
+    ],
+)
+def test_decode_cursor_rejects_tampered_cursors(cursor):
+    with pytest.raises(ValueError, match="Cursor inválido"):
+        decode_cursor(cursor, ["_id"])
+
+
+OID = b'{"$oid": "65f000000000000000000000"}'
+
+
+@pytest.mark.parametrize(
+    "raw, sort_keys",
+    [
+        (b'{"_id": {"$ne": null}}', ["_id"]),
+        (b'{"_id": "65f000000000000000000000"}', ["_id"]),
+        (
+            b'{"data_criacao": {"$ne": null}, "_id": ' + OID + b"}",
+            ["data_criacao", "_id"],
+        ),
+        (b'{"data_criacao": 2020, "_id": ' + OID + b"}", ["data_criacao", "_id"]),
+    ],
+)
+def test_decode_cursor_rejects_values_of_the_wrong_type(raw, sort_keys):
+    # O valor vai direto para o filtro: operadores não podem ser injetados
+    with pytest.raises(ValueError, match="Cursor inválido"):
+        decode_cursor(_raw_cursor(raw), sort_keys)
+
+
+@pytest.mark.anyio
+async def test_by_date_range_rejects_injected_cursor(client):
+    cursor = _raw_cursor(
+        b'{"data_criacao": {"$ne": null}, "_id": {"$oid": "65f000000000000000000000"}}'
+    )
+    response = await client.get(
+        "/murais/by-date-range",
+        params={"start_date": "2020-01-01", "end_date": "2020-12-31", "cursor": cursor},
+    )
+
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Cursor inválido"
+
+
+def test_seek_filter_single_key():
+    oid = ObjectId()
+    assert seek_filter({"_id": oid}, ["_id"]) == {"_id": {"$gt": oid}}
+
+
+def test_seek_filter_compound_keys():
+    oid = ObjectId()
+    assert seek_filter({"ano": 2020, "_id": oid}, ["ano", "_id"]) == {
+        "$or": [
+            {"ano": {"$gt": 2020}},
+            {"ano": 2020, "_id": {"$gt": oid}},
+        ]
+    }
+
+
+def test_build_filters(database):
+    service = MuralService(database)
+    artista_id = ObjectId()
+
+    filters = service._build_filters(
+        bairro="Ribeira", tags=["grafite", "cor"], artista_id=str(artista_id)
+    )
+
+    assert filters == {
+        "bairro": "ribeira",
+        "tags": {"$all": ["grafite", "cor"]},
+        "artista_ids": artista_id,
+    }
+    assert service._build_filters(tags=["a", "b"], match=TagMatch.ANY)["tags"] == {
+        "$in": ["a", "b"]
+    }
+
+
+
+class _Stop(Exception):
+    pass
+
+
+@pytest.mark.anyio
+async def test_near_and_export_take_the_listing_tag_filters(database):
+    # $geoNear e o $lookup com pipeline não existem no mongomock: guarda os
+    # filtros montados e interrompe antes da agregação
+    service = MuralService(database)
+    built = []
+    build_filters = service._build_filters
+
+    def capture(**kwargs):
+        built.append(build_filters(**kwargs))
+        raise _Stop
+
+    service._build_filters = capture
+    with pytest.raises(_Stop):
+        await service.near(0, 0, 100, tags=["grafite", "cor"], match=TagMatch.ANY)
+    with pytest.raises(_Stop):
+        await service.export_murais(
+            tags=["grafite", "cor"], match=TagMatch.ANY
+        ).__anext__()
+
+    assert built == [{"tags": {"$in": ["grafite", "cor"]}}] * 2
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize(
+    "path, method", [("/murais/near", "near"), ("/murais/export", "export_murais")]
+)
+async def test_near_and_export_routes_forward_tags(client, path, method):
+    received = {}
+
+    async def near(*args, **kwargs):
+        received.update(kwargs)
+        return {"murais": [], "limit": 10}
+
+    async def export_murais(**kwargs):
+        received.update(kwargs)
+        return
+        yield
+
+    stubs = {"near": near, "export_murais": export_murais}
+    setattr(app.state.services.murais, method, stubs[method])
+    params = {"lat": 0, "lng": 0, "tags": "grafite, cor", "match": "any"}
+    assert (await client.get(path, params=params)).status_code == 200
+
+    assert received["tags"] == ["grafite", "cor"]
+    assert received["match"] == TagMatch.ANY
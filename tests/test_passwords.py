@@ -0,0 +1,55 @@
+import asyncio
+
+import pytest
+
+from services.passwords import PasswordHasher, PasswordHasherBusy, hash_rounds
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+def hasher():
+    hasher = PasswordHasher(workers=1, max_pending=1, rounds=4)
+    yield hasher
+    hasher.shutdown()
+
+
+async def test_hash_and_verify(hasher):
+    password_hash = await hasher.hash("segredo")
+
+    assert hash_rounds(password_hash) == 4
+    assert await hasher.verify_and_update("segredo", password_hash) == (True, None)
+    assert await hasher.verify_and_update("errada", password_hash) == (False, None)
+
+
+async def test_rehashes_when_the_cost_changes(hasher):
+    stronger = PasswordHasher(workers=1, max_pending=1, rounds=5)
+    try:
+        ok, new_hash = await stronger.verify_and_update(
+            "segredo", await hasher.hash("segredo")
+        )
+    finally:
+        stronger.shutdown()
+
+    assert ok is True
+    assert hash_rounds(new_hash) == 5
+    assert await stronger.verify_and_update("segredo", new_hash) == (True, None)
+
+
+async def test_only_the_first_72_bytes_count(hasher):
+    password_hash = await hasher.hash("a" * 72 + "b")
+
+    ok, _ = await hasher.verify_and_update("a" * 72 + "c", password_hash)
+    assert ok is True
+
+
+async def test_rejects_calls_beyond_max_pending(hasher):
+    running = asyncio.ensure_future(hasher.hash("segredo"))
+    await asyncio.sleep(0)
+
+    with pytest.raises(PasswordHasherBusy):
+        await hasher.hash("outra")
+    await running
+
+    assert hasher.stats()["recusadas"] == 1
+    assert hasher.stats()["em_andamento"] == 0
@@ -0,0 +1,87 @@
+from types import SimpleNamespace
+
+import pytest
+
+from config import database
+from config.pool_monitor import PoolMonitor
+from config.settings import settings
+
+pytestmark = pytest.mark.anyio
+
+
+def _event(duration: float = 0.0):
+    return SimpleNamespace(duration=duration)
+
+
+def test_pool_monitor_counts_connections_and_checkouts():
+    monitor = PoolMonitor()
+    for _ in range(3):
+        monitor.connection_created(_event())
+    monitor.connection_closed(_event())
+    for duration in (0.001, 0.002, 0.010):
+        monitor.connection_checked_out(_event(duration))
+    monitor.connection_checked_in(_event())
+    monitor.connection_check_out_failed(_event(0.5))
+    monitor.pool_cleared(_event())
+
+    stats = monitor.stats()
+
+    assert stats["conexoes_abertas"] == 2
+    assert stats["conexoes_em_uso"] == 2
+    assert stats["checkouts"] == 3
+    assert stats["falhas_checkout"] == 1
+    assert stats["limpezas_pool"] == 1
+    assert stats["espera_ms"] == {"p50": 10.0, "p99": 500.0, "max": 500.0}
+
+
+def test_pool_monitor_keeps_only_the_recent_waits():
+    monitor = PoolMonitor(samples=2)
+    for duration in (1.0, 0.001, 0.003):
+        monitor.connection_checked_out(_event(duration))
+
+    assert monitor.stats()["espera_ms"]["max"] == 3.0
+    assert PoolMonitor().stats()["espera_ms"] == {"p50": None, "p99": None, "max": None}
+
+
+def test_client_options_follow_the_settings(monkeypatch):
+    monkeypatch.setattr(settings, "MONGODB_MAX_POOL_SIZE", 50)
+    monkeypatch.setattr(settings, "MONGODB_COMPRESSORS", "")
+
+    options = database.client_options()
+
+    assert options["maxPoolSize"] == 50
+    assert options["minPoolSize"] == settings.MONGODB_MIN_POOL_SIZE
+    assert options["event_listeners"] == [database.pool_monitor]
+    assert "compressors" not in options
+
+    monkeypatch.setattr(settings, "MONGODB_COMPRESSORS", "zstd,zlib")
+    assert database.client_options()["compressors"] == "zstd,zlib"
+
+
+async def test_warm_pool_sends_one_ping_per_min_pool_connection(monkeypatch):
+    commands = []
+
+    class Database:
+        async def command(self, name):
+            commands.append(name)
+
+    monkeypatch.setattr(settings, "MONGODB_MIN_POOL_SIZE", 4)
+    monkeypatch.setattr(database.database_manager, "database", Database())
+
+    await database.warm_pool()
+
+    assert commands == ["ping"] * 4
+
+
+async def test_health_reports_the_pool(client):
+    response = await client.get("/health")
+
+    assert response.status_code == 200
+    assert set(response.json()["mongodb"]) == {
+        "conexoes_abertas",
+        "conexoes_em_uso",
+        "checkouts",
+        "falhas_checkout",
+        "limpezas_pool",
+        "espera_ms",
+    }
@@ -0,0 +1,49 @@
+import pytest
+
+from main import app
+from services.registry import ServiceRegistry
+
+pytestmark = pytest.mark.anyio
+
+
+def test_services_share_the_registry_collaborators(database):
+    registry = ServiceRegistry(database)
+
+    services = (
+        registry.murais,
+        registry.artistas,
+        registry.locais,
+        registry.usuarios,
+        registry.avaliacoes,
+    )
+    assert all(service.generations is registry.generations for service in services)
+    for service in (registry.murais, registry.artistas, registry.locais):
+        assert service.rollups is registry.rollups
+    assert registry.avaliacoes.rollups is registry.rollups
+    assert registry.murais.tag_stats is registry.tag_stats
+    assert registry.locais.tag_stats is registry.tag_stats
+    assert registry.tag_stats.generations is registry.generations
+    assert registry.artistas.search is registry.search
+
+
+async def test_routes_use_the_registry_instances(client, monkeypatch):
+    locais = app.state.services.locais
+    chamadas = []
+
+    async def search_by_neighborhood(bairro):
+        chamadas.append(bairro)
+        return []
+
+    monkeypatch.setattr(locais, "search_by_neighborhood", search_by_neighborhood)
+
+    for _ in range(2):
+        response = await client.get("/locais/search/bairro", params={"bairro": "Sé"})
+        assert response.status_code == 200
+    assert chamadas == ["Sé", "Sé"]
+
+
+async def test_cache_stats_come_from_the_registry(client):
+    response = await client.get("/cache/stats")
+
+    assert response.status_code == 200
+    assert set(response.json()) == {"analytics", "contagens", "autocompletar", "tokens"}
@@ -0,0 +1,75 @@
+from datetime import datetime
+
+import pytest
+
+from services.cache import analytics_cache
+from services.rollup_service import LEASE_ID, RollupScheduler, RollupService
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_writes_leave_rollups_pending_until_rebuilt(database):
+    service = RollupService(database)
+    # Nunca construídos: pendentes e sem atualizado_em
+    assert await service.pending() == ["bairro", "artista"]
+    assert await service.built("bairro") is False
+
+    await database.rollup_estado.insert_many(
+        [
+            {"_id": "bairro", "construido": 0, "atualizado_em": datetime.utcnow()},
+            {"_id": "artista", "construido": 0, "atualizado_em": datetime.utcnow()},
+        ]
+    )
+    assert await service.pending() == []
+    assert await service.built("bairro") is True
+
+    await service.mark_dirty("bairro")
+    await service.mark_dirty("bairro", "artista")
+    assert await service.pending() == ["bairro", "artista"]
+    assert (await service.states())["bairro"]["escritas"] == 2
+
+
+async def test_lease_is_held_by_one_process_until_it_expires(database):
+    service = RollupService(database)
+
+    assert await service.acquire_lease("a", ttl=60) is True
+    assert await service.acquire_lease("b", ttl=60) is False
+    # O dono renova o próprio lease
+    assert await service.acquire_lease("a", ttl=60) is True
+
+    await database.rollup_estado.update_one(
+        {"_id": LEASE_ID}, {"$set": {"expira_em": datetime(2000, 1, 1)}}
+    )
+    assert await service.acquire_lease("b", ttl=60) is True
+    lease = await database.rollup_estado.find_one({"_id": LEASE_ID})
+    assert lease["dono"] == "b"
+
+    await service.release_lease("a")
+    assert await database.rollup_estado.find_one({"_id": LEASE_ID}) is not None
+    await service.release_lease("b")
+    assert await service.acquire_lease("a", ttl=60) is True
+
+
+async def test_followers_drop_their_cache_when_a_rollup_is_rebuilt(database):
+    service = RollupService(database)
+    await database.rollup_estado.insert_many(
+        [
+            {"_id": "bairro", "construido": 0, "atualizado_em": datetime(2024, 1, 1)},
+            {"_id": "artista", "construido": 0, "atualizado_em": datetime(2024, 1, 1)},
+            {"_id": LEASE_ID, "dono": "outro", "expira_em": datetime(2999, 1, 1)},
+        ]
+    )
+    scheduler = RollupScheduler()
+    await scheduler.run_once(service, interval=60)
+    analytics_cache.clear()
+    analytics_cache.set(("media_por_bairro",), {"items": []})
+    analytics_cache.set(("top_artistas", 10), {"items": []})
+
+    # Outro processo reconstruiu stats_bairro
+    await database.rollup_estado.update_one(
+        {"_id": "bairro"}, {"$set": {"atualizado_em": datetime(2024, 1, 2)}}
+    )
+    await scheduler.run_once(service, interval=60)
+
+    assert analytics_cache.get(("media_por_bairro",)) is None
+    assert analytics_cache.get(("top_artistas", 10)) is not None
@@ -0,0 +1,78 @@
+import pytest
+from bson import ObjectId
+
+from config.settings import settings
+from services.search_service import SearchService, SearchType
+
+pytestmark = pytest.mark.anyio
+
+# mongomock não implementa $text: cada coleção é simulada por _top/_count
+RESULTADOS = {
+    SearchType.MURAL: [{"score": 9.0}, {"score": 2.0}],
+    SearchType.ARTISTA: [{"score": 5.0}],
+    SearchType.LOCAL: [{"score": 7.0}, {"score": 1.0}],
+}
+
+
+@pytest.fixture
+def service(database, monkeypatch):
+    service = SearchService(database)
+    chamadas = []
+
+    async def top(tipo, q, limit):
+        chamadas.append((tipo, q, limit))
+        return RESULTADOS[tipo][:limit]
+
+    async def count(tipo, q):
+        return len(RESULTADOS[tipo]) * 10
+
+    monkeypatch.setattr(service, "_top", top)
+    monkeypatch.setattr(service, "_count", count)
+    service.chamadas = chamadas
+    return service
+
+
+async def test_results_are_interleaved_by_score(service):
+    result = await service.search("  grafite   urbano ", page=2, limit=2)
+
+    scores = [item["score"] for item in result["items"]]
+    assert scores == [5.0, 2.0]
+    assert result["facets"] == {"mural": 20, "artista": 10, "local": 20}
+    assert result["total"] == 50
+    assert result["pages"] == 25
+    # Cada coleção devolve só skip + limit resultados, com o termo normalizado
+    assert {(q, limit) for _, q, limit in service.chamadas} == {("grafite urbano", 4)}
+
+
+async def test_search_can_be_restricted_to_some_types(service):
+    tipos = [SearchType.LOCAL, SearchType.LOCAL]
+
+    result = await service.search("grafite", tipos=tipos)
+
+    assert [item["score"] for item in result["items"]] == [7.0, 1.0]
+    assert result["facets"] == {"local": 20}
+
+
+async def test_blank_query_is_rejected(service):
+    with pytest.raises(ValueError):
+        await service.search("   ")
+
+
+async def test_pages_beyond_the_result_cap_are_rejected(service, client):
+    limit = 10
+    page = settings.SEARCH_MAX_RESULTS // limit + 1
+
+    with pytest.raises(ValueError):
+        await service.search("grafite", page=page, limit=limit)
+    assert service.chamadas == []
+
+    response = await client.get("/search/", params={"q": "grafite", "page": page})
+    assert response.status_code == 400
+
+
+def test_serialize_renames_the_id_and_tags_the_type():
+    oid = ObjectId()
+
+    item = SearchService._serialize(SearchType.ARTISTA, {"_id": oid, "nome": "Ana"})
+
+    assert item == {"tipo": "artista", "id": oid, "nome": "Ana"}
@@ -0,0 +1,49 @@
+from datetime import datetime
+
+import pytest
+
+from services.tag_stats import TagStatsService, tag_delta
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_apply_keeps_general_and_per_bairro_counters(database):
+    service = TagStatsService(database)
+    await service.apply(tag_delta(["grafite", "grafite", "stencil"], "centro"))
+    await service.apply(tag_delta(["grafite"], None))
+
+    assert await service.top() == [
+        {"tag": "grafite", "total": 2},
+        {"tag": "stencil", "total": 1},
+    ]
+    # Bairro normalizado na consulta; empate no total, sem ordem definida
+    por_bairro = await service.top("Centro")
+    assert sorted(por_bairro, key=lambda item: item["tag"]) == [
+        {"tag": "grafite", "total": 1},
+        {"tag": "stencil", "total": 1},
+    ]
+
+    # Contadores zerados são removidos
+    await service.apply(tag_delta(["stencil"], "centro", sign=-1))
+    assert await service.top("centro") == [{"tag": "grafite", "total": 1}]
+
+
+async def test_rebuild_drops_counters_created_by_apply(database):
+    service = TagStatsService(database)
+    await service.apply(tag_delta(["grafite"], None))
+    # O $merge de rebuild() não existe no mongomock: grava o que ele gravaria
+    # para a tag que continua em uso e aplica a limpeza da reconstrução
+    atualizado_em = datetime.utcnow()
+    await database.stats_tag.insert_one(
+        {
+            "_id": {"tag": "lambe", "bairro": None},
+            "tag": "lambe",
+            "bairro": None,
+            "total": 1,
+            "atualizado_em": atualizado_em,
+        }
+    )
+
+    await service._delete_stale(atualizado_em)
+
+    assert await service.top() == [{"tag": "lambe", "total": 1}]
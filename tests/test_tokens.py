@@ -0,0 +1,73 @@
+import pytest
+
+from config.settings import settings
+from services.tokens import InvalidToken, TokenManager, TokenType
+
+pytestmark = pytest.mark.anyio
+
+
+def test_issue_and_verify():
+    tokens = TokenManager().issue("usuario-1")
+
+    claims = TokenManager().verify(tokens["access_token"])
+    assert claims["sub"] == "usuario-1"
+    assert claims["type"] == TokenType.ACCESS.value
+
+
+def test_rejects_the_wrong_token_type():
+    manager = TokenManager()
+    tokens = manager.issue("usuario-1")
+
+    with pytest.raises(InvalidToken):
+        manager.verify(tokens["refresh_token"])
+    with pytest.raises(InvalidToken):
+        manager.verify(tokens["access_token"], TokenType.REFRESH)
+
+
+def test_rejects_tokens_signed_with_another_key(monkeypatch):
+    tokens = TokenManager().issue("usuario-1")
+    monkeypatch.setattr(settings, "JWT_SECRET_KEY", "outra-chave-" + "x" * 32)
+
+    with pytest.raises(InvalidToken):
+        TokenManager().verify(tokens["access_token"])
+
+
+async def test_revoked_tokens_are_rejected_by_every_process(database):
+    manager = TokenManager()
+    tokens = manager.issue("usuario-1")
+    claims = manager.verify(tokens["access_token"])
+
+    assert await manager.revoke(database, claims) is True
+    assert await manager.revoke(database, claims) is False
+    with pytest.raises(InvalidToken):
+        manager.verify(tokens["access_token"])
+
+    # Outro processo vê a revogação ao recarregar a lista
+    other = TokenManager()
+    await other.load_revoked(database)
+    with pytest.raises(InvalidToken):
+        other.verify(tokens["access_token"])
+
+
+async def test_refresh_token_is_single_use(database):
+    manager = TokenManager()
+    tokens = manager.issue("usuario-1")
+
+    renewed = await manager.refresh(database, tokens["refresh_token"])
+    assert manager.verify(renewed["access_token"])["sub"] == "usuario-1"
+
+    # Mesmo em um processo que ainda não recarregou as revogações
+    with pytest.raises(InvalidToken):
+        await TokenManager().refresh(database, tokens["refresh_token"])
+
+
+@pytest.mark.parametrize("key", ["", "troque-esta-chave", "curta"])
+def test_check_secret_key_refuses_weak_keys(monkeypatch, key):
+    monkeypatch.setattr(settings, "JWT_SECRET_KEY", key)
+
+    with pytest.raises(RuntimeError):
+        TokenManager().check_secret_key()
+
+
+def test_check_secret_key_accepts_a_long_key():
+    TokenManager().check_secret_key()
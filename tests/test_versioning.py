@@ -0,0 +1,60 @@
+import pytest
+from bson import ObjectId
+
+from models.artista import ArtistaCreate, ArtistaUpdate
+from routes.murais import _mural_etag
+from services.artista_service import ArtistaService
+from services.usuario_service import UsuarioService
+
+pytestmark = pytest.mark.anyio
+
+
+async def _generation(database, name):
+    document = await database.geracoes.find_one({"_id": name})
+    return document["valor"] if document else 0
+
+
+async def test_update_bumps_version_only_when_something_changes(database):
+    service = UsuarioService(database)
+    usuario_id = await service.create({"nome": "Ana", "email": "ana@example.com"})
+
+    assert await service.update(usuario_id, {"nome": "Ana Maria"}) is True
+    document = await database.usuarios.find_one({"_id": ObjectId(usuario_id)})
+    assert document["versao"] == 1
+
+    # Mesmos dados: nada muda e, como antes, a escrita não conta como atualização
+    assert await service.update(usuario_id, {"nome": "Ana Maria"}) is False
+    document = await database.usuarios.find_one({"_id": ObjectId(usuario_id)})
+    assert document["versao"] == 1
+
+
+async def test_artista_update_without_changes_keeps_version(database):
+    service = ArtistaService(database)
+    artista = await service.create_artista(ArtistaCreate(nome="Eduardo"))
+    artista_id = artista["id"]
+
+    updated = await service.update_artista(artista_id, ArtistaUpdate(nome="Kobra"))
+    assert updated["nome"] == "Kobra"
+    generation = await _generation(database, "artistas")
+
+    unchanged = await service.update_artista(artista_id, ArtistaUpdate(nome="Kobra"))
+    assert unchanged["nome"] == "Kobra"
+    assert unchanged["versao"] == 1
+    assert await _generation(database, "artistas") == generation
+
+
+def test_mural_etag_changes_when_the_local_disappears():
+    mural_id, local_id = ObjectId(), ObjectId()
+    with_local = _mural_etag(
+        {"id": mural_id, "versao": 2, "local": {"id": local_id, "nome": "Praça"}}
+    )
+    without_local = _mural_etag({"id": mural_id, "versao": 2, "local": None})
+    other_local = _mural_etag(
+        {"id": mural_id, "versao": 2, "local": {"id": ObjectId(), "nome": "Praça"}}
+    )
+
+    # Local nunca atualizado (sem versao) vs. local removido
+    assert len({with_local, without_local, other_local}) == 3
+    assert with_local != _mural_etag(
+        {"id": mural_id, "versao": 2, "local": {"id": local_id, "versao": 1}}
+    )